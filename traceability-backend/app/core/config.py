@@ -1,12 +1,92 @@
+from typing import Dict, Optional
 from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     APP_NAME: str = "Traceability API"
     DATABASE_URL: str = "sqlite:///./trace.db"
+    # motor async para las rutas calientes (ingesta, lectura de piezas, métricas);
+    # sin ASYNC_DATABASE_URL se deriva de DATABASE_URL (sqlite -> sqlite+aiosqlite)
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # réplica de lectura para métricas, historiales y listados (sin URL se lee
+    # del primario). Con DATABASE_READ_SNAPSHOT_SECONDS > 0 la URL es un archivo
+    # SQLite que se rehace copiando el primario cada tantos segundos; si la copia
+    # tiene más de DATABASE_READ_MAX_LAG_SECONDS se lee del primario
+    DATABASE_READ_URL: Optional[str] = None
+    DATABASE_READ_SNAPSHOT_SECONDS: float = 0.0
+    DATABASE_READ_MAX_LAG_SECONDS: float = 30.0
+    # una base por línea de producción, p. ej. {"L1": "sqlite:///./trace_l1.db"}
+    # (JSON en la variable de entorno). Con shards, la base principal queda
+    # como catálogo: usuarios, API keys, estaciones y el directorio de piezas
+    SHARD_URLS: Dict[str, str] = {}
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # pool de conexiones: queue | null | static | singleton. Con rutas sync,
+    # size + overflow debería cubrir los 40 hilos del threadpool de AnyIO
+    DB_POOL_CLASS: str = "queue"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # checkouts que esperan más que esto se registran en el log
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0
+
+    # perfil de SQLite (PRAGMAs al abrir cada conexión); WAL permite leer
+    # mientras se escribe. cache_size negativo = KiB
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # mantenimiento periódico (0 = desactivado)
+    SQLITE_CHECKPOINT_SECONDS: float = 300.0
+    SQLITE_OPTIMIZE_SECONDS: float = 3600.0
+
+    # migraciones: los rellenos de columnas van por lotes con una pausa entre
+    # lotes para no acaparar el lock de escritura
+    MIGRATION_BATCH_SIZE: int = 1000
+    MIGRATION_BATCH_PAUSE_SECONDS: float = 0.05
+
+    # particiones mensuales de trace_events (un archivo SQLite por mes)
+    TRACE_PARTITION_DIR: str = "./partitions"
+    TRACE_PARTITION_CACHE_CHECK_SECONDS: float = 5.0
+    # archivo frío: eventos más viejos que esto salen de la base a gzip por mes.
+    # Una consulta adjunta a la vez todas las particiones vivas y SQLite admite
+    # 10 (partition_service.MAX_ATTACHED): 300 días dejan como mucho 10 meses
+    # cerrados antes del corte (10 meses seguidos suman al menos 303 días)
+    TRACE_ARCHIVE_DIR: str = "./archive"
+    TRACE_ARCHIVE_AFTER_DAYS: int = 300
+    TRACE_ARCHIVE_BATCH_SIZE: int = 5000
+
+    # arranque de un worker (verificar el esquema y calentar caches); si tarda
+    # más que esto se registra en el log. El esquema y los datos iniciales los
+    # crea "python -m app.manage init"
+    STARTUP_BUDGET_SECONDS: float = 1.0
+
+    # cada cuanto un worker compara su cache de estaciones con table_versions
+    STATION_CACHE_CHECK_SECONDS: float = 5.0
+
+    # cada cuanto un worker revisa si cambiaron las API keys de máquina
+    API_KEY_CACHE_CHECK_SECONDS: float = 5.0
+
+    # cache de usuarios autenticados (0 = deshabilitada)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_CHECK_SECONDS: float = 2.0
+
+    # cada cuanto un worker lee las revocaciones de tokens hechas por otros
+    REVOCATION_CHECK_SECONDS: float = 1.0
+
+    # pbkdf2 en un pool de procesos (0 = en el hilo de la petición); pasado
+    # HASH_MAX_PENDING operaciones en curso el login responde 503
+    HASH_WORKERS: int = 2
+    HASH_MAX_PENDING: int = 32
+    HASH_RETRY_AFTER_SECONDS: int = 2
+
     class Config:
         env_file = ".env"
 
@@ -1,16 +1,25 @@
-from typing import Generator
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session, declarative_base
+from typing import Any, AsyncGenerator, Callable, Generator, Optional, TypeVar, Union
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from app.core.config import settings
-DATABASE_URL = settings.DATABASE_URL
-
-engine = create_engine(
+# engines y sesiones viven en app.core.engines (sin FastAPI); se reexportan
+# para las rutas y los tests
+from app.core.engines import (
+    ASYNC_DATABASE_URL,
     DATABASE_URL,
-    future=True,
+    AsyncSessionLocal,
+    Base,
+    SessionLocal,
+    async_database_url,
+    async_engine,
+    engine,
+    read_replica,
+    shard_router,
 )
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+from app.core.sharding import ShardRouter
+from app.core.telemetry import telemetry
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -18,3 +27,94 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+#------------------------------------------------------------------------------
+# Capa async (DB_ASYNC=true): mismo esquema, driver async (aiosqlite en SQLite)
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+T = TypeVar("T")
+
+class DBRunner:
+    """
+    Ejecuta funciones de servicio (síncronas, reciben una Session como primer
+    argumento) sin bloquear el event loop: en el threadpool con la sesión
+    sync, o con AsyncSession.run_sync sobre el driver async.
+    """
+
+    def __init__(self, session: Union[Session, AsyncSession]):
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+async def get_sync_runner(db: Session = Depends(get_db)) -> DBRunner:
+    return DBRunner(db)
+
+async def get_async_runner(db: AsyncSession = Depends(get_async_db)) -> DBRunner:
+    return DBRunner(db)
+
+# las rutas dependen de get_db_runner; DB_ASYNC elige la implementación
+get_db_runner = get_async_runner if settings.DB_ASYNC else get_sync_runner
+
+#------------------------------------------------------------------------------
+# Lecturas (métricas, historiales, listados): réplica si hay DATABASE_READ_URL.
+# Un cliente que necesita ver lo que acaba de escribir manda
+# "X-Consistency: strong" y esa petición lee del primario.
+
+READ_CONSISTENCY_HEADER = "X-Consistency"
+
+def wants_primary(request: Request) -> bool:
+    return request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "strong"
+
+def _use_replica(request: Request) -> bool:
+    if read_replica is None:
+        return False
+    if wants_primary(request) or not read_replica.available():
+        telemetry.incr("db.read.primary")
+        return False
+    telemetry.incr("db.read.replica")
+    return True
+
+# dependen de get_db/get_async_db: sin réplica se reutiliza esa sesión (y los
+# overrides de los tests siguen aplicando)
+
+def get_read_db(
+    request: Request, db: Session = Depends(get_db)
+) -> Generator[Session, None, None]:
+    if not _use_replica(request):
+        yield db
+        return
+    read_db = read_replica.SessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+async def get_async_read_db(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    if not _use_replica(request):
+        yield db
+        return
+    async with read_replica.AsyncSessionLocal() as read_db:
+        yield read_db
+
+async def get_sync_read_runner(db: Session = Depends(get_read_db)) -> DBRunner:
+    return DBRunner(db)
+
+async def get_async_read_runner(db: AsyncSession = Depends(get_async_read_db)) -> DBRunner:
+    return DBRunner(db)
+
+get_read_runner = get_async_read_runner if settings.DB_ASYNC else get_sync_read_runner
+
+#------------------------------------------------------------------------------
+# Shards por línea de producción (SHARD_URLS). Sin shards las rutas usan la
+# base principal como hasta ahora.
+
+def get_shard_router() -> Optional[ShardRouter]:
+    return shard_router
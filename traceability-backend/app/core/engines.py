@@ -0,0 +1,79 @@
+from typing import Optional
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base
+from app.core.config import settings
+from app.core.pool_telemetry import instrument_engine, pool_options
+from app.core.read_replica import ReadReplica
+from app.core.sharding import ShardRouter
+from app.core.sqlite_profile import configure_sqlite
+
+# Engines, sesiones y base declarativa sin FastAPI: los importan los modelos,
+# las migraciones y los comandos de app.manage. Las dependencias de las rutas
+# (get_db, runners, réplica por petición) están en app.core.database
+DATABASE_URL = settings.DATABASE_URL
+
+engine = create_engine(
+    DATABASE_URL,
+    future=True,
+    **pool_options("db.pool"),
+)
+configure_sqlite(engine)
+instrument_engine(engine)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
+
+#------------------------------------------------------------------------------
+# Capa async (DB_ASYNC=true): mismo esquema, driver async (aiosqlite en SQLite)
+
+def async_database_url(url: str) -> str:
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+
+# solo se crea si se usa: el driver async es opcional en modo sync
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, **pool_options("db.async_pool", is_async=True))
+    if settings.DB_ASYNC
+    else None
+)
+if async_engine is not None:
+    configure_sqlite(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine)
+
+# expire_on_commit=False: fuera de run_sync no se pueden recargar atributos
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+#------------------------------------------------------------------------------
+# Réplica de lectura (DATABASE_READ_URL)
+
+def build_read_replica() -> Optional[ReadReplica]:
+    if not settings.DATABASE_READ_URL:
+        return None
+    primary = make_url(DATABASE_URL)
+    return ReadReplica(
+        settings.DATABASE_READ_URL,
+        max_lag_seconds=settings.DATABASE_READ_MAX_LAG_SECONDS,
+        async_url=async_database_url(settings.DATABASE_READ_URL) if settings.DB_ASYNC else None,
+        snapshot_source=primary.database if primary.get_backend_name() == "sqlite" else None,
+        snapshot_seconds=settings.DATABASE_READ_SNAPSHOT_SECONDS,
+    )
+
+read_replica = build_read_replica()
+
+#------------------------------------------------------------------------------
+# Shards por línea de producción (SHARD_URLS). Sin shards las rutas usan la
+# base principal como hasta ahora.
+
+def build_shard_router() -> Optional[ShardRouter]:
+    if not settings.SHARD_URLS:
+        return None
+    return ShardRouter(settings.SHARD_URLS)
+
+shard_router = build_shard_router()
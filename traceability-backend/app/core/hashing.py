@@ -0,0 +1,143 @@
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.telemetry import telemetry
+
+
+@lru_cache(maxsize=None)
+def crypt_context():
+    # passlib se importa al primer hash: importar la app o un comando de
+    # app.manage que no toca contraseñas no lo paga
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+
+class HashingBusy(Exception):
+    pass
+
+#------------------------------------------------------------------------------
+# Se ejecutan en los procesos del pool
+
+def _init_worker() -> None:
+    # prioridad baja: con la CPU saturada gana el proceso web y lo que se
+    # retrasa es el login, no la ingesta
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+# _timed_*: devuelven también el instante en que empezaron (CLOCK_MONOTONIC es
+# común a todos los procesos) para medir el tiempo en cola
+
+def _timed_hash(password: str) -> Tuple[str, float]:
+    started = time.monotonic()
+    return crypt_context().hash(password), started
+
+def _timed_verify(password: str, hashed: str) -> Tuple[bool, float]:
+    started = time.monotonic()
+    return crypt_context().verify(password, hashed), started
+
+#------------------------------------------------------------------------------
+
+class PasswordHasher:
+    """
+    pbkdf2 fuera del proceso web: un pool de `workers` procesos y como mucho
+    `max_pending` operaciones en curso (ejecutándose o en cola). Pasado ese
+    límite se rechaza con HashingBusy en lugar de encolar sin fin, así un pico
+    de logins no se come la CPU ni los hilos del resto de endpoints.
+    Con workers=0 se hashea en el threadpool, como antes.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn: el proceso web tiene hilos y event loops vivos
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                telemetry.incr("auth.hash_rejected")
+                raise HashingBusy()
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    @staticmethod
+    def _record(submitted: float, started: float) -> None:
+        finished = time.monotonic()
+        telemetry.observe("auth.hash_queue", max(0.0, started - submitted))
+        telemetry.observe("auth.hash", finished - started)
+
+    async def _run(self, fn, *args):
+        self._acquire()
+        try:
+            submitted = time.monotonic()
+            executor = self._get_executor()
+            if executor is None:
+                from starlette.concurrency import run_in_threadpool
+
+                result, started = await run_in_threadpool(fn, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, started = await loop.run_in_executor(executor, fn, *args)
+            self._record(submitted, started)
+            return result
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_timed_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_timed_verify, password, hashed)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        # para procesos por lotes (seeders): reparte entre todos los workers
+        executor = self._get_executor()
+        submitted = time.monotonic()
+        if executor is None:
+            results = [_timed_hash(p) for p in passwords]
+        else:
+            results = list(executor.map(_timed_hash, passwords))
+        for _, started in results:
+            self._record(submitted, started)
+        return [hashed for hashed, _ in results]
+
+
+password_hasher = PasswordHasher(
+    workers=settings.HASH_WORKERS,
+    max_pending=settings.HASH_MAX_PENDING,
+)
+telemetry.gauge("auth.hash_pending", lambda: password_hasher._pending)
+atexit.register(password_hasher.shutdown)
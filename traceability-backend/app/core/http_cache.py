@@ -0,0 +1,20 @@
+from typing import Optional
+from fastapi import Response, status
+
+
+def make_etag(kind: str, version: int) -> str:
+    return f'"{kind}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
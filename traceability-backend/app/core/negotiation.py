@@ -0,0 +1,138 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response
+from app.core.serialization import dumps
+
+try:
+    import msgpack
+except ImportError:  # sin msgpack el formato binario simplemente no se ofrece
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COLUMNAR_JSON = "application/vnd.traceability.columnar+json"
+
+_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+}
+
+
+def _supported() -> List[str]:
+    formats = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    return formats
+
+
+def negotiate(request: Request) -> str:
+    accept = request.headers.get("accept")
+    if not accept:
+        return JSON
+
+    supported = _supported()
+    best, best_q = None, 0.0
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        media_type = _ALIASES.get(media_type.lower(), media_type.lower())
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+
+        if media_type in ("*/*", "application/*"):
+            candidate = JSON
+        elif media_type in supported:
+            candidate = media_type
+        else:
+            continue
+
+        # a igual q gana el primero que pidió el cliente
+        if q > best_q:
+            best, best_q = candidate, q
+
+    if best is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Formatos disponibles: {', '.join(supported)}",
+        )
+    return best
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _columnar(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+    data: Dict[str, List[Any]] = {key: [] for key in keys}
+    dictionaries: Dict[str, List[Any]] = {}
+    columns = [data[key] for key in keys]
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+
+    # los enums viajan como índices a un diccionario por columna
+    for key in keys:
+        values = data[key]
+        sample = next((v for v in values if v is not None), None)
+        if isinstance(sample, Enum):
+            members = list(type(sample))
+            codes = {member: i for i, member in enumerate(members)}
+            data[key] = [None if v is None else codes[v] for v in values]
+            dictionaries[key] = [member.value for member in members]
+        elif sample is not None and hasattr(sample, "isoformat"):
+            data[key] = [None if v is None else v.isoformat() for v in values]
+
+    return {"columns": list(keys), "data": data, "dictionaries": dictionaries}
+
+
+def rows_response(
+    request: Request,
+    rows: Sequence[Sequence[Any]],
+    keys: Sequence[str],
+    meta: Optional[Dict[str, Any]] = None,
+    rows_key: Optional[str] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    Codifica filas de una consulta según el Accept del cliente.
+
+    Con meta/rows_key las filas van dentro de un documento, p. ej.
+    {"from": ..., "to": ..., "throughput_per_day": [...]}.
+    """
+    media_type = negotiate(request)
+
+    if media_type == COLUMNAR_JSON:
+        body = _columnar(keys, rows)
+        if meta is not None:
+            body = {**meta, rows_key: body}
+        content = dumps(body)
+    else:
+        records = [dict(zip(keys, row)) for row in rows]
+        body = records if meta is None else {**meta, rows_key: records}
+        if media_type == MSGPACK:
+            content = msgpack.packb(body, default=_plain, use_bin_type=True)
+        else:
+            content = dumps(body)
+
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept"
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def document_response(request: Request, content: Dict[str, Any]) -> Response:
+    # documentos sin filas (p. ej. overview): JSON o msgpack, columnar no aplica
+    media_type = negotiate(request)
+    if media_type == MSGPACK:
+        body = msgpack.packb(content, default=_plain, use_bin_type=True)
+    else:
+        media_type = JSON
+        body = dumps(content)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple, Type
+from sqlalchemy import event, exc
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    NullPool,
+    Pool,
+    QueuePool,
+    SingletonThreadPool,
+    StaticPool,
+)
+from app.core.config import settings
+from app.core.statement_cache import instrument_statement_cache
+from app.core.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+# ruta de la petición en curso ("GET /api/parts/PZA-1"); la pone RouteContextMiddleware
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+
+class RouteContextMiddleware:
+    # ASGI puro: el contextvar llega a los hilos del threadpool y a run_sync
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_route.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
+
+#------------------------------------------------------------------------------
+
+class PoolTelemetry:
+    """
+    Métricas de un pool: espera de checkout, conexiones prestadas y quién las
+    tiene. Un checkout lento (o un timeout) se registra en el log junto con la
+    ruta que lleva más tiempo reteniendo una conexión.
+    """
+
+    def __init__(self, name: str, slow_checkout_seconds: float):
+        self.name = name
+        self.slow_checkout_seconds = slow_checkout_seconds
+        self.capacity: Optional[int] = None
+        self._lock = threading.Lock()
+        self._held: Dict[int, Tuple[Optional[str], float]] = {}
+
+        telemetry.gauge(f"{name}.checked_out", lambda: len(self._held))
+        telemetry.gauge(f"{name}.utilization", self.utilization)
+
+    def utilization(self) -> Optional[float]:
+        if not self.capacity:
+            return None
+        return round(len(self._held) / self.capacity, 3)
+
+    def longest_holder(self) -> Optional[Tuple[str, float]]:
+        now = time.monotonic()
+        with self._lock:
+            if not self._held:
+                return None
+            route, since = min(self._held.values(), key=lambda held: held[1])
+        return route or "(fuera de una petición)", now - since
+
+    def _report(self, message: str, waited: float) -> None:
+        holder = self.longest_holder()
+        if holder is None:
+            logger.warning("%s: %s tras %.1f ms", self.name, message, waited * 1000)
+        else:
+            logger.warning(
+                "%s: %s tras %.1f ms (ruta %s); la conexión más retenida la tiene %s desde hace %.1f ms",
+                self.name,
+                message,
+                waited * 1000,
+                current_route.get(),
+                holder[0],
+                holder[1] * 1000,
+            )
+
+    def on_wait(self, waited: float) -> None:
+        telemetry.observe(f"{self.name}.checkout_wait", waited)
+        if waited >= self.slow_checkout_seconds:
+            telemetry.incr(f"{self.name}.slow_checkouts")
+            self._report("checkout lento", waited)
+
+    def on_timeout(self, waited: float) -> None:
+        telemetry.incr(f"{self.name}.timeouts")
+        self._report("timeout esperando conexión", waited)
+
+    def on_checkout(self, record) -> None:
+        with self._lock:
+            self._held[id(record)] = (current_route.get(), time.monotonic())
+
+    def on_checkin(self, record) -> None:
+        with self._lock:
+            self._held.pop(id(record), None)
+
+
+class _InstrumentedPool:
+    # se mezcla delante de la clase de pool elegida; mide la espera de connect()
+    _telemetry: PoolTelemetry
+
+    def connect(self):
+        start = time.monotonic()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self._telemetry.on_timeout(time.monotonic() - start)
+            raise
+        self._telemetry.on_wait(time.monotonic() - start)
+        return connection
+
+
+_POOL_CLASSES: Dict[str, Type[Pool]] = {
+    "queue": QueuePool,
+    "null": NullPool,
+    "static": StaticPool,
+    "singleton": SingletonThreadPool,
+}
+
+
+def pool_options(name: str, is_async: bool = False) -> Dict[str, Any]:
+    """Argumentos de create_engine para el pool configurado en Settings."""
+    try:
+        base = _POOL_CLASSES[settings.DB_POOL_CLASS]
+    except KeyError:
+        raise ValueError(
+            f"DB_POOL_CLASS debe ser uno de: {', '.join(_POOL_CLASSES)}"
+        ) from None
+    if base is QueuePool and is_async:
+        base = AsyncAdaptedQueuePool
+
+    pool_telemetry = PoolTelemetry(name, settings.DB_POOL_SLOW_CHECKOUT_MS / 1000)
+    pool_class = type(
+        f"Instrumented{base.__name__}", (_InstrumentedPool, base), {"_telemetry": pool_telemetry}
+    )
+
+    options: Dict[str, Any] = {
+        "poolclass": pool_class,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    if issubclass(base, QueuePool):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+        pool_telemetry.capacity = settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0)
+    return options
+
+
+def instrument_engine(engine) -> None:
+    """
+    Registra checkout/checkin del pool del engine (sync o sync_engine) y los
+    aciertos de su caché de sentencias compiladas.
+    """
+    pool_telemetry: Optional[PoolTelemetry] = getattr(engine.pool, "_telemetry", None)
+    if pool_telemetry is None:
+        return
+    instrument_statement_cache(engine, f"{pool_telemetry.name}.statement_cache")
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_telemetry.on_checkout(connection_record)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        pool_telemetry.on_checkin(connection_record)
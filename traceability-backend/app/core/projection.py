@@ -0,0 +1,45 @@
+from typing import List, Optional, Type
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+
+
+def schema_fields(schema: Type[BaseModel]) -> List[str]:
+    # orden de los campos del esquema = orden de las llaves en el JSON
+    return list(schema.__fields__)
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> List[str]:
+    """
+    Convierte ?fields=a,b,c en la lista de columnas a seleccionar; sin el
+    parámetro se seleccionan todos los campos del esquema de lectura.
+    Solo se permiten esos campos (nunca password_hash).
+    """
+    if fields is None:
+        return schema_fields(schema)
+
+    requested = []
+    for name in fields.split(","):
+        name = name.strip()
+        if name and name not in requested:
+            requested.append(name)
+
+    invalid = [name for name in requested if name not in schema.__fields__]
+    if invalid or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos no válidos: {', '.join(invalid) or '(vacío)'}",
+        )
+    return requested
+
+
+def field_columns(model, fields: List[str]) -> list:
+    # model puede ser un alias del ORM (p. ej. trace_events sobre sus particiones)
+    columns = inspect(model).selectable.c
+    return [columns[name] for name in fields]
+
+
+def select_fields(model, fields: List[str]):
+    # SELECT solo de esas columnas: filas planas, sin mapa de identidad del ORM
+    return select(*field_columns(model, fields))
+
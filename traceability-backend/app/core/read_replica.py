@@ -0,0 +1,149 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.pool_telemetry import instrument_engine, pool_options
+from app.core.sqlite_profile import configure_sqlite
+from app.core.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class ReadReplica:
+    """
+    Engine de solo lectura para métricas, historiales y listados. Dos modos:
+
+    - en vivo: DATABASE_READ_URL abre la misma base en solo lectura (en SQLite
+      `sqlite:///file:./trace.db?mode=ro&uri=true`); con WAL no bloquea a los
+      escritores y no tiene retraso.
+    - snapshot (snapshot_seconds > 0): DATABASE_READ_URL es un archivo que se
+      rehace cada snapshot_seconds copiando el primario con la API de backup
+      de SQLite; el retraso es la antigüedad de la copia.
+
+    Si el retraso supera max_lag_seconds (o todavía no hay copia) available()
+    devuelve False y las lecturas van al primario.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_lag_seconds: float,
+        async_url: Optional[str] = None,
+        snapshot_source: Optional[str] = None,
+        snapshot_seconds: float = 0.0,
+    ):
+        self.max_lag_seconds = max_lag_seconds
+        self.snapshot_source = snapshot_source
+        self.snapshot_seconds = snapshot_seconds
+        self.snapshot_at: Optional[float] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+        if self.is_snapshot:
+            parsed = make_url(url)
+            if parsed.get_backend_name() != "sqlite" or not snapshot_source:
+                raise ValueError("El modo snapshot requiere SQLite en el primario y en la réplica")
+            self.snapshot_path = parsed.database
+
+        self.engine = create_engine(url, future=True, **pool_options("db.read_pool"))
+        configure_sqlite(self.engine, read_only=True)
+        instrument_engine(self.engine)
+        self._track_snapshot(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if async_url is not None:
+            self.async_engine = create_async_engine(
+                async_url, **pool_options("db.async_read_pool", is_async=True)
+            )
+            configure_sqlite(self.async_engine.sync_engine, read_only=True)
+            instrument_engine(self.async_engine.sync_engine)
+            self._track_snapshot(self.async_engine.sync_engine)
+            self.AsyncSessionLocal = async_sessionmaker(
+                bind=self.async_engine, autoflush=False, expire_on_commit=False
+            )
+
+        telemetry.gauge("db.read.lag_seconds", self.lag)
+
+    @property
+    def is_snapshot(self) -> bool:
+        return self.snapshot_seconds > 0
+
+    def lag(self) -> Optional[float]:
+        if not self.is_snapshot:
+            return 0.0
+        if self.snapshot_at is None:
+            return None
+        return round(time.time() - self.snapshot_at, 3)
+
+    def available(self) -> bool:
+        if self.is_snapshot:
+            self.refresh_if_due()
+        lag = self.lag()
+        return lag is not None and lag <= self.max_lag_seconds
+
+    #--------------------------------------------------------------------------
+    # Snapshot
+
+    def _track_snapshot(self, engine: Engine) -> None:
+        if not self.is_snapshot:
+            return
+
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            connection_record.info["snapshot"] = self._generation
+
+        # una conexión abierta antes de la última copia sigue leyendo el archivo
+        # viejo: el pool la descarta y abre otra
+        @event.listens_for(engine, "checkout")
+        def _checkout(dbapi_connection, connection_record, connection_proxy):
+            if connection_record.info.get("snapshot") != self._generation:
+                raise exc.DisconnectionError()
+
+    def refresh(self) -> None:
+        """Copia el primario y cambia la réplica a la copia nueva."""
+        started = time.monotonic()
+        copied_at = time.time()
+        tmp_path = f"{self.snapshot_path}.tmp"
+        source = sqlite3.connect(self.snapshot_source)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+            # sin -wal/-shm: al reemplazar el archivo no quedan restos del anterior
+            target.execute("PRAGMA journal_mode = DELETE").fetchall()
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, self.snapshot_path)
+
+        with self._lock:
+            self._generation += 1
+            self.snapshot_at = copied_at
+        telemetry.observe("db.read.snapshot", time.monotonic() - started)
+
+    def refresh_if_due(self) -> None:
+        # en un hilo aparte: la petición que lo dispara no espera a la copia
+        with self._lock:
+            if self._refreshing:
+                return
+            if self.snapshot_at is not None and time.time() - self.snapshot_at < self.snapshot_seconds:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name="read-snapshot", daemon=True).start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("No se pudo refrescar el snapshot de lectura")
+        finally:
+            with self._lock:
+                self._refreshing = False
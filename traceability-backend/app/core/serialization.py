@@ -0,0 +1,50 @@
+import json
+from enum import Enum
+from typing import Any, Iterable, List, Optional, Sequence
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json de la stdlib
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    # mismos bytes que JSONResponse de Starlette: compacto, UTF-8, sin NaN
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[dict]:
+    return [dict(zip(keys, row)) for row in rows]
+
+
+class RowsJSONResponse(Response):
+    """
+    Respuesta JSON construida directo de las tuplas de la consulta, sin pasar
+    por los modelos pydantic ni por la validación de response_model.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, rows, keys: Optional[Sequence[str]] = None, **kwargs):
+        rows = list(rows)
+        if keys is None:
+            keys = list(rows[0]._fields) if rows else []
+        super().__init__(content=dumps(rows_to_dicts(keys, rows)), **kwargs)
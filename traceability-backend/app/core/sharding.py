@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.pool_telemetry import instrument_engine, pool_options
+from app.core.sqlite_profile import configure_sqlite
+from app.core.telemetry import telemetry
+
+T = TypeVar("T")
+
+# los ids de trace_events de cada shard empiezan en numero << EVENT_ID_BITS, así
+# un id es único entre líneas (los de la base sin shards quedan por debajo de 2^40)
+EVENT_ID_BITS = 40
+
+
+class ShardRouter:
+    """
+    Una base por línea de producción (Station.linea) con sus piezas y eventos.
+    Las funciones de servicio siguen recibiendo una Session: run() las ejecuta
+    en la base de una línea y gather() en todas a la vez, cada una en su hilo,
+    y devuelve los resultados en el orden de `lineas`.
+
+    Los engines son sync también con DB_ASYNC: las llamadas van al threadpool
+    y no bloquean el event loop.
+    """
+
+    def __init__(self, urls: Dict[str, str]):
+        self.lineas: List[str] = list(urls)
+        self.engines = {}
+        self.sessionmakers = {}
+        for linea, url in urls.items():
+            engine = create_engine(url, future=True, **pool_options(f"db.shard.{linea}"))
+            configure_sqlite(engine)
+            instrument_engine(engine)
+            self.engines[linea] = engine
+            self.sessionmakers[linea] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(len(urls), 1), thread_name_prefix="shard"
+        )
+        # número de rango de ids -> línea; fijo una vez reservado
+        self._event_lineas: Dict[int, str] = {}
+
+    def session(self, linea: str) -> Session:
+        try:
+            return self.sessionmakers[linea]()
+        except KeyError:
+            raise ValueError("UNKNOWN_LINE") from None
+
+    def _call(self, linea: str, fn: Callable[..., T], args, kwargs) -> T:
+        with self.session(linea) as db:
+            return fn(db, *args, **kwargs)
+
+    def call(self, linea: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        telemetry.incr(f"db.shard.{linea}.calls")
+        return self._call(linea, fn, args, kwargs)
+
+    def scatter(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> List[T]:
+        started = time.monotonic()
+        futures = [
+            self._executor.submit(self._call, linea, fn, args, kwargs) for linea in self.lineas
+        ]
+        results = [future.result() for future in futures]
+        telemetry.observe("db.shard.gather", time.monotonic() - started)
+        return results
+
+    async def run(self, linea: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # starlette (y anyio) solo en las rutas: app.manage usa el router sin ellos
+        from starlette.concurrency import run_in_threadpool
+
+        telemetry.incr(f"db.shard.{linea}.calls")
+        return await run_in_threadpool(self._call, linea, fn, args, kwargs)
+
+    async def gather(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> List[T]:
+        from starlette.concurrency import run_in_threadpool
+
+        return await run_in_threadpool(self.scatter, fn, *args, **kwargs)
+
+    def _reserved_numbers(self) -> Dict[str, int]:
+        # línea -> número, de los shards que ya tienen su rango de ids
+        numbers: Dict[str, int] = {}
+        for linea, engine in self.engines.items():
+            with engine.connect() as conn:
+                seq = conn.execute(
+                    text("SELECT seq FROM sqlite_sequence WHERE name = 'trace_events'")
+                ).scalar()
+            if seq is not None and seq >> EVENT_ID_BITS != 0:
+                numbers[linea] = seq >> EVENT_ID_BITS
+        return numbers
+
+    def event_linea(self, event_id: int) -> Optional[str]:
+        """Línea del shard que guarda el evento: el id lleva su rango."""
+        number = event_id >> EVENT_ID_BITS
+        if number not in self._event_lineas:
+            # un rango desconocido: shards reservados después de leerlos
+            self._event_lineas = {n: linea for linea, n in self._reserved_numbers().items()}
+        return self._event_lineas.get(number)
+
+    def reserve_event_ids(self) -> Dict[str, int]:
+        """
+        Fija el inicio de la secuencia de trace_events de cada shard que aún no
+        lo tenga (requiere el esquema aplicado). Devuelve línea -> número.
+        """
+        numbers = self._reserved_numbers()
+        pending = [linea for linea in self.lineas if linea not in numbers]
+
+        used = set(numbers.values())
+        for linea in pending:
+            number = 1
+            while number in used:
+                number += 1
+            used.add(number)
+            with self.engines[linea].begin() as conn:
+                # un shard que ya tenga eventos sin rango no se puede renumerar
+                if conn.execute(text("SELECT count(*) FROM trace_events")).scalar():
+                    raise ValueError("SHARD_NOT_EMPTY")
+                conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'trace_events'"))
+                conn.execute(
+                    text("INSERT INTO sqlite_sequence (name, seq) VALUES ('trace_events', :seq)"),
+                    {"seq": number << EVENT_ID_BITS},
+                )
+            numbers[linea] = number
+        self._event_lineas = {n: linea for linea, n in numbers.items()}
+        return numbers
+
+    def dispose(self) -> None:
+        self._executor.shutdown(wait=False)
+        for engine in self.engines.values():
+            engine.dispose()
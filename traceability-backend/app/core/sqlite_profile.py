@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+#------------------------------------------------------------------------------
+# Perfil de producción para SQLite: PRAGMAs por conexión (desde Settings) y
+# mantenimiento periódico (wal_checkpoint, optimize) al devolver conexiones
+# al pool, sin hilos aparte.
+
+def sqlite_pragmas(read_only: bool = False) -> list:
+    pragmas = [f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}"]
+    if read_only:
+        # journal_mode/synchronous escriben en el archivo; en lectura sobran
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas += [
+            f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}",
+            f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        ]
+    return pragmas + [
+        f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}",
+        f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}",
+    ]
+
+
+class SQLiteMaintenance:
+    def __init__(self, checkpoint_seconds: float, optimize_seconds: float):
+        self.checkpoint_seconds = checkpoint_seconds
+        self.optimize_seconds = optimize_seconds
+        self._lock = threading.Lock()
+        now = time.monotonic()
+        self._next_checkpoint = now + checkpoint_seconds
+        self._next_optimize = now + optimize_seconds
+
+    def _due(self) -> list:
+        now = time.monotonic()
+        statements = []
+        # se reserva el turno antes de ejecutar: una sola conexión lo hace
+        with self._lock:
+            if self.checkpoint_seconds > 0 and now >= self._next_checkpoint:
+                self._next_checkpoint = now + self.checkpoint_seconds
+                # PASSIVE no espera a lectores ni escritores
+                statements.append("PRAGMA wal_checkpoint(PASSIVE)")
+            if self.optimize_seconds > 0 and now >= self._next_optimize:
+                self._next_optimize = now + self.optimize_seconds
+                statements.append("PRAGMA optimize")
+        return statements
+
+    def run_due(self, dbapi_connection) -> None:
+        statements = self._due()
+        if not statements:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+                cursor.fetchall()
+        except Exception:
+            logger.exception("Falló el mantenimiento de SQLite")
+        finally:
+            cursor.close()
+
+
+def configure_sqlite(engine: Engine, read_only: bool = False) -> None:
+    """
+    Aplica el perfil a un engine sync (o al sync_engine de uno async).
+    read_only: engine de réplica; sin PRAGMAs de escritura ni mantenimiento.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    # en memoria no hay WAL ni nada que mantener
+    if engine.url.database in (None, "", ":memory:"):
+        return
+
+    pragmas = sqlite_pragmas(read_only)
+    maintenance = SQLiteMaintenance(
+        settings.SQLITE_CHECKPOINT_SECONDS, settings.SQLITE_OPTIMIZE_SECONDS
+    )
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+                cursor.fetchall()
+        finally:
+            cursor.close()
+
+    if read_only:
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _maintenance(dbapi_connection, connection_record):
+        if dbapi_connection is not None:
+            maintenance.run_due(dbapi_connection)
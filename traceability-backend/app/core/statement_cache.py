@@ -0,0 +1,55 @@
+import threading
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+from app.core.telemetry import telemetry
+
+
+class StatementCacheTelemetry:
+    """
+    Aciertos de la caché de SQL compilado de un engine. Cada ejecución llega
+    con su resultado (context.cache_hit): acierto, fallo (se compiló) o sin
+    caché (SQL de texto del driver, PRAGMAs, DDL).
+    """
+
+    def __init__(self, engine, name: str):
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self._lock = threading.Lock()
+
+        telemetry.gauge(f"{name}.hits", lambda: self.hits)
+        telemetry.gauge(f"{name}.misses", lambda: self.misses)
+        telemetry.gauge(f"{name}.uncached", lambda: self.uncached)
+        telemetry.gauge(f"{name}.hit_rate", self.hit_rate)
+        telemetry.gauge(f"{name}.size", self.size)
+
+    def hit_rate(self) -> Optional[float]:
+        cached = self.hits + self.misses
+        if not cached:
+            return None
+        return round(self.hits / cached, 3)
+
+    def size(self) -> int:
+        cache = self.engine._compiled_cache
+        return len(cache) if cache is not None else 0
+
+    def record(self, cache_hit) -> None:
+        with self._lock:
+            if cache_hit is CacheStats.CACHE_HIT:
+                self.hits += 1
+            elif cache_hit is CacheStats.CACHE_MISS:
+                self.misses += 1
+            else:
+                self.uncached += 1
+
+
+def instrument_statement_cache(engine, name: str) -> StatementCacheTelemetry:
+    stats = StatementCacheTelemetry(engine, name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats.record(context.cache_hit)
+
+    return stats
@@ -0,0 +1,72 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from app.models.models import get_table_version, on_table_change
+
+
+class _Snapshot:
+    __slots__ = ("data", "version", "checked_at")
+
+    def __init__(self, data: Any, version: int, checked_at: float):
+        self.data = data
+        self.version = version
+        self.checked_at = checked_at
+
+
+class TableCache(ABC):
+    """
+    Copia en memoria de una tabla pequeña que cambia poco.
+
+    - En este proceso se invalida en cuanto se confirma un cambio en la tabla.
+    - Entre workers se detectan cambios comparando table_versions, como mucho
+      una vez cada `check_interval` segundos (o al pedir `force_check`).
+    - Se guarda una copia por base de datos (url del engine de la sesión).
+    """
+
+    table_name: str = ""
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._generation = 0
+        on_table_change(self.table_name, self.invalidate)
+
+    @abstractmethod
+    def _load(self, db: Session) -> Any:
+        ...
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshots.clear()
+
+    def _reload(self, db: Session, key: str) -> _Snapshot:
+        generation = self._generation
+        version = get_table_version(db.connection(), self.table_name)
+        snapshot = _Snapshot(self._load(db), version, time.monotonic())
+        with self._lock:
+            # si hubo una invalidación mientras se cargaba, no se guarda la copia
+            if generation == self._generation:
+                self._snapshots[key] = snapshot
+        return snapshot
+
+    def get(self, db: Session, force_check: bool = False) -> Any:
+        key = str(db.get_bind().url)
+        snapshot: Optional[_Snapshot] = self._snapshots.get(key)
+        if snapshot is None:
+            return self._reload(db, key).data
+
+        now = time.monotonic()
+        if force_check or now - snapshot.checked_at >= self.check_interval:
+            version = get_table_version(db.connection(), self.table_name)
+            if version != snapshot.version:
+                return self._reload(db, key).data
+            snapshot.checked_at = now
+
+        return snapshot.data
+
+    def warm(self, db: Session) -> None:
+        self._reload(db, str(db.get_bind().url))
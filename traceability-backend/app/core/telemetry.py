@@ -0,0 +1,66 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class _Timer:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class Telemetry:
+    """
+    Contadores y tiempos del proceso (cada worker lleva los suyos).
+    Los tiempos se guardan en segundos y se exponen en milisegundos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._timers: Dict[str, _Timer] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def gauge(self, name: str, read: Callable[[], Any]) -> None:
+        # valor que se lee en el momento del snapshot
+        self._gauges[name] = read
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = _Timer()
+            timer.count += 1
+            timer.total += seconds
+            if seconds > timer.max:
+                timer.max = seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        gauges = {name: read() for name, read in self._gauges.items()}
+        with self._lock:
+            return {
+                "gauges": gauges,
+                "counters": dict(self._counters),
+                "timers": {
+                    name: {
+                        "count": t.count,
+                        "avg_ms": round(t.total * 1000 / t.count, 3) if t.count else 0.0,
+                        "max_ms": round(t.max * 1000, 3),
+                    }
+                    for name, t in self._timers.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+
+telemetry = Telemetry()
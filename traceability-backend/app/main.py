@@ -1,19 +1,45 @@
+import logging
+import time
 from fastapi import FastAPI
 
 from app.core.config import settings
-from app.routers import api_router
-from app.core.database import Base, engine
-from app.seeders.run_seeders import run_all_seeders
+from app.core.engines import SessionLocal, engine, shard_router
+from app.core.pool_telemetry import RouteContextMiddleware
+from app.core.telemetry import telemetry
+from app.migrations import check_schema
+from app.routers import include_routers
+from app.services.api_key_registry import api_key_registry
+from app.services.partition_service import partition_registry
+from app.services.station_registry import station_registry
+
+logger = logging.getLogger(__name__)
 
-Base.metadata.create_all(bind=engine)
 app = FastAPI(title="Traceability API")
+app.add_middleware(RouteContextMiddleware)
 
 @app.on_event("startup")
 def startup_event():
-    print("Running seeders on startup...")
-    run_all_seeders()
-    print("Seeders finished.")
-app.include_router(api_router, prefix="/api")
+    # esquema y datos iniciales: "python -m app.manage init" (una vez por
+    # despliegue). Cada worker solo verifica la versión y calienta los caches
+    start = time.perf_counter()
+    check_schema(engine)
+    if shard_router is not None:
+        for shard_engine in shard_router.engines.values():
+            check_schema(shard_engine)
+    with SessionLocal() as db:
+        station_registry.warm(db)
+        api_key_registry.warm(db)
+        partition_registry.warm(db)
+
+    elapsed = time.perf_counter() - start
+    telemetry.observe("app.startup", elapsed)
+    if elapsed > settings.STARTUP_BUDGET_SECONDS:
+        logger.warning(
+            "arranque en %.0f ms (presupuesto %.0f ms)",
+            elapsed * 1000,
+            settings.STARTUP_BUDGET_SECONDS * 1000,
+        )
+include_routers(app, prefix="/api")
 @app.get("/")
 def root():
     return {"message": "Traceability API running"}
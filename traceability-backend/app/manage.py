@@ -0,0 +1,201 @@
+"""
+Tareas de administración desde la línea de comandos.
+
+    python -m app.manage init [--skip-seed]
+    python -m app.manage migrate up [--to N] [--blocking-only]
+    python -m app.manage migrate status
+    python -m app.manage partitions list
+    python -m app.manage partitions create 2026-09
+    python -m app.manage partitions attach 2026-09
+    python -m app.manage partitions detach 2026-09
+    python -m app.manage archive run [--older-than-days 300]
+"""
+import argparse
+import sys
+from app.core.engines import SessionLocal, engine, shard_router
+from app.core.sharding import EVENT_ID_BITS
+from app.migrations import SchemaOutOfDate, check_schema, migration_status, upgrade
+from app.services import archive_service, partition_service
+
+PARTITION_ERRORS = {
+    "INVALID_MONTH": "El mes debe tener el formato AAAA-MM",
+    "PARTITION_EXISTS": "Ese mes ya tiene una partición registrada",
+    "PARTITION_NOT_FOUND": "Ese mes no tiene una partición registrada",
+    "PARTITION_FILE_EXISTS": "El archivo de la partición ya existe; use 'attach' para registrarlo",
+    "PARTITION_FILE_NOT_FOUND": "No existe el archivo de la partición",
+    "TOO_MANY_PARTITIONS": (
+        f"SQLite admite {partition_service.MAX_ATTACHED} bases adjuntas por conexión; "
+        "archive (archive run) o desadjunte meses antiguos antes de crear otro"
+    ),
+    "ID_REUSE": (
+        "trace_events no usa AUTOINCREMENT y quedaría sin filas posteriores al mes: "
+        "SQLite reutilizaría ids de la partición"
+    ),
+}
+
+SHARD_ERRORS = {
+    "SHARD_NOT_EMPTY": (
+        "Un shard ya tiene eventos con ids sin rango de línea y no se puede renumerar; "
+        "mueva esos eventos a una base vacía antes de usarla como shard"
+    ),
+    "SHARDED_TRACE_FILES": (
+        "Con SHARD_URLS los eventos viven en cada shard y TRACE_PARTITION_DIR / "
+        "TRACE_ARCHIVE_DIR son uno solo para todas las líneas (los archivos de cada "
+        "mes chocarían); particiones y archivo frío no están disponibles con shards"
+    ),
+}
+
+
+def _schema_ready() -> bool:
+    try:
+        check_schema(engine)
+    except SchemaOutOfDate as exc:
+        print(str(exc), file=sys.stderr)
+        return False
+    return True
+
+
+def _unsharded() -> bool:
+    # partitions/archive trabajan sobre la base principal, que con shards no
+    # tiene eventos: fallar en vez de no hacer nada
+    if shard_router is not None:
+        print(SHARD_ERRORS["SHARDED_TRACE_FILES"], file=sys.stderr)
+        return False
+    return True
+
+
+def _databases():
+    # la base principal y, con SHARD_URLS, la de cada línea (mismo esquema)
+    yield "principal", engine
+    if shard_router is not None:
+        for linea, shard_engine in shard_router.engines.items():
+            yield f"shard {linea}", shard_engine
+
+
+def _upgrade_all(target=None, deferred: bool = True) -> int:
+    for name, db_engine in _databases():
+        print(f"== {name}")
+        applied = upgrade(db_engine, target=target, deferred=deferred)
+        print(f"pasos aplicados: {len(applied)}")
+    if shard_router is not None:
+        try:
+            numbers = shard_router.reserve_event_ids()
+        except ValueError as exc:
+            print(SHARD_ERRORS.get(str(exc), str(exc)), file=sys.stderr)
+            return 1
+        for linea, number in numbers.items():
+            print(f"shard {linea}: ids de eventos desde {number << EVENT_ID_BITS}")
+    return 0
+
+
+def init_command(args) -> int:
+    # una vez por despliegue, antes de levantar los workers: esquema completo y
+    # datos iniciales (los hashes pbkdf2 de los usuarios se calculan aquí, no
+    # en el arranque de cada worker)
+    if _upgrade_all():
+        return 1
+    if not args.skip_seed:
+        # import diferido: los seeders solo hacen falta en este comando
+        from app.seeders.run_seeders import run_all_seeders
+
+        run_all_seeders()
+    return 0
+
+
+def migrate_command(args) -> int:
+    if args.action == "up":
+        return _upgrade_all(target=args.to, deferred=not args.blocking_only)
+    for name, db_engine in _databases():
+        print(f"== {name}")
+        for step in migration_status(db_engine):
+            estado = "hecho" if step["completado"] else "pendiente"
+            if not step["completado"] and step["checkpoint"] is not None:
+                estado += f" (checkpoint {step['checkpoint']})"
+            tipo = "diferido" if step["diferido"] else "bloqueante"
+            print(f"v{step['version']:04d} paso {step['paso']}  {tipo:<10}  {estado:<10}  {step['nombre']}")
+    return 0
+
+
+def _print_partition(p) -> None:
+    print(f"{p.mes}  {p.archivo}  filas={p.filas}  ids={p.min_id}..{p.max_id}")
+
+
+def partitions_command(args) -> int:
+    if not _unsharded() or not _schema_ready():
+        return 1
+    with SessionLocal() as db:
+        try:
+            if args.action == "list":
+                for partition in partition_service.list_partitions(db):
+                    _print_partition(partition)
+                return 0
+            if args.action == "create":
+                partition = partition_service.create_partition(db, args.mes)
+            elif args.action == "attach":
+                partition = partition_service.attach_partition(db, args.mes)
+            else:
+                partition = partition_service.detach_partition(db, args.mes)
+        except ValueError as exc:
+            print(PARTITION_ERRORS.get(str(exc), str(exc)), file=sys.stderr)
+            return 1
+    _print_partition(partition)
+    return 0
+
+
+def archive_command(args) -> int:
+    if not _unsharded() or not _schema_ready():
+        return 1
+    with SessionLocal() as db:
+        result = archive_service.run_archive(db, older_than_days=args.older_than_days)
+    print(f"corte: {result['cutoff'].isoformat()}  eventos archivados: {result['archivados']}")
+    for mes in result["particiones"]:
+        print(f"partición {mes} archivada y eliminada")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="esquema y datos iniciales (antes de arrancar la app)")
+    init.add_argument("--skip-seed", action="store_true", help="solo el esquema")
+    init.set_defaults(handler=init_command)
+
+    migrate = commands.add_parser("migrate", help="migraciones del esquema")
+    migrate_actions = migrate.add_subparsers(dest="action", required=True)
+    up = migrate_actions.add_parser("up", help="aplica los pasos pendientes")
+    up.add_argument("--to", type=int, default=None, help="última versión a aplicar")
+    up.add_argument(
+        "--blocking-only",
+        action="store_true",
+        help="solo los pasos bloqueantes; los diferidos se corren después con la app en línea",
+    )
+    migrate_actions.add_parser("status", help="estado de cada paso")
+    migrate.set_defaults(handler=migrate_command)
+
+    partitions = commands.add_parser("partitions", help="particiones mensuales de trace_events")
+    actions = partitions.add_subparsers(dest="action", required=True)
+    actions.add_parser("list", help="lista las particiones registradas")
+    for action, help_text in (
+        ("create", "mueve los eventos del mes a su propio archivo"),
+        ("attach", "registra un archivo de partición existente"),
+        ("detach", "quita el mes del registro (el archivo se conserva)"),
+    ):
+        actions.add_parser(action, help=help_text).add_argument("mes", help="AAAA-MM")
+    partitions.set_defaults(handler=partitions_command)
+
+    archive = commands.add_parser("archive", help="archivo frío de trace_events")
+    archive_actions = archive.add_subparsers(dest="action", required=True)
+    run = archive_actions.add_parser("run", help="archiva los eventos más viejos que el corte")
+    run.add_argument("--older-than-days", type=int, default=None)
+    archive.set_defaults(handler=archive_command)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
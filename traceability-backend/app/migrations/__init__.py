@@ -0,0 +1,15 @@
+from app.migrations.runner import (
+    SchemaOutOfDate,
+    check_schema,
+    load_migrations,
+    migration_status,
+    upgrade,
+)
+
+__all__ = [
+    "SchemaOutOfDate",
+    "check_schema",
+    "load_migrations",
+    "migration_status",
+    "upgrade",
+]
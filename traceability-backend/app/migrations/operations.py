@@ -0,0 +1,242 @@
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+
+# progress(mensaje): la CLI imprime, los tests pueden registrar
+Progress = Callable[[str], None]
+
+
+class StepState:
+    """
+    Fila de schema_migrations de un paso. save() y finish() escriben en la
+    conexión que se les pasa, así el avance se confirma en la misma transacción
+    que el trabajo hecho.
+    """
+
+    def __init__(self, table, version: int, paso: int, nombre: str, diferido: bool, checkpoint: Optional[int]):
+        self.table = table
+        self.version = version
+        self.paso = paso
+        self.nombre = nombre
+        self.diferido = diferido
+        self.checkpoint = checkpoint
+
+    def _write(self, conn: Connection, completado: bool) -> None:
+        values = {
+            "nombre": self.nombre,
+            "diferido": self.diferido,
+            "completado": completado,
+            "checkpoint": self.checkpoint,
+            "actualizado_en": datetime.utcnow(),
+        }
+        key = (self.table.c.version == self.version) & (self.table.c.paso == self.paso)
+        if conn.execute(self.table.update().where(key).values(**values)).rowcount == 0:
+            conn.execute(self.table.insert().values(version=self.version, paso=self.paso, **values))
+
+    def save(self, conn: Connection, checkpoint: int) -> None:
+        self.checkpoint = checkpoint
+        self._write(conn, completado=False)
+
+    def finish(self, conn: Connection) -> None:
+        self._write(conn, completado=True)
+
+
+class Step(ABC):
+    # deferred: no bloquea el arranque de la app; corre después de los pasos
+    # bloqueantes de todas las versiones, con la app ya sirviendo
+    deferred = False
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        ...
+
+    @abstractmethod
+    def run(self, engine: Engine, state: StepState, progress: Progress) -> None:
+        ...
+
+
+class Execute(Step):
+    """Sentencias SQL en una sola transacción."""
+
+    def __init__(self, statements: Sequence[str], name: str = "sql"):
+        self.statements = list(statements)
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def run(self, engine, state, progress):
+        with engine.begin() as conn:
+            for statement in self.statements:
+                conn.execute(text(statement))
+            state.finish(conn)
+
+
+class RunPython(Step):
+    """fn(connection) dentro de una transacción."""
+
+    def __init__(self, fn: Callable[[Connection], None]):
+        self.fn = fn
+
+    @property
+    def name(self) -> str:
+        return self.fn.__name__.lstrip("_")
+
+    def run(self, engine, state, progress):
+        with engine.begin() as conn:
+            self.fn(conn)
+            state.finish(conn)
+
+
+class AddColumn(Step):
+    """
+    ALTER TABLE ... ADD COLUMN. En SQLite solo cambia el esquema (no reescribe
+    la tabla) mientras el default sea constante; si la columna ya existe
+    (bases creadas con create_all) no hace nada.
+    """
+
+    def __init__(self, table: str, column: str, ddl: str):
+        self.table = table
+        self.column = column
+        self.ddl = ddl
+
+    @property
+    def name(self) -> str:
+        return f"add_column {self.table}.{self.column}"
+
+    def run(self, engine, state, progress):
+        with engine.begin() as conn:
+            columns = {c["name"] for c in inspect(conn).get_columns(self.table)}
+            if self.column not in columns:
+                conn.execute(text(f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self.ddl}"))
+            state.finish(conn)
+
+
+class CreateIndex(Step):
+    """
+    Índice nuevo, diferido por defecto. En PostgreSQL se usa CONCURRENTLY;
+    SQLite no tiene construcción concurrente (los lectores siguen con WAL, los
+    escritores esperan), por eso se deja para después del arranque.
+    """
+
+    deferred = True
+
+    def __init__(
+        self,
+        name: str,
+        table: str,
+        columns: Sequence[str],
+        unique: bool = False,
+        deferred: bool = True,
+        dialect: Optional[str] = None,
+    ):
+        self.index_name = name
+        self.table = table
+        self.columns = list(columns)
+        self.unique = unique
+        self.deferred = deferred
+        # dialect: índices que solo existen en un motor (p. ej. COLLATE NOCASE)
+        self.dialect = dialect
+
+    @property
+    def name(self) -> str:
+        return f"create_index {self.index_name}"
+
+    def run(self, engine, state, progress):
+        if self.dialect is not None and engine.dialect.name != self.dialect:
+            with engine.begin() as conn:
+                state.finish(conn)
+            return
+        unique = "UNIQUE " if self.unique else ""
+        columns = ", ".join(self.columns)
+        started = time.monotonic()
+        progress(f"{self.name}: construyendo")
+        if engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(
+                    f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {self.index_name} ON {self.table} ({columns})"
+                ))
+            with engine.begin() as conn:
+                state.finish(conn)
+        else:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE {unique}INDEX IF NOT EXISTS {self.index_name} ON {self.table} ({columns})"
+                ))
+                state.finish(conn)
+        progress(f"{self.name}: listo en {time.monotonic() - started:.1f} s")
+
+
+class Backfill(Step):
+    """
+    UPDATE de una columna por lotes de rowid. Cada lote es su propia
+    transacción y guarda el último rowid como checkpoint: si se interrumpe, la
+    siguiente corrida sigue desde ahí. Entre lotes se pausa para que las
+    escrituras de la app no esperen al lock.
+    """
+
+    deferred = True
+
+    def __init__(
+        self,
+        table: str,
+        column: str,
+        expression: str,
+        batch_size: Optional[int] = None,
+        pause_seconds: Optional[float] = None,
+        deferred: bool = True,
+    ):
+        self.table = table
+        self.column = column
+        self.expression = expression
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.deferred = deferred
+
+    @property
+    def name(self) -> str:
+        return f"backfill {self.table}.{self.column}"
+
+    def run(self, engine, state, progress):
+        batch_size = self.batch_size or settings.MIGRATION_BATCH_SIZE
+        pause = settings.MIGRATION_BATCH_PAUSE_SECONDS if self.pause_seconds is None else self.pause_seconds
+        last = state.checkpoint or 0
+
+        with engine.connect() as conn:
+            total = conn.execute(
+                text(f"SELECT count(*) FROM {self.table} WHERE rowid > :last"), {"last": last}
+            ).scalar()
+        done = 0
+
+        while True:
+            with engine.begin() as conn:
+                upto = conn.execute(
+                    text(
+                        f"SELECT max(r) FROM (SELECT rowid AS r FROM {self.table} "
+                        "WHERE rowid > :last ORDER BY rowid LIMIT :n)"
+                    ),
+                    {"last": last, "n": batch_size},
+                ).scalar()
+                if upto is None:
+                    state.finish(conn)
+                    break
+                result = conn.execute(
+                    text(
+                        f"UPDATE {self.table} SET {self.column} = {self.expression} "
+                        "WHERE rowid > :last AND rowid <= :upto"
+                    ),
+                    {"last": last, "upto": upto},
+                )
+                state.save(conn, upto)
+            done += result.rowcount
+            last = upto
+            progress(f"{self.name}: {done}/{total}")
+            if pause:
+                time.sleep(pause)
+
@@ -0,0 +1,165 @@
+import importlib
+import logging
+import pkgutil
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    select,
+)
+from sqlalchemy.engine import Engine
+from app.migrations import versions
+from app.migrations.operations import Step, StepState
+
+logger = logging.getLogger(__name__)
+
+#------------------------------------------------------------------------------------------
+# Migraciones versionadas
+#
+# Cada módulo app/migrations/versions/vNNNN_nombre.py define `description` y
+# una lista `steps`. El avance se guarda por paso en schema_migrations. Los
+# pasos bloqueantes (DDL corto) se aplican antes de arrancar la app; los
+# diferidos (índices sobre tablas grandes, rellenos por lotes) corren después
+# de los bloqueantes de todas las versiones y pueden ejecutarse con la app ya
+# sirviendo. Por eso un paso bloqueante no debe depender de uno diferido.
+
+UPGRADE_COMMAND = "python -m app.manage migrate up"
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("paso", Integer, primary_key=True),
+    Column("nombre", String(255), nullable=False),
+    Column("diferido", Boolean, nullable=False),
+    Column("completado", Boolean, nullable=False),
+    # último rowid procesado por un relleno por lotes
+    Column("checkpoint", Integer, nullable=True),
+    Column("actualizado_en", DateTime, nullable=False),
+)
+
+
+class SchemaOutOfDate(Exception):
+    pass
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    description: str
+    steps: List[Step]
+
+
+_VERSION_PATTERN = re.compile(r"^v(\d{4})_(\w+)$")
+
+
+def load_migrations() -> List[Migration]:
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        match = _VERSION_PATTERN.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(
+            Migration(int(match.group(1)), match.group(2), module.description, list(module.steps))
+        )
+    migrations.sort(key=lambda m: m.version)
+    return migrations
+
+
+def _recorded(engine: Engine) -> Dict[Tuple[int, int], dict]:
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        rows = conn.execute(select(schema_migrations)).mappings().all()
+    return {(row["version"], row["paso"]): dict(row) for row in rows}
+
+
+def migration_status(engine: Engine, migrations: Optional[List[Migration]] = None) -> List[dict]:
+    """Un registro por paso, en orden de aplicación dentro de cada versión."""
+    recorded = _recorded(engine)
+    status = []
+    for migration in migrations if migrations is not None else load_migrations():
+        for paso, step in enumerate(migration.steps):
+            row = recorded.get((migration.version, paso), {})
+            status.append(
+                {
+                    "version": migration.version,
+                    "paso": paso,
+                    "nombre": step.name,
+                    "diferido": step.deferred,
+                    "completado": bool(row.get("completado")),
+                    "checkpoint": row.get("checkpoint"),
+                }
+            )
+    return status
+
+
+def upgrade(
+    engine: Engine,
+    target: Optional[int] = None,
+    deferred: bool = True,
+    progress: Callable[[str], None] = print,
+    migrations: Optional[List[Migration]] = None,
+) -> List[str]:
+    """
+    Aplica los pasos pendientes hasta la versión `target` (todas por defecto).
+    Con deferred=False solo se aplican los bloqueantes. Devuelve los nombres de
+    los pasos ejecutados.
+    """
+    migrations = migrations if migrations is not None else load_migrations()
+    if target is not None:
+        migrations = [m for m in migrations if m.version <= target]
+    recorded = _recorded(engine)
+
+    applied = []
+    for phase in (False, True) if deferred else (False,):
+        for migration in migrations:
+            for paso, step in enumerate(migration.steps):
+                if step.deferred != phase:
+                    continue
+                row = recorded.get((migration.version, paso), {})
+                if row.get("completado"):
+                    continue
+                progress(f"v{migration.version:04d} paso {paso}: {step.name}")
+                state = StepState(
+                    schema_migrations,
+                    migration.version,
+                    paso,
+                    step.name,
+                    step.deferred,
+                    row.get("checkpoint"),
+                )
+                step.run(engine, state, progress)
+                applied.append(step.name)
+    return applied
+
+
+def check_schema(engine: Engine, migrations: Optional[List[Migration]] = None) -> None:
+    """
+    Falla si faltan pasos bloqueantes. Los diferidos pendientes solo se
+    registran: la app funciona sin ellos, más lenta mientras tanto.
+    """
+    status = migration_status(engine, migrations)
+    pending = [s for s in status if not s["completado"]]
+    blocking = [s for s in pending if not s["diferido"]]
+    if blocking:
+        first = blocking[0]
+        raise SchemaOutOfDate(
+            f"El esquema de la base no está al día (pendiente v{first['version']:04d} "
+            f"paso {first['paso']}: {first['nombre']}); ejecute '{UPGRADE_COMMAND}'"
+        )
+    for step in pending:
+        logger.warning(
+            "Paso diferido pendiente v%04d paso %d: %s",
+            step["version"],
+            step["paso"],
+            step["nombre"],
+        )
@@ -0,0 +1,158 @@
+"""
+Esquema inicial: las tablas tal como las creaba Base.metadata.create_all al
+arrancar la app. Usa IF NOT EXISTS para que las bases existentes solo queden
+registradas en schema_migrations.
+"""
+from app.migrations.operations import Execute, RunPython
+from app.models.models import ensure_search_indexes
+
+description = "esquema inicial"
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS stations (
+        id INTEGER NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        tipo VARCHAR(10) NOT NULL,
+        linea VARCHAR(100) NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_stations_id ON stations (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_stations_nombre ON stations (nombre)",
+    """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        nombre VARCHAR(50) NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (nombre)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trace_archive_index (
+        id INTEGER NOT NULL,
+        part_id VARCHAR(50) NOT NULL,
+        mes VARCHAR(7) NOT NULL,
+        archivo VARCHAR(255) NOT NULL,
+        "offset" INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        filas INTEGER NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_trace_archive_index_id ON trace_archive_index (id)",
+    "CREATE INDEX IF NOT EXISTS ix_trace_archive_index_part_id ON trace_archive_index (part_id)",
+    """
+    CREATE TABLE IF NOT EXISTS trace_event_rollups (
+        dia DATE NOT NULL,
+        station_id INTEGER NOT NULL,
+        tipo_pieza VARCHAR(50) NOT NULL,
+        eventos INTEGER NOT NULL,
+        scrap INTEGER NOT NULL,
+        segundos_ciclo FLOAT NOT NULL,
+        PRIMARY KEY (dia, station_id, tipo_pieza)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trace_partitions (
+        mes VARCHAR(7) NOT NULL,
+        archivo VARCHAR(255) NOT NULL,
+        desde DATETIME NOT NULL,
+        hasta DATETIME NOT NULL,
+        filas INTEGER NOT NULL,
+        min_id INTEGER,
+        max_id INTEGER,
+        fecha_creacion DATETIME NOT NULL,
+        PRIMARY KEY (mes)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        rol VARCHAR(10) NOT NULL,
+        activo BOOLEAN NOT NULL,
+        fecha_registro DATETIME NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    """
+    CREATE TABLE IF NOT EXISTS api_keys (
+        id INTEGER NOT NULL,
+        prefijo VARCHAR(16) NOT NULL,
+        secreto_hmac VARCHAR(64) NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        station_id INTEGER,
+        linea VARCHAR(100),
+        activo BOOLEAN NOT NULL,
+        fecha_creacion DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(station_id) REFERENCES stations (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_api_keys_id ON api_keys (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_api_keys_prefijo ON api_keys (prefijo)",
+    """
+    CREATE TABLE IF NOT EXISTS parts (
+        id VARCHAR(50) NOT NULL,
+        tipo_pieza VARCHAR(50) NOT NULL,
+        lote VARCHAR(50) NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        fecha_creacion DATETIME NOT NULL,
+        num_retrabajos INTEGER NOT NULL,
+        tiempo_total_segundos FLOAT NOT NULL,
+        ultima_estacion_id INTEGER,
+        version INTEGER DEFAULT '1' NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(ultima_estacion_id) REFERENCES stations (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_parts_id ON parts (id)",
+    "CREATE INDEX IF NOT EXISTS ix_parts_lote ON parts (lote)",
+    "CREATE INDEX IF NOT EXISTS ix_parts_status ON parts (status)",
+    "CREATE INDEX IF NOT EXISTS ix_parts_tipo_pieza ON parts (tipo_pieza)",
+    """
+    CREATE TABLE IF NOT EXISTS revoked_tokens (
+        id INTEGER NOT NULL,
+        jti VARCHAR(64),
+        user_id INTEGER,
+        revocado_en DATETIME NOT NULL,
+        expira_en DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expira_en ON revoked_tokens (expira_en)",
+    "CREATE INDEX IF NOT EXISTS ix_revoked_tokens_id ON revoked_tokens (id)",
+    """
+    CREATE TABLE IF NOT EXISTS trace_events (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        part_id VARCHAR(50) NOT NULL,
+        station_id INTEGER NOT NULL,
+        timestamp_entrada DATETIME NOT NULL,
+        timestamp_salida DATETIME NOT NULL,
+        resultado VARCHAR(9) NOT NULL,
+        operador_id INTEGER,
+        observaciones TEXT,
+        FOREIGN KEY(part_id) REFERENCES parts (id),
+        FOREIGN KEY(station_id) REFERENCES stations (id),
+        FOREIGN KEY(operador_id) REFERENCES users (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_trace_events_id ON trace_events (id)",
+    "CREATE INDEX IF NOT EXISTS ix_trace_events_operador_id ON trace_events (operador_id)",
+    "CREATE INDEX IF NOT EXISTS ix_trace_events_part_id ON trace_events (part_id)",
+    "CREATE INDEX IF NOT EXISTS ix_trace_events_resultado ON trace_events (resultado)",
+    "CREATE INDEX IF NOT EXISTS ix_trace_events_station_id ON trace_events (station_id)",
+    "CREATE INDEX IF NOT EXISTS ix_trace_events_timestamp_entrada ON trace_events (timestamp_entrada)",
+    "CREATE INDEX IF NOT EXISTS ix_trace_events_timestamp_salida ON trace_events (timestamp_salida)",
+]
+
+steps = [
+    Execute(TABLES, name="tablas e índices"),
+    # índices FTS5 y sus triggers; en bases previas a la búsqueda se llenan con 'rebuild'
+    RunPython(ensure_search_indexes),
+]
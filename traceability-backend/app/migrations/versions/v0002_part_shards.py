@@ -0,0 +1,19 @@
+"""Directorio de piezas por línea para el modo con shards."""
+from app.migrations.operations import Execute
+
+description = "directorio de piezas por línea"
+
+steps = [
+    Execute(
+        [
+            """
+            CREATE TABLE IF NOT EXISTS part_shards (
+                part_id VARCHAR(50) NOT NULL,
+                linea VARCHAR(100) NOT NULL,
+                PRIMARY KEY (part_id)
+            )
+            """,
+        ],
+        name="tabla part_shards",
+    ),
+]
@@ -0,0 +1,77 @@
+"""
+Copias enteras (milisegundos desde 1970) de timestamp_entrada, timestamp_salida
+y fecha_creacion para filtrar rangos y agrupar por día sin comparar texto.
+
+Los rellenos son bloqueantes: los filtros ya usan las columnas *_ms y una fila
+sin copia quedaría fuera de los rangos. Los índices son diferidos; mientras
+tanto las consultas son correctas, solo más lentas.
+"""
+import os
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Connection
+from app.migrations.operations import AddColumn, Backfill, CreateIndex, RunPython
+from app.models.models import EPOCH_MS_SQL
+
+description = "timestamps en milisegundos"
+
+TRACE_EVENT_COLUMNS = ("timestamp_entrada", "timestamp_salida")
+
+
+def _partition_files(connection: Connection) -> None:
+    # los meses ya particionados viven en sus propios archivos con su propia tabla
+    if "trace_partitions" not in inspect(connection).get_table_names():
+        return
+    from app.services.partition_service import partition_path
+
+    for (archivo,) in connection.execute(text("SELECT archivo FROM trace_partitions")).all():
+        path = partition_path(archivo)
+        if not os.path.exists(path):
+            continue
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            with engine.begin() as conn:
+                existing = {c["name"] for c in inspect(conn).get_columns("trace_events")}
+                for name in TRACE_EVENT_COLUMNS:
+                    column = f"{name}_ms"
+                    if column not in existing:
+                        conn.execute(text(f"ALTER TABLE trace_events ADD COLUMN {column} BIGINT"))
+                    conn.execute(
+                        text(f"UPDATE trace_events SET {column} = {EPOCH_MS_SQL.format(column=name)}")
+                    )
+                    conn.execute(
+                        text(
+                            f"CREATE INDEX IF NOT EXISTS ix_trace_events_{column} "
+                            f"ON trace_events ({column})"
+                        )
+                    )
+        finally:
+            engine.dispose()
+
+
+steps = [
+    AddColumn("trace_events", "timestamp_entrada_ms", "BIGINT"),
+    AddColumn("trace_events", "timestamp_salida_ms", "BIGINT"),
+    AddColumn("parts", "fecha_creacion_ms", "BIGINT"),
+    Backfill(
+        "trace_events",
+        "timestamp_entrada_ms",
+        EPOCH_MS_SQL.format(column="timestamp_entrada"),
+        deferred=False,
+    ),
+    Backfill(
+        "trace_events",
+        "timestamp_salida_ms",
+        EPOCH_MS_SQL.format(column="timestamp_salida"),
+        deferred=False,
+    ),
+    Backfill(
+        "parts",
+        "fecha_creacion_ms",
+        EPOCH_MS_SQL.format(column="fecha_creacion"),
+        deferred=False,
+    ),
+    RunPython(_partition_files),
+    CreateIndex("ix_trace_events_timestamp_entrada_ms", "trace_events", ["timestamp_entrada_ms"]),
+    CreateIndex("ix_trace_events_timestamp_salida_ms", "trace_events", ["timestamp_salida_ms"]),
+    CreateIndex("ix_parts_fecha_creacion_ms", "parts", ["fecha_creacion_ms"]),
+]
@@ -0,0 +1,12 @@
+"""
+parts.version en bases anteriores al esquema versionado: la baseline la crea
+solo dentro de CREATE TABLE IF NOT EXISTS, así que una tabla parts que ya
+existía (create_all de antes de las versiones por pieza) se quedaba sin ella.
+"""
+from app.migrations.operations import AddColumn
+
+description = "versión de piezas en bases previas"
+
+steps = [
+    AddColumn("parts", "version", "INTEGER NOT NULL DEFAULT 1"),
+]
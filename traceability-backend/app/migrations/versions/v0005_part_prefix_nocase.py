@@ -0,0 +1,13 @@
+"""
+Índices COLLATE NOCASE sobre parts.id y parts.lote: la búsqueda por prefijo
+no distingue mayúsculas, como la de subcadena. Diferidos; mientras tanto la
+búsqueda es correcta, solo más lenta.
+"""
+from app.migrations.operations import CreateIndex
+
+description = "búsqueda por prefijo sin mayúsculas"
+
+steps = [
+    CreateIndex("ix_parts_id_nocase", "parts", ["id COLLATE NOCASE"], dialect="sqlite"),
+    CreateIndex("ix_parts_lote_nocase", "parts", ["lote COLLATE NOCASE"], dialect="sqlite"),
+]
@@ -1,20 +1,66 @@
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 from enum import Enum
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
     Integer,
     String,
     Boolean,
+    Date,
     DateTime,
     Enum as SAEnum,
     ForeignKey,
     Float,
+    Index,
     Text,
+    event,
+    inspect,
+    select,
+    text,
 )
-from sqlalchemy.orm import relationship
-from app.core.database import Base  #Se importa la base declarativa de database.py
+from sqlalchemy.orm import Session, object_session, relationship
+from app.core.engines import Base  #Se importa la base declarativa de engines.py
 
 
+#------------------------------------------------------------------------------------------
+#Timestamps en milisegundos (columnas *_ms)
+#SQLite guarda DateTime como texto; los filtros por rango y los agrupamientos por
+#día usan en su lugar una copia entera con los milisegundos desde 1970 del mismo
+#valor. Igual que el texto, toma la hora tal cual (sin convertir la zona).
+
+_EPOCH = datetime(1970, 1, 1)
+MS_PER_DAY = 86_400_000
+
+# misma conversión en SQL, para rellenar filas existentes desde el texto
+# ("AAAA-MM-DD HH:MM:SS.ffffff"); los milisegundos se truncan como en epoch_ms
+EPOCH_MS_SQL = (
+    "CAST(strftime('%s', {column}) AS INTEGER) * 1000"
+    " + CAST(substr({column} || '.000', 21, 3) AS INTEGER)"
+)
+
+def epoch_ms(value):
+    if value is None:
+        return None
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(milliseconds=1)
+
+def ms_to_datetime(value: int) -> datetime:
+    return _EPOCH + timedelta(milliseconds=value)
+
+def _epoch_ms_default(column_name: str):
+    # INSERT (ORM o Core, también executemany) sin la columna *_ms: se calcula
+    # del timestamp de la misma fila, ya con su default aplicado
+    def default(context):
+        return epoch_ms(context.get_current_parameters().get(column_name))
+    return default
+
+def _sync_epoch_ms(attribute, ms_attribute: str) -> None:
+    # en objetos del ORM la copia sigue al timestamp también en los UPDATE
+    @event.listens_for(attribute, "set")
+    def _set(target, value, oldvalue, initiator):
+        setattr(target, ms_attribute, epoch_ms(value))
+
 #Aqui abajito estan los enum que se usan en los modelos
 
 class UserRole(str, Enum):
@@ -96,6 +142,12 @@ class Part(Base):
         nullable=False,
         default=datetime.utcnow,
     )
+    fecha_creacion_ms = Column(
+        BigInteger,
+        nullable=True,
+        default=_epoch_ms_default("fecha_creacion"),
+        index=True,
+    )
 
     # campos básicos para analítica
     num_retrabajos = Column(Integer, nullable=False, default=0)
@@ -107,14 +159,24 @@ class Part(Base):
         nullable=True,
     )
 
+    # contador de cambios de la pieza y su historial (ETag)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     trace_events = relationship("TraceEvent", back_populates="part")
     ultima_estacion = relationship("Station", back_populates="parts_ultima")
 
+# busqueda por prefijo sin distinguir mayusculas: rangos sobre estos indices
+# (igual que la busqueda por subcadena del indice trigram)
+for _column in (Part.id, Part.lote):
+    Index(f"ix_parts_{_column.key}_nocase", _column.collate("NOCASE")).ddl_if(dialect="sqlite")
+
 #------------------------------------------------------------------------------------------
 #Clase TraceEvent (evento de trazabilidad)
 
 class TraceEvent(Base):
     __tablename__ = "trace_events"
+    # AUTOINCREMENT: al mover un mes a su partición no se reutilizan sus ids
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -143,6 +205,18 @@ class TraceEvent(Base):
         nullable=False,
         index=True,
     )
+    timestamp_entrada_ms = Column(
+        BigInteger,
+        nullable=True,
+        default=_epoch_ms_default("timestamp_entrada"),
+        index=True,
+    )
+    timestamp_salida_ms = Column(
+        BigInteger,
+        nullable=True,
+        default=_epoch_ms_default("timestamp_salida"),
+        index=True,
+    )
 
     resultado = Column(
         SAEnum(TraceResult),
@@ -162,3 +236,306 @@ class TraceEvent(Base):
     part = relationship("Part", back_populates="trace_events")
     station = relationship("Station", back_populates="trace_events")
     operador = relationship("User", back_populates="trace_events")
+
+_sync_epoch_ms(Part.fecha_creacion, "fecha_creacion_ms")
+_sync_epoch_ms(TraceEvent.timestamp_entrada, "timestamp_entrada_ms")
+_sync_epoch_ms(TraceEvent.timestamp_salida, "timestamp_salida_ms")
+
+#------------------------------------------------------------------------------------------
+#Clase ApiKey (credencial de máquina para gateways de estación)
+#La clave completa es "tk_<prefijo>_<secreto>"; solo se guarda el HMAC del secreto.
+#El alcance es una estación o una línea completa.
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    prefijo = Column(String(16), nullable=False, unique=True, index=True)
+    secreto_hmac = Column(String(64), nullable=False)
+    nombre = Column(String(100), nullable=False)
+    station_id = Column(Integer, ForeignKey("stations.id"), nullable=True)
+    linea = Column(String(100), nullable=True)
+    activo = Column(Boolean, nullable=False, default=True)
+    fecha_creacion = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+    )
+
+#------------------------------------------------------------------------------------------
+#Clase RevokedToken (tokens revocados antes de expirar)
+#Una fila revoca un token (jti, al cerrar sesión) o todos los emitidos a un
+#usuario hasta revocado_en (user_id, al desactivarlo). expira_en marca desde
+#cuándo la fila ya no importa porque los tokens afectados expiraron.
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    revocado_en = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+    )
+    expira_en = Column(DateTime(timezone=True), nullable=False, index=True)
+
+#------------------------------------------------------------------------------------------
+#Clase TracePartition (meses de trace_events movidos a su propio archivo)
+#trace_events guarda el mes en curso y lo no particionado; cada mes cerrado puede
+#vivir en un archivo SQLite aparte que se adjunta (ATTACH) al consultarlo.
+
+class TracePartition(Base):
+    __tablename__ = "trace_partitions"
+
+    mes = Column(String(7), primary_key=True)  # "2026-09"
+    archivo = Column(String(255), nullable=False)
+    desde = Column(DateTime, nullable=False)
+    hasta = Column(DateTime, nullable=False)
+    filas = Column(Integer, nullable=False, default=0)
+    min_id = Column(Integer, nullable=True)
+    max_id = Column(Integer, nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+#------------------------------------------------------------------------------------------
+#Archivo frío de trace_events
+#Los eventos más viejos que TRACE_ARCHIVE_AFTER_DAYS salen de la base y se
+#anexan a archivos gzip por mes (un miembro gzip por pieza y corrida, nunca se
+#reescriben). TraceArchiveIndex dice dónde está cada miembro; los agregados
+#diarios quedan en TraceEventRollup para las métricas.
+
+class TraceArchiveIndex(Base):
+    __tablename__ = "trace_archive_index"
+
+    id = Column(Integer, primary_key=True, index=True)
+    part_id = Column(String(50), nullable=False, index=True)
+    mes = Column(String(7), nullable=False)
+    archivo = Column(String(255), nullable=False)
+    offset = Column(Integer, nullable=False)
+    length = Column(Integer, nullable=False)
+    filas = Column(Integer, nullable=False)
+
+
+class TraceEventRollup(Base):
+    __tablename__ = "trace_event_rollups"
+
+    dia = Column(Date, primary_key=True)
+    station_id = Column(Integer, primary_key=True)
+    tipo_pieza = Column(String(50), primary_key=True)
+    eventos = Column(Integer, nullable=False, default=0)
+    scrap = Column(Integer, nullable=False, default=0)
+    segundos_ciclo = Column(Float, nullable=False, default=0.0)
+
+#------------------------------------------------------------------------------------------
+#Clase PartShard (directorio de piezas con SHARD_URLS)
+#Cada pieza vive en la base de su línea; el catálogo guarda en qué línea está
+#para resolver /parts/{id} sin consultar todos los shards.
+
+class PartShard(Base):
+    __tablename__ = "part_shards"
+
+    part_id = Column(String(50), primary_key=True)
+    linea = Column(String(100), nullable=False)
+
+#------------------------------------------------------------------------------------------
+#Clase TableVersion (secuencia de cambios por tabla)
+#Cada flush que inserta, modifica o borra filas de una tabla de VERSIONED_TABLES
+#incrementa su version; sirve para ETags de listados y para invalidar caches en
+#memoria.
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    nombre = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+@event.listens_for(Part, "before_update")
+def _bump_part_version(mapper, connection, target):
+    session = object_session(target)
+    if session is None or session.is_modified(target, include_collections=False):
+        # en SQL, no desde el valor cargado: dos sesiones que leyeron la misma
+        # versión escribirían ambas N+1 con contenido distinto (mismo ETag)
+        target.version = Part.__table__.c.version + 1
+
+
+def _bump_part_version_for_event(mapper, connection, target):
+    # el historial de la pieza cambia con cada evento, aunque la pieza no se toque
+    parts = Part.__table__
+    connection.execute(
+        parts.update()
+        .where(parts.c.id == target.part_id)
+        .values(version=parts.c.version + 1)
+    )
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(TraceEvent, _event_name, _bump_part_version_for_event)
+
+
+# tablas con algún consumidor de su versión (caches, ETags). Las demás, como
+# trace_events o parts en cada ingesta, no pagan el UPDATE de table_versions.
+# Es fijo aquí y no lo arma cada consumidor al importarse: un proceso que
+# escribe (p. ej. app.manage) debe incrementar aunque no cargue esos caches
+VERSIONED_TABLES = frozenset(
+    {
+        Station.__tablename__,
+        TracePartition.__tablename__,
+        ApiKey.__tablename__,
+        User.__tablename__,
+    }
+)
+
+
+def bump_table_versions(connection, table_names) -> None:
+    versions = TableVersion.__table__
+    for nombre in sorted(table_names):
+        result = connection.execute(
+            versions.update()
+            .where(versions.c.nombre == nombre)
+            .values(version=versions.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(versions.insert().values(nombre=nombre, version=1))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_table_versions(session, flush_context):
+    changed = set()
+    for obj in session.new | session.deleted:
+        changed.add(obj.__table__.name)
+    for obj in session.dirty:
+        if obj.__table__.name in VERSIONED_TABLES and obj.__table__.name not in changed:
+            if session.is_modified(obj, include_collections=False):
+                changed.add(obj.__table__.name)
+    changed &= VERSIONED_TABLES
+
+    if changed:
+        bump_table_versions(session.connection(), changed)
+        session.info.setdefault("changed_tables", set()).update(changed)
+
+
+# caches en memoria que se invalidan cuando este proceso confirma cambios en una
+# tabla; los demas procesos lo detectan comparando table_versions
+_table_listeners = defaultdict(list)
+
+def on_table_change(nombre: str, callback) -> None:
+    if nombre not in VERSIONED_TABLES:
+        # nunca se avisaría: la tabla no lleva versión
+        raise ValueError("UNVERSIONED_TABLE")
+    _table_listeners[nombre].append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_table_listeners(session):
+    for nombre in session.info.pop("changed_tables", ()):
+        for callback in _table_listeners[nombre]:
+            callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_tables(session):
+    session.info.pop("changed_tables", None)
+
+
+def get_table_version(connection, nombre: str) -> int:
+    versions = TableVersion.__table__
+    version = connection.execute(
+        select(versions.c.version).where(versions.c.nombre == nombre)
+    ).scalar()
+    return version or 0
+
+#------------------------------------------------------------------------------------------
+#Indices de busqueda (FTS5, solo SQLite)
+#Tablas virtuales de contenido externo: el texto vive en la tabla original y los
+#triggers mantienen el indice sincronizado con cualquier escritura.
+
+PARTS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5(
+        id, lote,
+        content='parts', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS parts_fts_ai AFTER INSERT ON parts BEGIN
+        INSERT INTO parts_fts(rowid, id, lote) VALUES (new.rowid, new.id, new.lote);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS parts_fts_ad AFTER DELETE ON parts BEGIN
+        INSERT INTO parts_fts(parts_fts, rowid, id, lote)
+        VALUES ('delete', old.rowid, old.id, old.lote);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS parts_fts_au AFTER UPDATE OF id, lote ON parts BEGIN
+        INSERT INTO parts_fts(parts_fts, rowid, id, lote)
+        VALUES ('delete', old.rowid, old.id, old.lote);
+        INSERT INTO parts_fts(rowid, id, lote) VALUES (new.rowid, new.id, new.lote);
+    END
+    """,
+]
+
+# observaciones: texto libre en espanol, se ignoran acentos al tokenizar
+TRACE_EVENTS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS trace_events_fts USING fts5(
+        observaciones,
+        content='trace_events', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trace_events_fts_ai AFTER INSERT ON trace_events BEGIN
+        INSERT INTO trace_events_fts(rowid, observaciones)
+        VALUES (new.id, new.observaciones);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trace_events_fts_ad AFTER DELETE ON trace_events BEGIN
+        INSERT INTO trace_events_fts(trace_events_fts, rowid, observaciones)
+        VALUES ('delete', old.id, old.observaciones);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trace_events_fts_au
+    AFTER UPDATE OF observaciones ON trace_events BEGIN
+        INSERT INTO trace_events_fts(trace_events_fts, rowid, observaciones)
+        VALUES ('delete', old.id, old.observaciones);
+        INSERT INTO trace_events_fts(rowid, observaciones)
+        VALUES (new.id, new.observaciones);
+    END
+    """,
+]
+
+SEARCH_INDEXES = {
+    "parts_fts": (Part.__table__, PARTS_FTS_DDL),
+    "trace_events_fts": (TraceEvent.__table__, TRACE_EVENTS_FTS_DDL),
+}
+
+for _fts_name, (_table, _statements) in SEARCH_INDEXES.items():
+    for _statement in _statements:
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    event.listen(
+        _table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_fts_name}").execute_if(dialect="sqlite"),
+    )
+
+
+def ensure_search_indexes(connection) -> None:
+    # create_all no dispara after_create en tablas que ya existen, asi que en
+    # bases de datos previas creamos el indice y lo llenamos con 'rebuild'.
+    # Se ejecuta dentro de la transaccion de quien llama (migracion base)
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing = set(inspect(connection).get_table_names())
+    for fts_name, (table, statements) in SEARCH_INDEXES.items():
+        if table.name not in existing or fts_name in existing:
+            continue
+        for statement in statements:
+            connection.execute(text(statement))
+        connection.execute(text(f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')"))
+
@@ -1,19 +1,25 @@
-from fastapi import APIRouter
-from app.routers.auth import router as auth_router
-from app.routers.users import router as users_router
-from app.routers.stations import router as stations_router
-from app.routers.parts import router as parts_router
-from app.routers.trace_events import router as trace_events_router
-from app.routers.metrics import router as metrics_router
+import importlib
+from fastapi import FastAPI
 
-api_router = APIRouter()
+# en orden de registro; cada módulo expone `router`
+ROUTER_MODULES = (
+    "auth",
+    "users",
+    "stations",
+    "parts",
+    "trace_events",
+    "metrics",
+    "api_keys",
+)
 
-api_router.include_router(auth_router)
-api_router.include_router(users_router)
-api_router.include_router(stations_router)
-api_router.include_router(parts_router)
-api_router.include_router(trace_events_router)
-api_router.include_router(metrics_router)
 
-# from .products import router as products_router
-# api_router.include_router(products_router, prefix="/products", tags=["Products"])
+def include_routers(app: FastAPI, prefix: str = "") -> None:
+    # los módulos de rutas (y sus servicios y esquemas) se importan al armar la
+    # app, no al importar este paquete; y se registran una sola vez, directo en
+    # la app (un APIRouter intermedio copiaba cada ruta dos veces)
+    for name in ROUTER_MODULES:
+        module = importlib.import_module(f"app.routers.{name}")
+        app.include_router(module.router, prefix=prefix)
+
+# para agregar un router: un módulo en app/routers con `router` y su nombre en
+# ROUTER_MODULES
@@ -0,0 +1,74 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.models.models import UserRole
+from app.schemas.schemas import ApiKeyCreate, ApiKeyCreated, ApiKeyRead
+from app.services.api_key_service import (
+    get_api_key,
+    list_api_keys,
+    create_api_key,
+    revoke_api_key,
+)
+from app.services.auth_service import require_role
+from app.services.principal_cache import Principal
+from app.services.station_registry import station_registry
+
+router = APIRouter(prefix="/api-keys", tags=["ApiKeys"])
+
+# Credenciales de máquina para los gateways de estación (solo admin)
+
+def _to_read(api_key) -> ApiKeyRead:
+    return ApiKeyRead(
+        id=api_key.id,
+        prefijo=api_key.prefijo,
+        nombre=api_key.nombre,
+        station_id=api_key.station_id,
+        linea=api_key.linea,
+        activo=api_key.activo,
+        fecha_creacion=api_key.fecha_creacion,
+    )
+
+@router.post("/", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+def create_api_key_endpoint(
+    data: ApiKeyCreate,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
+):
+    if (data.station_id is None) == (data.linea is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indica station_id o linea (solo uno)",
+        )
+
+    if data.station_id is not None and not station_registry.get_station(db, data.station_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Estación no encontrada",
+        )
+
+    api_key, key = create_api_key(db, data)
+    return ApiKeyCreated(**_to_read(api_key).dict(), key=key)
+
+@router.get("/", response_model=List[ApiKeyRead])
+def list_api_keys_endpoint(
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
+):
+    return [_to_read(api_key) for api_key in list_api_keys(db)]
+
+@router.delete("/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_api_key_endpoint(
+    key_id: int,
+    db: Session = Depends(get_db),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
+):
+    api_key = get_api_key(db, key_id)
+    if not api_key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key no encontrada",
+        )
+
+    revoke_api_key(db, api_key)
+    return
@@ -3,13 +3,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import DBRunner, get_db, get_db_runner
+from app.core.hashing import HashingBusy, password_hasher
 from app.models.models import User, UserRole
 from app.schemas.schemas import UserCreate, UserRead
+from app.services.principal_cache import Principal, principal_cache
+from app.services.revocation import revocation_filter
 from app.services.auth_service import (
-    get_password_hash,
-    verify_password,
+    create_user,
+    decode_token,
+    oauth2_scheme,
     get_user_by_email,
+    get_user_by_id,
     create_access_token,
     get_current_user,
     require_role,
@@ -27,14 +33,30 @@ class LoginBody(BaseModel):
     email: str
     password: str
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Demasiadas solicitudes de autenticación en curso, intenta de nuevo en unos segundos",
+        headers={"Retry-After": str(settings.HASH_RETRY_AFTER_SECONDS)},
+    )
+
+# login y register son async: el pbkdf2 corre en el pool de procesos y la
+# espera no ocupa hilos del threadpool
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: DBRunner = Depends(get_db_runner),
 ):
-    user: User | None = get_user_by_email(db, form_data.username)
+    user: User | None = await db.run(get_user_by_email, form_data.username)
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    try:
+        valid = user is not None and await password_hasher.verify(
+            form_data.password, user.password_hash
+        )
+    except HashingBusy:
+        raise _hashing_busy()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Credenciales inválidas",
@@ -46,7 +68,8 @@ def login(
             detail="Usuario inactivo",
         )
 
-    access_token_expires = timedelta(minutes=60)
+    # la revocación por usuario asume esta vida máxima de los tokens
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={
             "sub": str(user.id),
@@ -72,29 +95,24 @@ def login(
 
 
 @router.post("/register", response_model=UserRead)
-def register_user(
+async def register_user(
     new_user: UserCreate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)),
+    db: DBRunner = Depends(get_db_runner),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
-    existing = get_user_by_email(db, new_user.email)
+    existing = await db.run(get_user_by_email, new_user.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Ya existe un usuario con ese email",
         )
 
-    user = User(
-        nombre=new_user.nombre,
-        email=new_user.email,
-        password_hash=get_password_hash(new_user.password),
-        rol=new_user.rol,
-        activo=True,
-    )
+    try:
+        password_hash = await password_hasher.hash(new_user.password)
+    except HashingBusy:
+        raise _hashing_busy()
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    user = await db.run(create_user, new_user, password_hash)
 
     return UserRead(
         id=user.id,
@@ -106,16 +124,46 @@ def register_user(
     )
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    payload = decode_token(token)
+    jti = payload.get("jti")
+    if jti is None:
+        # token emitido antes de que existiera jti: no se puede revocar solo
+        # ese, se cortan todos los del usuario emitidos hasta ahora
+        revocation_filter.revoke_user(db, current_user.id)
+    else:
+        revocation_filter.revoke_token(db, jti, payload["exp"])
+    return
+
+
 @router.get("/me", response_model=UserRead)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     """
     Devuelve la información del usuario autenticado.
     """
+    user = get_user_by_id(db, current_user.id)
+    if user is None:
+        # el principal venía del cache y la fila ya no existe (borrada por otro
+        # proceso antes de que el cache lo notara)
+        principal_cache.invalidate_user(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado o inactivo",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return UserRead(
-        id=current_user.id,
-        nombre=current_user.nombre,
-        email=current_user.email,
-        rol=current_user.rol,
-        activo=current_user.activo,
-        fecha_registro=current_user.fecha_registro,
+        id=user.id,
+        nombre=user.nombre,
+        email=user.email,
+        rol=user.rol,
+        activo=user.activo,
+        fecha_registro=user.fecha_registro,
     )
@@ -1,10 +1,13 @@
 from datetime import date, datetime
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.models import User, UserRole
+from fastapi import APIRouter, Depends, Query, Request
+from app.core.database import DBRunner, get_read_runner, get_shard_router
+from app.core.negotiation import document_response, rows_response
+from app.core.sharding import ShardRouter
+from app.core.telemetry import telemetry
+from app.models.models import UserRole
 from app.services.auth_service import require_role
+from app.services.principal_cache import Principal
 from app.services.metrics_service import (
     get_parts_by_status,
     get_throughput,
@@ -12,69 +15,146 @@ from app.services.metrics_service import (
     get_scrap_rate,
     get_overview,
     get_station_load,
+    overview_totals,
+    parts_by_status_totals,
+    scrap_totals,
+    station_cycle_totals,
+    station_load_totals,
+    throughput_totals,
 )
 router = APIRouter(prefix="/metrics", tags=["Metrics"])
 MetricsUserDep = Depends(require_role(UserRole.SUPERVISOR, UserRole.ADMIN))
+ShardsDep = Depends(get_shard_router)
 
+async def _run_metric(db: DBRunner, shards: Optional[ShardRouter], metric, totals, *args):
+    # con shards: sumas parciales de cada línea en paralelo (scatter/gather) y
+    # la métrica se arma sobre el catálogo, que tiene los nombres de estaciones
+    if shards is None:
+        return await db.run(metric, *args)
+    partials = await shards.gather(totals, *args)
+    return await db.run(metric, *args, partials=partials)
+
+# Todos los endpoints negocian el formato por Accept:
+# application/json (por defecto), application/msgpack y
+# application/vnd.traceability.columnar+json (columnas + enums como diccionario)
 
 @router.get("/parts-by-status")
-def parts_by_status(
+async def parts_by_status(
+    request: Request,
     from_date: Optional[date] = Query(default=None),
     to_date: Optional[date] = Query(default=None),
     tipo_pieza: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = MetricsUserDep,
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = ShardsDep,
+    current_user: Principal = MetricsUserDep,
 ):
-    return get_parts_by_status(db, from_date, to_date, tipo_pieza)
+    rows = await _run_metric(
+        db, shards, get_parts_by_status, parts_by_status_totals, from_date, to_date, tipo_pieza
+    )
+    meta = {
+        "from_date": from_date.isoformat() if from_date else None,
+        "to_date": to_date.isoformat() if to_date else None,
+        "tipo_pieza": tipo_pieza,
+    }
+    return rows_response(
+        request, rows, keys=["status", "count"], meta=meta, rows_key="counts"
+    )
 
 
 @router.get("/throughput")
-def throughput(
+async def throughput(
+    request: Request,
     from_date: date = Query(..., alias="from"),
     to_date: date = Query(..., alias="to"),
     tipo_pieza: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = MetricsUserDep,
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = ShardsDep,
+    current_user: Principal = MetricsUserDep,
 ):
-    return get_throughput(db, from_date, to_date, tipo_pieza)
+    rows = await _run_metric(
+        db, shards, get_throughput, throughput_totals, from_date, to_date, tipo_pieza
+    )
+    meta = {
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "tipo_pieza": tipo_pieza,
+    }
+    return rows_response(
+        request, rows, keys=["date", "count"], meta=meta, rows_key="throughput_per_day"
+    )
 
 
 @router.get("/station-cycle-time")
-def station_cycle_time(
+async def station_cycle_time(
+    request: Request,
     from_ts: Optional[datetime] = Query(default=None),
     to_ts: Optional[datetime] = Query(default=None),
     tipo_pieza: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = MetricsUserDep,
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = ShardsDep,
+    current_user: Principal = MetricsUserDep,
 ):
-    return get_station_cycle_time(db, from_ts, to_ts, tipo_pieza)
+    rows = await _run_metric(
+        db, shards, get_station_cycle_time, station_cycle_totals, from_ts, to_ts, tipo_pieza
+    )
+    return rows_response(
+        request, rows, keys=["station_id", "station_name", "avg_cycle_time_seconds"]
+    )
 
 
 @router.get("/scrap-rate")
-def scrap_rate(
+async def scrap_rate(
+    request: Request,
     from_ts: Optional[datetime] = Query(default=None),
     to_ts: Optional[datetime] = Query(default=None),
     station_id: Optional[int] = Query(default=None),
     tipo_pieza: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = MetricsUserDep,
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = ShardsDep,
+    current_user: Principal = MetricsUserDep,
 ):
-    return get_scrap_rate(db, from_ts, to_ts, station_id, tipo_pieza)
+    rows = await _run_metric(
+        db, shards, get_scrap_rate, scrap_totals, from_ts, to_ts, station_id, tipo_pieza
+    )
+    return rows_response(
+        request,
+        rows,
+        keys=["tipo_pieza", "station_id", "station_name", "total", "scrap", "scrap_rate"],
+    )
 
 
 @router.get("/overview")
-def metrics_overview(
-    db: Session = Depends(get_db),
-    current_user: User = MetricsUserDep,
+async def metrics_overview(
+    request: Request,
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = ShardsDep,
+    current_user: Principal = MetricsUserDep,
 ):
-    return get_overview(db)
+    if shards is None:
+        return document_response(request, await db.run(get_overview))
+    today = datetime.utcnow().date()
+    partials = await shards.gather(overview_totals, today)
+    return document_response(request, await db.run(get_overview, partials, today))
 
 
 @router.get("/station-load")
-def station_load(
+async def station_load(
+    request: Request,
     from_ts: Optional[datetime] = Query(default=None),
     to_ts: Optional[datetime] = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = MetricsUserDep,
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = ShardsDep,
+    current_user: Principal = MetricsUserDep,
+):
+    rows = await _run_metric(db, shards, get_station_load, station_load_totals, from_ts, to_ts)
+    return rows_response(
+        request, rows, keys=["station_id", "station_name", "events_count"]
+    )
+
+
+@router.get("/runtime")
+def runtime_metrics(
+    current_user: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
-    return get_station_load(db, from_ts, to_ts)
+    # telemetría del proceso que atiende la petición
+    return telemetry.snapshot()
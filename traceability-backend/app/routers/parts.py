@@ -1,9 +1,15 @@
 from datetime import date
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.models import User, UserRole, PartStatus
+from app.core.database import DBRunner, get_db, get_db_runner, get_read_runner, get_shard_router
+from app.core.http_cache import etag_matches, make_etag, not_modified
+from app.core.negotiation import rows_response
+from app.core.projection import parse_fields, schema_fields
+from app.core.serialization import RowsJSONResponse
+from app.core.sharding import ShardRouter
+from app.models.models import UserRole, PartStatus
 from app.schemas.schemas import (
     PartCreate,
     PartRead,
@@ -11,12 +17,24 @@ from app.schemas.schemas import (
     TraceEventRead,
 )
 from app.services.auth_service import require_role
+from app.services.principal_cache import Principal
 from app.services.part_service import (
     get_part,
-    list_parts,
+    get_part_version,
+    list_parts_fields,
     create_part,
     update_part,
-    get_part_history,
+    get_part_history_fields,
+    search_parts,
+    FTS_MIN_QUERY_LENGTH,
+)
+from app.services.shard_service import (
+    create_sharded_part,
+    get_part_db,
+    get_part_read_runner,
+    get_part_runner,
+    list_sharded_parts_fields,
+    search_sharded_parts,
 )
 
 router = APIRouter(prefix="/parts")
@@ -25,18 +43,34 @@ router = APIRouter(prefix="/parts")
 def create_part_endpoint(
     data: PartCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
-    existing = get_part(db, data.id)
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Ya existe una pieza con ese id (serial)",
-        )
+    if shards is not None:
+        try:
+            part = create_sharded_part(db, shards, data)
+        except ValueError as e:
+            code = str(e)
+            if code == "PART_EXISTS":
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Ya existe una pieza con ese id (serial)",
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Indique una línea con base asignada (linea)",
+            )
+    else:
+        existing = get_part(db, data.id)
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Ya existe una pieza con ese id (serial)",
+            )
+        part = create_part(db, data)
 
-    part = create_part(db, data)
     return PartRead(
         id=part.id,
         tipo_pieza=part.tipo_pieza,
@@ -49,7 +83,8 @@ def create_part_endpoint(
     )
 
 @router.get("/", response_model=List[PartRead])
-def list_parts_endpoint(
+async def list_parts_endpoint(
+    request: Request,
     status_filter: Optional[PartStatus] = Query(default=None, alias="status"),
     tipo_pieza: Optional[str] = Query(default=None),
     lote: Optional[str] = Query(default=None),
@@ -57,21 +92,50 @@ def list_parts_endpoint(
     to_date: Optional[date] = Query(default=None),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(
+    fields: Optional[str] = Query(default=None),
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
-    parts = list_parts(
-        db=db,
+    columns = parse_fields(fields, PartRead)
+    filters = dict(
         status_filter=status_filter,
         tipo_pieza=tipo_pieza,
         lote=lote,
         from_date=from_date,
         to_date=to_date,
-        skip=skip,
-        limit=limit,
     )
+    if shards is not None:
+        rows = await run_in_threadpool(
+            list_sharded_parts_fields, shards, columns, skip, limit, **filters
+        )
+    else:
+        rows = await db.run(list_parts_fields, fields=columns, skip=skip, limit=limit, **filters)
+    return rows_response(request, rows, keys=columns)
+
+@router.get("/search", response_model=List[PartRead])
+async def search_parts_endpoint(
+    q: str = Query(..., min_length=1, max_length=50),
+    mode: str = Query(default="substring", pattern="^(prefix|substring)$"),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: DBRunner = Depends(get_db_runner),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+    current_user: Principal = Depends(
+        require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
+    ),
+):
+    if mode == "substring" and len(q.strip()) < FTS_MIN_QUERY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La búsqueda por subcadena requiere al menos {FTS_MIN_QUERY_LENGTH} caracteres",
+        )
+
+    if shards is not None:
+        parts = await run_in_threadpool(search_sharded_parts, shards, q, mode, limit)
+    else:
+        parts = await db.run(search_parts, q, mode=mode, limit=limit)
 
     return [
         PartRead(
@@ -88,20 +152,29 @@ def list_parts_endpoint(
     ]
 
 @router.get("/{part_id}", response_model=PartRead)
-def get_part_endpoint(
+async def get_part_endpoint(
     part_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: DBRunner = Depends(get_part_runner),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
-    part = get_part(db, part_id)
-    if not part:
+    version = await db.run(get_part_version, part_id)
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pieza no encontrada",
         )
 
+    etag = make_etag("part", version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    part = await db.run(get_part, part_id)
+    response.headers["ETag"] = etag
+
     return PartRead(
         id=part.id,
         tipo_pieza=part.tipo_pieza,
@@ -114,44 +187,37 @@ def get_part_endpoint(
     )
 
 @router.get("/{part_id}/history", response_model=List[TraceEventRead])
-def get_part_history_endpoint(
+async def get_part_history_endpoint(
     part_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(
+    if_none_match: Optional[str] = Header(default=None),
+    db: DBRunner = Depends(get_part_read_runner),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
 
-    part = get_part(db, part_id)
-    if not part:
+    version = await db.run(get_part_version, part_id)
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pieza no encontrada",
         )
 
-    events = get_part_history(db, part_id)
+    etag = make_etag("history", version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
-    return [
-        TraceEventRead(
-            id=e.id,
-            part_id=e.part_id,
-            station_id=e.station_id,
-            timestamp_entrada=e.timestamp_entrada,
-            timestamp_salida=e.timestamp_salida,
-            resultado=e.resultado,
-            operador_id=e.operador_id,
-            observaciones=e.observaciones,
-        )
-        for e in events
-    ]
+    columns = schema_fields(TraceEventRead)
+    rows = await db.run(get_part_history_fields, part_id, columns)
+    return RowsJSONResponse(rows, keys=columns, headers={"ETag": etag})
 
 
 @router.patch("/{part_id}", response_model=PartRead)
 def update_part_endpoint(
     part_id: str,
     data: PartUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(
+    db: Session = Depends(get_part_db),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
@@ -1,13 +1,18 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.models import User, UserRole
+from app.core.database import get_db, get_read_db
+from app.core.http_cache import etag_matches, make_etag, not_modified
+from app.core.projection import parse_fields
+from app.core.serialization import RowsJSONResponse
+from app.models.models import UserRole
 from app.schemas.schemas import StationCreate, StationRead, StationUpdate
 from app.services.auth_service import require_role
+from app.services.principal_cache import Principal
 from app.services.station_service import (
     get_station,
-    list_stations,
+    get_stations_version,
+    list_stations_fields,
     create_station,
     update_station,
     delete_station,
@@ -17,27 +22,29 @@ router = APIRouter(prefix="/stations", tags=["Stations"])
 
 @router.get("/", response_model=List[StationRead])
 def get_stations(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(
+    if_none_match: Optional[str] = Header(default=None),
+    fields: Optional[str] = Query(default=None),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
-    stations = list_stations(db)
-    return [
-        StationRead(
-            id=s.id,
-            nombre=s.nombre,
-            tipo=s.tipo,
-            linea=s.linea,
-        )
-        for s in stations
-    ]
+    columns = parse_fields(fields, StationRead)
+
+    # la proyección es parte de la representación: ?fields=id no puede
+    # validar la lista completa. "+" porque If-None-Match separa con comas
+    etag = make_etag(f"stations:{'+'.join(columns)}", get_stations_version(db))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    rows = list_stations_fields(db, columns)
+    return RowsJSONResponse(rows, keys=columns, headers={"ETag": etag})
 
 @router.get("/{station_id}", response_model=StationRead)
 def get_station_by_id(
     station_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
@@ -60,7 +67,7 @@ def get_station_by_id(
 def create_station_endpoint(
     data: StationCreate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
     from app.models.models import Station
     existing = db.query(Station).filter(Station.nombre == data.nombre).first()
@@ -85,7 +92,7 @@ def update_station_endpoint(
     station_id: int,
     data: StationUpdate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
     station = get_station(db, station_id)
     if not station:
@@ -105,7 +112,7 @@ def update_station_endpoint(
 def delete_station_endpoint(
     station_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
     station = get_station(db, station_id)
     if not station:
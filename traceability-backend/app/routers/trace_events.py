@@ -1,29 +1,52 @@
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.models import User, UserRole, TraceResult
-from app.schemas.schemas import TraceEventCreate, TraceEventRead
-from app.services.auth_service import require_role
+from app.core.database import DBRunner, get_db, get_db_runner, get_read_db, get_shard_router
+from app.core.negotiation import rows_response
+from app.core.projection import parse_fields
+from app.core.sharding import ShardRouter
+from app.models.models import UserRole, TraceResult
+from app.schemas.schemas import (
+    TraceEventCreate,
+    TraceEventRead,
+    TraceEventSearchPage,
+)
+from app.services.api_key_registry import MachineCredential
+from app.services.auth_service import require_role, require_role_or_api_key
+from app.services.principal_cache import Principal
+from app.services.shard_service import (
+    create_sharded_trace_event,
+    get_sharded_trace_event,
+    list_sharded_trace_events_fields,
+    search_sharded_trace_events,
+)
 from app.services.trace_event_service import (
     get_trace_event,
-    list_trace_events,
+    list_trace_events_fields,
     create_trace_event,
+    search_trace_events,
 )
 
 router = APIRouter(prefix="/trace-events", tags=["TraceEvents"])
 
 @router.post("/", response_model=TraceEventRead, status_code=status.HTTP_201_CREATED)
-def create_trace_event_endpoint(
+async def create_trace_event_endpoint(
     data: TraceEventCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(
-        require_role(UserRole.OPERADOR, UserRole.SUPERVISOR, UserRole.ADMIN)
+    db: DBRunner = Depends(get_db_runner),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+    caller: Union[Principal, MachineCredential] = Depends(
+        require_role_or_api_key(UserRole.OPERADOR, UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
+    # usuario (Bearer) o gateway de estación (X-API-Key)
+    current_user = caller if isinstance(caller, Principal) else None
+    credential = caller if isinstance(caller, MachineCredential) else None
     try:
-        event = create_trace_event(db, data, current_user)
+        if shards is not None:
+            event = await create_sharded_trace_event(db, shards, data, current_user, credential)
+        else:
+            event = await db.run(create_trace_event, data, current_user, credential)
     except ValueError as e:
         code = str(e)
         if code == "PART_NOT_FOUND":
@@ -36,6 +59,16 @@ def create_trace_event_endpoint(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Estación no encontrada",
             )
+        if code == "PART_IN_OTHER_LINE":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La pieza pertenece a otra línea de producción",
+            )
+        if code == "OUT_OF_SCOPE":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="La API key no tiene permiso sobre esta estación",
+            )
         if code == "INVALID_TIMESTAMPS":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,53 +93,98 @@ def create_trace_event_endpoint(
 
 @router.get("/", response_model=List[TraceEventRead])
 def list_trace_events_endpoint(
+    request: Request,
     station_id: Optional[int] = Query(default=None),
     resultado: Optional[TraceResult] = Query(default=None),
     from_ts: Optional[datetime] = Query(default=None),
     to_ts: Optional[datetime] = Query(default=None),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(
+    fields: Optional[str] = Query(default=None),
+    db: Session = Depends(get_read_db),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
+    columns = parse_fields(fields, TraceEventRead)
+    filters = dict(station_id=station_id, resultado=resultado, from_ts=from_ts, to_ts=to_ts)
+    if shards is not None:
+        rows = list_sharded_trace_events_fields(shards, columns, skip, limit, **filters)
+    else:
+        rows = list_trace_events_fields(db=db, fields=columns, skip=skip, limit=limit, **filters)
+    return rows_response(request, rows, keys=columns)
 
-    events = list_trace_events(
-        db=db,
-        station_id=station_id,
-        resultado=resultado,
-        from_ts=from_ts,
-        to_ts=to_ts,
-        skip=skip,
-        limit=limit,
-    )
 
-    return [
-        TraceEventRead(
-            id=e.id,
-            part_id=e.part_id,
-            station_id=e.station_id,
-            timestamp_entrada=e.timestamp_entrada,
-            timestamp_salida=e.timestamp_salida,
-            resultado=e.resultado,
-            operador_id=e.operador_id,
-            observaciones=e.observaciones,
+@router.get("/search", response_model=TraceEventSearchPage)
+def search_trace_events_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    station_id: Optional[int] = Query(default=None),
+    resultado: Optional[TraceResult] = Query(default=None),
+    from_ts: Optional[datetime] = Query(default=None),
+    to_ts: Optional[datetime] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+    current_user: Principal = Depends(
+        require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
+    ),
+):
+    try:
+        if shards is not None:
+            events, next_cursor = search_sharded_trace_events(
+                shards, q, station_id, resultado, from_ts, to_ts, cursor, limit
+            )
+        else:
+            events, next_cursor = search_trace_events(
+                db=db,
+                q=q,
+                station_id=station_id,
+                resultado=resultado,
+                from_ts=from_ts,
+                to_ts=to_ts,
+                cursor=cursor,
+                limit=limit,
+            )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido",
         )
-        for e in events
-    ]
+
+    return TraceEventSearchPage(
+        items=[
+            TraceEventRead(
+                id=e.id,
+                part_id=e.part_id,
+                station_id=e.station_id,
+                timestamp_entrada=e.timestamp_entrada,
+                timestamp_salida=e.timestamp_salida,
+                resultado=e.resultado,
+                operador_id=e.operador_id,
+                observaciones=e.observaciones,
+            )
+            for e in events
+        ],
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/{event_id}", response_model=TraceEventRead)
 def get_trace_event_endpoint(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+    current_user: Principal = Depends(
         require_role(UserRole.SUPERVISOR, UserRole.ADMIN)
     ),
 ):
 
-    event = get_trace_event(db, event_id)
+    if shards is not None:
+        event = get_sharded_trace_event(shards, event_id)
+    else:
+        event = get_trace_event(db, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -3,9 +3,13 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.projection import parse_fields, select_fields
+from app.core.serialization import RowsJSONResponse
 from app.models.models import User, UserRole
 from app.schemas.schemas import UserRead
 from app.services.auth_service import require_role
+from app.services.principal_cache import Principal, principal_cache
+from app.services.revocation import revocation_filter
 
 router = APIRouter(prefix="/users")
 
@@ -21,10 +25,12 @@ def list_users(
     activo: Optional[bool] = Query(default=None),
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(default=None),
     db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)), # O sea, solo admin puede listar usuarios
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)), # O sea, solo admin puede listar usuarios
 ):
-    query = db.query(User)
+    columns = parse_fields(fields, UserRead)
+    query = select_fields(User, columns)
 
     if rol is not None:
         query = query.filter(User.rol == rol)
@@ -32,26 +38,15 @@ def list_users(
     if activo is not None:
         query = query.filter(User.activo == activo)
 
-    users = query.offset(skip).limit(limit).all()
-
-    return [
-        UserRead(
-            id=u.id,
-            nombre=u.nombre,
-            email=u.email,
-            rol=u.rol,
-            activo=u.activo,
-            fecha_registro=u.fecha_registro,
-        )
-        for u in users
-    ]
+    rows = db.execute(query.offset(skip).limit(limit)).all()
+    return RowsJSONResponse(rows, keys=columns)
 
 #-----------------------------------------------------------------------------------------------------
 @router.get("/{user_id}", response_model=UserRead)
 def get_user_by_id(
     user_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -76,7 +71,7 @@ def update_user(
     user_id: int,
     data: UserUpdate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -95,6 +90,11 @@ def update_user(
         user.activo = data.activo
 
     db.commit()
+    if data.rol is not None or data.activo is not None:
+        principal_cache.invalidate_user(user.id)
+    if data.activo is False:
+        # cierra las sesiones abiertas del usuario
+        revocation_filter.revoke_user(db, user.id)
     db.refresh(user)
 
     return UserRead(
@@ -112,7 +112,7 @@ def update_user(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(require_role(UserRole.ADMIN)),
+    current_admin: Principal = Depends(require_role(UserRole.ADMIN)),
 ):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -122,4 +122,6 @@ def delete_user(
         )
     user.activo = False
     db.commit()
+    principal_cache.invalidate_user(user.id)
+    revocation_filter.revoke_user(db, user.id)
     return
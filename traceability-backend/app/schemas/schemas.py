@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 from app.models.models import UserRole, PartStatus, StationType, TraceResult
 
@@ -57,6 +57,7 @@ class PartBase(BaseModel):
 
 class PartCreate(PartBase):
     id: str  # serial de la pieza que envía el cliente
+    linea: Optional[str] = None  # obligatoria con shards: base donde vive la pieza
 
 class PartRead(PartBase):
     id: str
@@ -93,3 +94,30 @@ class TraceEventRead(TraceEventBase):
 
     class Config:
         orm_mode = True
+
+class TraceEventSearchPage(BaseModel):
+    items: List[TraceEventRead]
+    next_cursor: Optional[str] = None
+
+#------------------------------------------------------------------------------------------
+#ApiKey (credencial de máquina)
+
+class ApiKeyCreate(BaseModel):
+    nombre: str
+    station_id: Optional[int] = None
+    linea: Optional[str] = None
+
+class ApiKeyRead(BaseModel):
+    id: int
+    prefijo: str
+    nombre: str
+    station_id: Optional[int] = None
+    linea: Optional[str] = None
+    activo: bool
+    fecha_creacion: datetime
+
+    class Config:
+        orm_mode = True
+
+class ApiKeyCreated(ApiKeyRead):
+    key: str  # solo se devuelve al crearla
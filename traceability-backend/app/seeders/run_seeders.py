@@ -1,4 +1,4 @@
-from app.core.database import SessionLocal, Base, engine
+from app.core.engines import SessionLocal
 from app.seeders.user_seeder import seed_users
 from app.seeders.station_seeder import seed_stations
 from app.seeders.part_seeder import seed_parts
@@ -7,9 +7,6 @@ from app.seeders.trace_events_seeder import seed_trace_events
 def run_all_seeders():
     db = SessionLocal()
     try:
-        print("Creating tables if not exist...")
-        Base.metadata.create_all(bind=engine)
-
         seed_users(db)
         seed_stations(db)
         seed_parts(db)
@@ -21,4 +18,8 @@ def run_all_seeders():
 
 
 if __name__ == "__main__":
-    run_all_seeders()
+    # igual que "python -m app.manage init": esquema de todas las bases y datos
+    import sys
+    from app.manage import main
+
+    sys.exit(main(["init"]))
@@ -1,5 +1,5 @@
 from app.models.models import User, UserRole
-from app.services.auth_service import get_password_hash
+from app.core.hashing import password_hasher
 from sqlalchemy.orm import Session
 
 def seed_users(db: Session):
@@ -7,35 +7,40 @@ def seed_users(db: Session):
         print("Users already seeded.")
         return
 
+    # los cinco hashes en paralelo en el pool de procesos
+    hashes = password_hasher.hash_many(
+        ["admin123", "password1", "password2", "password3", "password4"]
+    )
+
     users = [
         User(
             nombre="Administrador",
             email="admin@example.com",
-            password_hash=get_password_hash("admin123"),
+            password_hash=hashes[0],
             rol=UserRole.ADMIN,
         ),
         User(
             nombre="Operador 1",
             email="operador1@example.com",
-            password_hash=get_password_hash("password1"),
+            password_hash=hashes[1],
             rol=UserRole.OPERADOR,
         ),
         User(
             nombre="Operador 2",
             email="operador2@example.com",
-            password_hash=get_password_hash("password2"),
+            password_hash=hashes[2],
             rol=UserRole.OPERADOR,
         ),
         User(
             nombre="Supervisor 1",
             email="supervisor1@example.com",
-            password_hash=get_password_hash("password3"),
+            password_hash=hashes[3],
             rol=UserRole.SUPERVISOR,
         ),
         User(
             nombre="Supervisor 2",
             email="supervisor2@example.com",
-            password_hash=get_password_hash("password4"),
+            password_hash=hashes[4],
             rol=UserRole.SUPERVISOR,
         ),
     ]
@@ -0,0 +1,71 @@
+import hashlib
+import hmac
+from typing import Dict, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.table_cache import TableCache
+from app.models.models import ApiKey
+
+API_KEY_PREFIX = "tk"
+
+
+class MachineCredential(NamedTuple):
+    # lo que sabe la ingesta de un gateway autenticado con API key
+    key_id: int
+    station_id: Optional[int]
+    linea: Optional[str]
+
+
+def hash_api_key_secret(secret: str) -> str:
+    # el secreto es aleatorio (256 bits): basta un HMAC, no hace falta pbkdf2
+    return hmac.new(
+        settings.SECRET_KEY.encode(), secret.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def split_api_key(key: str) -> Optional[Tuple[str, str]]:
+    parts = key.split("_", 2)
+    if len(parts) != 3 or parts[0] != API_KEY_PREFIX or not parts[1] or not parts[2]:
+        return None
+    return parts[1], parts[2]
+
+
+class ApiKeyRegistry(TableCache):
+    table_name = ApiKey.__tablename__
+
+    def _load(self, db: Session) -> Dict[str, Tuple[str, MachineCredential]]:
+        rows = db.execute(
+            select(
+                ApiKey.id,
+                ApiKey.prefijo,
+                ApiKey.secreto_hmac,
+                ApiKey.station_id,
+                ApiKey.linea,
+            ).where(ApiKey.activo.is_(True))
+        ).all()
+        return {
+            row.prefijo: (row.secreto_hmac, MachineCredential(row.id, row.station_id, row.linea))
+            for row in rows
+        }
+
+    def verify(self, db: Session, key: str) -> Optional[MachineCredential]:
+        parsed = split_api_key(key)
+        if parsed is None:
+            return None
+        prefijo, secret = parsed
+
+        entry = self.get(db).get(prefijo)
+        if entry is None:
+            # puede ser una clave recién creada en otro worker
+            entry = self.get(db, force_check=True).get(prefijo)
+        if entry is None:
+            return None
+
+        expected, credential = entry
+        if not hmac.compare_digest(expected, hash_api_key_secret(secret)):
+            return None
+        return credential
+
+
+api_key_registry = ApiKeyRegistry(settings.API_KEY_CACHE_CHECK_SECONDS)
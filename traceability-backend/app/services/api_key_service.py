@@ -0,0 +1,41 @@
+import secrets
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.models import ApiKey
+from app.schemas.schemas import ApiKeyCreate
+from app.services.api_key_registry import (
+    API_KEY_PREFIX,
+    api_key_registry,
+    hash_api_key_secret,
+)
+
+def get_api_key(db: Session, key_id: int) -> Optional[ApiKey]:
+    return db.query(ApiKey).filter(ApiKey.id == key_id).first()
+
+def list_api_keys(db: Session) -> List[ApiKey]:
+    return db.query(ApiKey).order_by(ApiKey.id).all()
+
+def create_api_key(db: Session, data: ApiKeyCreate) -> Tuple[ApiKey, str]:
+    prefijo = secrets.token_hex(6)
+    secret = secrets.token_urlsafe(32)
+
+    api_key = ApiKey(
+        prefijo=prefijo,
+        secreto_hmac=hash_api_key_secret(secret),
+        nombre=data.nombre,
+        station_id=data.station_id,
+        linea=data.linea,
+        activo=True,
+    )
+    db.add(api_key)
+    db.commit()
+    api_key_registry.invalidate()
+    db.refresh(api_key)
+
+    # la clave en claro solo existe en esta respuesta
+    return api_key, f"{API_KEY_PREFIX}_{prefijo}_{secret}"
+
+def revoke_api_key(db: Session, api_key: ApiKey) -> None:
+    api_key.activo = False
+    db.commit()
+    api_key_registry.invalidate()
@@ -0,0 +1,247 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Table, delete, func, lambda_stmt, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import (
+    Part,
+    TraceArchiveIndex,
+    TraceEvent,
+    TraceEventRollup,
+    TraceResult,
+    epoch_ms,
+)
+from app.services.partition_service import (
+    PartitionInfo,
+    attach_partitions,
+    detach_partition,
+    partition_registry,
+    partition_table,
+)
+
+#------------------------------------------------------------------------------------------
+# Archivo frío de trace_events
+#
+# run_archive() saca de la base los eventos con timestamp_entrada anterior al
+# corte (tabla caliente y particiones mensuales ya vencidas) en lotes. Por
+# lote: se anexa a trace_events_AAAA_MM.jsonl.gz un miembro gzip por pieza y
+# mes (primero el archivo, con fsync), y en una transacción se registran los
+# miembros en trace_archive_index, se suman los agregados diarios y se borran
+# las filas. Si el proceso cae entre ambos pasos queda un miembro huérfano que
+# nadie indexa; la siguiente corrida vuelve a archivar esas filas.
+
+EVENT_COLUMNS = [c.name for c in TraceEvent.__table__.columns]
+_TIMESTAMP_COLUMNS = ("timestamp_entrada", "timestamp_salida")
+
+
+def archive_file(mes: str) -> str:
+    return f"trace_events_{mes.replace('-', '_')}.jsonl.gz"
+
+
+def archive_path(archivo: str) -> str:
+    return os.path.join(settings.TRACE_ARCHIVE_DIR, archivo)
+
+
+def _encode(event: Dict[str, Any]) -> bytes:
+    record = dict(event)
+    for name in _TIMESTAMP_COLUMNS:
+        record[name] = record[name].isoformat()
+    record["resultado"] = record["resultado"].value
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+def _decode(line: bytes) -> Dict[str, Any]:
+    record = json.loads(line)
+    for name in _TIMESTAMP_COLUMNS:
+        record[name] = datetime.fromisoformat(record[name])
+    record["resultado"] = TraceResult(record["resultado"])
+    return record
+
+
+def _append_member(path: str, lines: List[bytes]) -> Tuple[int, int]:
+    data = gzip.compress(b"".join(lines))
+    with open(path, "ab") as f:
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return offset, len(data)
+
+
+def read_member(path: str, offset: int, length: int) -> List[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    return [_decode(line) for line in data.splitlines() if line]
+
+#------------------------------------------------------------------------------------------
+# Corrida
+
+def _add_rollups(db: Session, totals: Dict[Tuple[date, int, str], List[float]]) -> None:
+    for (dia, station_id, tipo_pieza), (eventos, scrap, segundos) in totals.items():
+        rollup = db.get(TraceEventRollup, (dia, station_id, tipo_pieza))
+        if rollup is None:
+            db.add(
+                TraceEventRollup(
+                    dia=dia,
+                    station_id=station_id,
+                    tipo_pieza=tipo_pieza,
+                    eventos=eventos,
+                    scrap=scrap,
+                    segundos_ciclo=segundos,
+                )
+            )
+        else:
+            rollup.eventos += eventos
+            rollup.scrap += scrap
+            rollup.segundos_ciclo += segundos
+
+
+def _archive_batch(
+    db: Session,
+    events: Table,
+    cutoff: datetime,
+    batch_size: int,
+    partition: Optional[PartitionInfo] = None,
+) -> int:
+    if partition is not None:
+        # cada lote hace commit y el siguiente puede tomar otra conexión del
+        # pool (con NullPool siempre una nueva) que no tiene el ATTACH
+        attach_partitions(db, [partition])
+    rows = db.execute(
+        select(*events.c, Part.tipo_pieza)
+        .outerjoin(Part, Part.id == events.c.part_id)
+        .where(events.c.timestamp_entrada_ms < epoch_ms(cutoff))
+        .order_by(events.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+
+    members: Dict[Tuple[str, str], List[bytes]] = defaultdict(list)
+    totals: Dict[Tuple[date, int, str], List[float]] = defaultdict(lambda: [0, 0, 0.0])
+    for row in rows:
+        event = {name: getattr(row, name) for name in EVENT_COLUMNS}
+        entrada, salida = event["timestamp_entrada"], event["timestamp_salida"]
+        members[(entrada.strftime("%Y-%m"), event["part_id"])].append(_encode(event))
+
+        total = totals[(entrada.date(), event["station_id"], row.tipo_pieza or "")]
+        total[0] += 1
+        total[1] += event["resultado"] == TraceResult.SCRAP
+        total[2] += (salida - entrada).total_seconds()
+
+    os.makedirs(settings.TRACE_ARCHIVE_DIR, exist_ok=True)
+    index = []
+    for (mes, part_id), lines in sorted(members.items()):
+        archivo = archive_file(mes)
+        offset, length = _append_member(archive_path(archivo), lines)
+        index.append(
+            TraceArchiveIndex(
+                part_id=part_id,
+                mes=mes,
+                archivo=archivo,
+                offset=offset,
+                length=length,
+                filas=len(lines),
+            )
+        )
+
+    db.add_all(index)
+    _add_rollups(db, totals)
+    db.execute(delete(events).where(events.c.id.in_([row.id for row in rows])))
+    db.commit()
+    return len(rows)
+
+
+def run_archive(
+    db: Session,
+    older_than_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    days = settings.TRACE_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    batch_size = batch_size or settings.TRACE_ARCHIVE_BATCH_SIZE
+    archived = 0
+
+    # particiones cuyo mes completo quedó antes del corte: se vacían y se quitan
+    expired = []
+    for partition in partition_registry.get(db, force_check=True):
+        if partition.hasta > cutoff:
+            continue
+        table = partition_table(partition.schema)
+        while True:
+            count = _archive_batch(db, table, cutoff, batch_size, partition)
+            if not count:
+                break
+            archived += count
+        # primero sale del registro y después se borra el archivo: un worker
+        # que aún la tenga en su registro no puede adjuntar una ruta inexistente
+        # (attach_partitions usa mode=rw) y ante la falta relee el registro; las
+        # conexiones que ya la tenían adjunta siguen leyendo el archivo abierto
+        detach_partition(db, partition.mes)
+        os.remove(partition.path)
+        expired.append(partition.mes)
+
+    while True:
+        count = _archive_batch(db, TraceEvent.__table__, cutoff, batch_size)
+        if not count:
+            break
+        archived += count
+
+    return {"cutoff": cutoff, "archivados": archived, "particiones": expired}
+
+#------------------------------------------------------------------------------------------
+# Lectura
+
+def get_archived_history(db: Session, part_id: str) -> List[Dict[str, Any]]:
+    """Eventos archivados de una pieza, en orden de timestamp_entrada."""
+    entries = db.execute(
+        select(TraceArchiveIndex.archivo, TraceArchiveIndex.offset, TraceArchiveIndex.length)
+        .where(TraceArchiveIndex.part_id == part_id)
+        .order_by(TraceArchiveIndex.id)
+    ).all()
+    events = []
+    for entry in entries:
+        events.extend(read_member(archive_path(entry.archivo), entry.offset, entry.length))
+    events.sort(key=lambda e: (e["timestamp_entrada"], e["id"]))
+    return events
+
+
+def get_rollup_totals(
+    db: Session,
+    from_ts: Optional[datetime],
+    to_ts: Optional[datetime],
+    station_id: Optional[int] = None,
+    tipo_pieza: Optional[str] = None,
+):
+    """
+    Agregados de eventos archivados por estación y tipo de pieza. La
+    granularidad es diaria: los días de los extremos del rango cuentan completos.
+    """
+    stmt = lambda_stmt(
+        lambda: select(
+            TraceEventRollup.station_id,
+            TraceEventRollup.tipo_pieza,
+            func.sum(TraceEventRollup.eventos).label("eventos"),
+            func.sum(TraceEventRollup.scrap).label("scrap"),
+            func.sum(TraceEventRollup.segundos_ciclo).label("segundos_ciclo"),
+        )
+    )
+    if from_ts is not None:
+        desde = from_ts.date()
+        stmt += lambda s: s.where(TraceEventRollup.dia >= desde)
+    if to_ts is not None:
+        hasta = to_ts.date()
+        stmt += lambda s: s.where(TraceEventRollup.dia <= hasta)
+    if station_id is not None:
+        stmt += lambda s: s.where(TraceEventRollup.station_id == station_id)
+    if tipo_pieza is not None:
+        stmt += lambda s: s.where(TraceEventRollup.tipo_pieza == tipo_pieza)
+    stmt += lambda s: s.group_by(TraceEventRollup.station_id, TraceEventRollup.tipo_pieza)
+    return db.execute(stmt).all()
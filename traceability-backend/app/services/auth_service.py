@@ -1,16 +1,23 @@
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Union
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import DBRunner, get_db_runner
+from app.core.hashing import crypt_context
 from app.models.models import User, UserRole
+from app.schemas.schemas import UserCreate
+from app.services.api_key_registry import MachineCredential, api_key_registry
+from app.services.principal_cache import Principal, principal_cache
+from app.services.revocation import revocation_filter
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 SECRET_KEY: str = getattr(settings, "SECRET_KEY", "JWT_FINAL_PROYECT")
 ALGORITHM: str = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES: int = getattr(
@@ -18,17 +25,30 @@ ACCESS_TOKEN_EXPIRE_MINUTES: int = getattr(
 )
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return crypt_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return crypt_context().hash(password)
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
-    return db.query(User).filter(User.id == user_id).first()
+    return db.execute(lambda_stmt(lambda: select(User).where(User.id == user_id))).scalar()
+
+def create_user(db: Session, data: UserCreate, password_hash: str) -> User:
+    user = User(
+        nombre=data.nombre,
+        email=data.email,
+        password_hash=password_hash,
+        rol=data.rol,
+        activo=True,
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -37,15 +57,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
+    # jti identifica el token (cache de usuarios autenticados, revocación);
+    # iat permite revocar todos los tokens de un usuario emitidos hasta un instante
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
+
+    # python-jose (y cryptography) se importan al primer token, no con la app
+    from jose import jwt
 
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def decode_token(token: str) -> dict:
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,10 +79,17 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+    # pertenencia en memoria; revocation_filter.refresh la mantiene al día
+    if revocation_filter.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revocado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+def authenticate_token(db: Session, token: str) -> Principal:
+    revocation_filter.refresh(db)
     payload = decode_token(token)
     user_id: Optional[str] = payload.get("sub")
 
@@ -76,6 +109,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    jti: Optional[str] = payload.get("jti")
+    principal = principal_cache.get(db, user_id_int, jti)
+    if principal is not None:
+        return principal
+
     user = get_user_by_id(db, user_id_int)
 
     if user is None or not user.activo:
@@ -85,12 +123,22 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+    principal = Principal(id=user.id, rol=user.rol, activo=user.activo)
+    principal_cache.put(db, principal, jti)
+    return principal
+
+# la consulta a users corre en el threadpool o en el driver async, nunca en el event loop
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: DBRunner = Depends(get_db_runner),
+) -> Principal:
+    return await db.run(authenticate_token, token)
 
 
 def require_role(*allowed_roles: UserRole):
 
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    # solo compara el rol, no toca la BD: puede quedarse en el event loop
+    async def role_checker(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.rol not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -99,3 +147,42 @@ def require_role(*allowed_roles: UserRole):
         return current_user
 
     return role_checker
+
+
+def require_role_or_api_key(*allowed_roles: UserRole):
+    """
+    Para endpoints de ingesta: acepta un usuario con rol permitido (Bearer) o
+    un gateway de estación con X-API-Key. Las API keys se validan contra la
+    tabla en memoria, sin consultar users ni calcular pbkdf2.
+    """
+
+    async def caller_checker(
+        api_key: Optional[str] = Depends(api_key_header),
+        token: Optional[str] = Depends(optional_oauth2_scheme),
+        db: DBRunner = Depends(get_db_runner),
+    ) -> Union[Principal, MachineCredential]:
+        if api_key is not None:
+            credential = await db.run(api_key_registry.verify, api_key)
+            if credential is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="API key inválida o revocada",
+                )
+            return credential
+
+        if token is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        current_user = await db.run(authenticate_token, token)
+        if current_user.rol not in allowed_roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para realizar esta acción",
+            )
+        return current_user
+
+    return caller_checker
@@ -1,8 +1,11 @@
 from datetime import date, datetime, time
-from typing import List, Optional, Dict, Any
-from sqlalchemy import func, case
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import case, func, lambda_stmt, select
 from sqlalchemy.orm import Session
-from app.models.models import Part, PartStatus, TraceEvent, TraceResult, Station
+from app.models.models import MS_PER_DAY, Part, PartStatus, TraceResult, epoch_ms, ms_to_datetime
+from app.services.archive_service import get_rollup_totals
+from app.services.partition_service import trace_events_source
+from app.services.station_registry import station_registry
 
 def _date_range_to_datetimes(from_date: Optional[date], to_date: Optional[date]):
     start_dt = None
@@ -13,39 +16,93 @@ def _date_range_to_datetimes(from_date: Optional[date], to_date: Optional[date])
         end_dt = datetime.combine(to_date, time.max)
     return start_dt, end_dt
 
-def get_parts_by_status(
+def _date_range_to_ms(from_date: Optional[date], to_date: Optional[date]):
+    start_dt, end_dt = _date_range_to_datetimes(from_date, to_date)
+    return (
+        epoch_ms(start_dt) if start_dt else None,
+        epoch_ms(end_dt) if end_dt else None,
+    )
+
+#------------------------------------------------------------------------------------------
+# Las consultas son lambda_stmt: cada forma (qué filtros llevan valor) se arma y
+# compila una sola vez; los valores calculados fuera de las lambdas (rangos en
+# milisegundos) viajan como parámetros.
+#
+# Con shards cada métrica se calcula en dos pasos: *_totals() devuelve sumas
+# parciales de una base (también las de los agregados archivados) y get_*()
+# las combina y arma las filas. Sin shards `partials` es None y get_*() calcula
+# los parciales de `db`; con shards el router los junta de todas las líneas y
+# `db` es el catálogo (nombres de estaciones).
+
+def _merge_counts(partials: List[Dict[Any, Any]]) -> Dict[Any, Any]:
+    merged: Dict[Any, Any] = {}
+    for partial in partials:
+        for key, value in partial.items():
+            if isinstance(value, list):
+                total = merged.setdefault(key, [0] * len(value))
+                for i, item in enumerate(value):
+                    total[i] += item
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+def parts_by_status_totals(
     db: Session,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
     tipo_pieza: Optional[str] = None,
-) -> Dict[str, Any]:
-    query = db.query(Part)
+) -> Dict[PartStatus, int]:
+    stmt = lambda_stmt(
+        lambda: select(Part.status.label("status"), func.count(Part.id).label("count"))
+    )
 
-    start_dt, end_dt = _date_range_to_datetimes(from_date, to_date)
-    if start_dt:
-        query = query.filter(Part.fecha_creacion >= start_dt)
-    if end_dt:
-        query = query.filter(Part.fecha_creacion <= end_dt)
+    start_ms, end_ms = _date_range_to_ms(from_date, to_date)
+    if start_ms is not None:
+        stmt += lambda s: s.where(Part.fecha_creacion_ms >= start_ms)
+    if end_ms is not None:
+        stmt += lambda s: s.where(Part.fecha_creacion_ms <= end_ms)
 
     if tipo_pieza:
-        query = query.filter(Part.tipo_pieza == tipo_pieza)
-    agg = (
-        db.query(Part.status, func.count(Part.id))
-        .select_from(query.subquery())  
-        .group_by(Part.status)
-        .all()
+        stmt += lambda s: s.where(Part.tipo_pieza == tipo_pieza)
+
+    stmt += lambda s: s.group_by(Part.status)
+    return dict(db.execute(stmt).all())
+
+def get_parts_by_status(
+    db: Session,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    tipo_pieza: Optional[str] = None,
+    partials: Optional[List[Dict[PartStatus, int]]] = None,
+) -> List[tuple]:
+    if partials is None:
+        partials = [parts_by_status_totals(db, from_date, to_date, tipo_pieza)]
+    counts = _merge_counts(partials)
+    return sorted(counts.items(), key=lambda item: item[0].name)
+
+def throughput_totals(
+    db: Session,
+    from_date: date,
+    to_date: date,
+    tipo_pieza: Optional[str] = None,
+) -> Dict[str, int]:
+    start_ms, end_ms = _date_range_to_ms(from_date, to_date)
+
+    # día como entero (división entera de los milisegundos), sin parsear texto
+    stmt = lambda_stmt(
+        lambda: select(
+            (Part.fecha_creacion_ms // MS_PER_DAY).label("day"),
+            func.count(Part.id).label("count"),
+        ).where(Part.fecha_creacion_ms >= start_ms, Part.fecha_creacion_ms <= end_ms)
     )
 
-    counts = [
-        {"status": status.value if isinstance(status, PartStatus) else str(status), "count": count}
-        for status, count in agg
-    ]
+    if tipo_pieza:
+        stmt += lambda s: s.where(Part.tipo_pieza == tipo_pieza)
 
+    stmt += lambda s: s.group_by(s.selected_columns.day)
     return {
-        "from_date": from_date.isoformat() if from_date else None,
-        "to_date": to_date.isoformat() if to_date else None,
-        "tipo_pieza": tipo_pieza,
-        "counts": counts,
+        ms_to_datetime(number * MS_PER_DAY).date().isoformat(): count
+        for number, count in db.execute(stmt).all()
     }
 
 def get_throughput(
@@ -53,121 +110,130 @@ def get_throughput(
     from_date: date,
     to_date: date,
     tipo_pieza: Optional[str] = None,
-) -> Dict[str, Any]:
-    start_dt, end_dt = _date_range_to_datetimes(from_date, to_date)
-
-    query = db.query(Part).filter(
-        Part.fecha_creacion >= start_dt,
-        Part.fecha_creacion <= end_dt,
-    )
+    partials: Optional[List[Dict[str, int]]] = None,
+) -> List[tuple]:
+    if partials is None:
+        partials = [throughput_totals(db, from_date, to_date, tipo_pieza)]
+    return sorted(_merge_counts(partials).items())
+
+def _with_station_names(db: Session, rows) -> List[tuple]:
+    # los nombres salen del registro en memoria; se conserva la semántica del
+    # join anterior: filas de estaciones que ya no existen no se reportan
+    names = station_registry.names(db)
+    return [
+        (r[0], names[r[0]], *r[1:])
+        for r in rows
+        if r[0] in names
+    ]
 
-    if tipo_pieza:
-        query = query.filter(Part.tipo_pieza == tipo_pieza)
-    agg = (
-        db.query(
-            func.date(Part.fecha_creacion).label("day"),
-            func.count(Part.id).label("count"),
-        )
-        .select_from(query.subquery())
-        .group_by("day")
-        .order_by("day")
-        .all()
-    )
+def _filter_events_range(stmt, events, from_ts: Optional[datetime], to_ts: Optional[datetime]):
+    if from_ts is not None:
+        from_ms = epoch_ms(from_ts)
+        stmt += lambda s: s.where(events.timestamp_entrada_ms >= from_ms)
 
-    throughput_per_day = [
-        {"date": day.isoformat(), "count": count} for day, count in agg
-    ]
+    if to_ts is not None:
+        to_ms = epoch_ms(to_ts)
+        stmt += lambda s: s.where(events.timestamp_salida_ms <= to_ms)
 
-    return {
-        "from": from_date.isoformat(),
-        "to": to_date.isoformat(),
-        "tipo_pieza": tipo_pieza,
-        "throughput_per_day": throughput_per_day,
-    }
+    return stmt
 
-def get_station_cycle_time(
+def station_cycle_totals(
     db: Session,
     from_ts: Optional[datetime],
     to_ts: Optional[datetime],
     tipo_pieza: Optional[str],
-):
-    avg_cycle = func.avg(
-        (func.julianday(TraceEvent.timestamp_salida) - func.julianday(TraceEvent.timestamp_entrada)) * 86400.0
-    ).label("avg_cycle_time_seconds")
-
-    query = (
-        db.query(
-            Station.id.label("station_id"),
-            Station.nombre.label("station_name"),
-            avg_cycle,
+) -> Dict[int, List[float]]:
+    events = trace_events_source(db, from_ts, to_ts)
+    # suma y conteo (no avg) para poder sumarles los agregados archivados
+    stmt = lambda_stmt(
+        lambda: select(
+            events.station_id,
+            func.sum(events.timestamp_salida_ms - events.timestamp_entrada_ms),
+            func.count(events.id),
         )
-        .join(TraceEvent, TraceEvent.station_id == Station.id)
-        .join(Part, Part.id == TraceEvent.part_id)
     )
-
-    if from_ts is not None:
-        query = query.filter(TraceEvent.timestamp_entrada >= from_ts)
-
-    if to_ts is not None:
-        query = query.filter(TraceEvent.timestamp_salida <= to_ts)
+    stmt = _filter_events_range(stmt, events, from_ts, to_ts)
 
     if tipo_pieza is not None:
-        query = query.filter(Part.tipo_pieza == tipo_pieza)
+        stmt += lambda s: s.join(Part, Part.id == events.part_id).where(
+            Part.tipo_pieza == tipo_pieza
+        )
 
-    query = query.group_by(Station.id, Station.nombre)
+    stmt += lambda s: s.group_by(events.station_id)
 
-    rows = query.all()
+    totals: Dict[int, List[float]] = {}
+    for station_id, milliseconds, count in db.execute(stmt).all():
+        totals[station_id] = [(milliseconds or 0) / 1000.0, count]
+    for r in get_rollup_totals(db, from_ts, to_ts, tipo_pieza=tipo_pieza):
+        total = totals.setdefault(r.station_id, [0.0, 0])
+        total[0] += r.segundos_ciclo
+        total[1] += r.eventos
+    return totals
 
-    return [
-        {
-            "station_id": r.station_id,
-            "station_name": r.station_name,
-            "avg_cycle_time_seconds": r.avg_cycle_time_seconds or 0.0,
-        }
-        for r in rows
+def get_station_cycle_time(
+    db: Session,
+    from_ts: Optional[datetime],
+    to_ts: Optional[datetime],
+    tipo_pieza: Optional[str],
+    partials: Optional[List[Dict[int, List[float]]]] = None,
+) -> List[tuple]:
+    if partials is None:
+        partials = [station_cycle_totals(db, from_ts, to_ts, tipo_pieza)]
+    rows = [
+        (station_id, seconds / count if count else 0.0)
+        for station_id, (seconds, count) in sorted(_merge_counts(partials).items())
     ]
+    return _with_station_names(db, rows)
 
-def get_overview(db: Session) -> Dict[str, Any]:
-    today = datetime.utcnow().date()
+def overview_totals(db: Session, today: date) -> Dict[str, int]:
     start_today = datetime.combine(today, time.min)
     end_today = datetime.combine(today, time.max)
+    start_ms, end_ms = _date_range_to_ms(today, today)
 
-    total_parts = db.query(func.count(Part.id)).scalar() or 0
+    total_parts = db.execute(lambda_stmt(lambda: select(func.count(Part.id)))).scalar() or 0
     in_process = (
-        db.query(func.count(Part.id))
-        .filter(Part.status == PartStatus.IN_PROCESS)
-        .scalar()
+        db.execute(
+            lambda_stmt(
+                lambda: select(func.count(Part.id)).where(Part.status == PartStatus.IN_PROCESS)
+            )
+        ).scalar()
         or 0
     )
     completed = (
-        db.query(func.count(Part.id))
-        .filter(Part.status == PartStatus.COMPLETED)
-        .scalar()
+        db.execute(
+            lambda_stmt(
+                lambda: select(func.count(Part.id)).where(Part.status == PartStatus.COMPLETED)
+            )
+        ).scalar()
         or 0
     )
     completed_today = (
-        db.query(func.count(Part.id))
-        .filter(
-            Part.fecha_creacion >= start_today,
-            Part.fecha_creacion <= end_today,
-            Part.status == PartStatus.COMPLETED,
-        )
-        .scalar()
+        db.execute(
+            lambda_stmt(
+                lambda: select(func.count(Part.id)).where(
+                    Part.fecha_creacion_ms >= start_ms,
+                    Part.fecha_creacion_ms <= end_ms,
+                    Part.status == PartStatus.COMPLETED,
+                )
+            )
+        ).scalar()
         or 0
     )
+    events = trace_events_source(db, start_today, end_today)
     scrap_today = (
-        db.query(func.count(TraceEvent.id))
-        .filter(
-            TraceEvent.resultado == TraceResult.SCRAP,
-            TraceEvent.timestamp_entrada >= start_today,
-            TraceEvent.timestamp_entrada <= end_today,
-        )
-        .scalar()
+        db.execute(
+            lambda_stmt(
+                lambda: select(func.count(events.id)).where(
+                    events.resultado == TraceResult.SCRAP,
+                    events.timestamp_entrada_ms >= start_ms,
+                    events.timestamp_entrada_ms <= end_ms,
+                )
+            )
+        ).scalar()
         or 0
     )
 
     return {
-        "date": today.isoformat(),
         "total_parts": total_parts,
         "in_process": in_process,
         "completed": completed,
@@ -175,97 +241,94 @@ def get_overview(db: Session) -> Dict[str, Any]:
         "scrap_today": scrap_today,
     }
 
-def get_scrap_rate(
+def get_overview(
+    db: Session, partials: Optional[List[Dict[str, int]]] = None, today: Optional[date] = None
+) -> Dict[str, Any]:
+    today = today or datetime.utcnow().date()
+    if partials is None:
+        partials = [overview_totals(db, today)]
+    return {"date": today.isoformat(), **_merge_counts(partials)}
+
+def scrap_totals(
     db: Session,
     from_ts: Optional[datetime],
     to_ts: Optional[datetime],
     station_id: Optional[int],
     tipo_pieza: Optional[str],
-):
-    total = func.count(TraceEvent.id).label("total")
-    scrap = func.sum(
-        case(
-            (TraceEvent.resultado == TraceResult.SCRAP, 1),
-            else_=0,
-        )
-    ).label("scrap_count")
-
-    query = (
-        db.query(
-            Part.tipo_pieza.label("tipo_pieza"),
-            Station.id.label("station_id"),
-            Station.nombre.label("station_name"),
-            total,
-            scrap,
-        )
-        .join(TraceEvent, TraceEvent.part_id == Part.id)
-        .join(Station, TraceEvent.station_id == Station.id)
+) -> Dict[Tuple[str, int], List[int]]:
+    events = trace_events_source(db, from_ts, to_ts)
+    stmt = lambda_stmt(
+        lambda: select(
+            events.station_id,
+            Part.tipo_pieza,
+            func.count(events.id).label("total"),
+            func.coalesce(
+                func.sum(case((events.resultado == TraceResult.SCRAP, 1), else_=0)), 0
+            ).label("scrap"),
+        ).join(Part, events.part_id == Part.id)
     )
-
-    if from_ts is not None:
-        query = query.filter(TraceEvent.timestamp_entrada >= from_ts)
-
-    if to_ts is not None:
-        query = query.filter(TraceEvent.timestamp_salida <= to_ts)
+    stmt = _filter_events_range(stmt, events, from_ts, to_ts)
 
     if station_id is not None:
-        query = query.filter(Station.id == station_id)
+        stmt += lambda s: s.where(events.station_id == station_id)
 
     if tipo_pieza is not None:
-        query = query.filter(Part.tipo_pieza == tipo_pieza)
-
-    query = query.group_by(Part.tipo_pieza, Station.id, Station.nombre)
-
-    rows = query.all()
-
-    resultado = []
-    for r in rows:
-        total_val = r.total or 0
-        scrap_val = r.scrap_count or 0
-        rate = float(scrap_val) / total_val if total_val else 0.0
-
-        resultado.append(
-            {
-                "tipo_pieza": r.tipo_pieza,
-                "station_id": r.station_id,
-                "station_name": r.station_name,
-                "total": total_val,
-                "scrap": scrap_val,
-                "scrap_rate": rate,
-            }
-        )
+        stmt += lambda s: s.where(Part.tipo_pieza == tipo_pieza)
 
-    return resultado
+    stmt += lambda s: s.group_by(Part.tipo_pieza, events.station_id)
+    totals = {(r[1], r[0]): [r[2], r[3]] for r in db.execute(stmt).all()}
 
-def get_station_load(
+    for r in get_rollup_totals(db, from_ts, to_ts, station_id, tipo_pieza):
+        total = totals.setdefault((r.tipo_pieza, r.station_id), [0, 0])
+        total[0] += r.eventos
+        total[1] += r.scrap
+    return totals
+
+def get_scrap_rate(
     db: Session,
     from_ts: Optional[datetime],
     to_ts: Optional[datetime],
-):
-    query = (
-        db.query(
-            Station.id.label("station_id"),
-            Station.nombre.label("station_name"),
-            func.count(TraceEvent.id).label("events_count"),
-        )
-        .join(TraceEvent, TraceEvent.station_id == Station.id)
-    )
+    station_id: Optional[int],
+    tipo_pieza: Optional[str],
+    partials: Optional[List[Dict[Tuple[str, int], List[int]]]] = None,
+) -> List[tuple]:
+    if partials is None:
+        partials = [scrap_totals(db, from_ts, to_ts, station_id, tipo_pieza)]
+    rows = [
+        (station, tipo, total, scrap, scrap * 1.0 / total)
+        for (tipo, station), (total, scrap) in sorted(_merge_counts(partials).items())
+    ]
 
-    if from_ts is not None:
-        query = query.filter(TraceEvent.timestamp_entrada >= from_ts)
+    # (station_id, station_name, tipo_pieza, ...) -> orden de columnas de la API
+    return [
+        (tipo, station_id, name, total, scrap, rate)
+        for station_id, name, tipo, total, scrap, rate in _with_station_names(db, rows)
+    ]
 
-    if to_ts is not None:
-        query = query.filter(TraceEvent.timestamp_salida <= to_ts)
+def station_load_totals(
+    db: Session,
+    from_ts: Optional[datetime],
+    to_ts: Optional[datetime],
+) -> Dict[int, int]:
+    events = trace_events_source(db, from_ts, to_ts)
+    stmt = lambda_stmt(
+        lambda: select(events.station_id, func.count(events.id).label("events_count"))
+    )
+    stmt = _filter_events_range(stmt, events, from_ts, to_ts)
 
-    query = query.group_by(Station.id, Station.nombre)
+    stmt += lambda s: s.group_by(events.station_id)
+    counts = dict(db.execute(stmt).all())
 
-    rows = query.all()
+    for r in get_rollup_totals(db, from_ts, to_ts):
+        counts[r.station_id] = counts.get(r.station_id, 0) + r.eventos
+    return counts
 
-    return [
-        {
-            "station_id": r.station_id,
-            "station_name": r.station_name,
-            "events_count": r.events_count or 0,
-        }
-        for r in rows
-    ]
+def get_station_load(
+    db: Session,
+    from_ts: Optional[datetime],
+    to_ts: Optional[datetime],
+    partials: Optional[List[Dict[int, int]]] = None,
+) -> List[tuple]:
+    if partials is None:
+        partials = [station_load_totals(db, from_ts, to_ts)]
+    return _with_station_names(db, sorted(_merge_counts(partials).items()))
@@ -1,24 +1,29 @@
 from datetime import date, datetime, time
 from typing import List, Optional
+from sqlalchemy import Row, lambda_stmt, or_, select, text
 from sqlalchemy.orm import Session
-from app.models.models import Part, PartStatus, TraceEvent
+from app.core.projection import select_fields
+from app.models.models import Part, PartStatus, TraceEvent, epoch_ms
 from app.schemas.schemas import PartCreate, PartUpdate
+from app.services.archive_service import get_archived_history
+from app.services.partition_service import trace_events_source
 
 def get_part(db: Session, part_id: str) -> Optional[Part]:
-    return db.query(Part).filter(Part.id == part_id).first()
+    # lambda_stmt: la sentencia se arma y compila una vez; part_id va como parámetro
+    return db.execute(lambda_stmt(lambda: select(Part).where(Part.id == part_id))).scalar()
 
-def list_parts(
-    db: Session,
-    status_filter: Optional[PartStatus] = None,
-    tipo_pieza: Optional[str] = None,
-    lote: Optional[str] = None,
-    from_date: Optional[date] = None,
-    to_date: Optional[date] = None,
-    skip: int = 0,
-    limit: int = 100,
-) -> List[Part]:
-    query = db.query(Part)
+def get_part_version(db: Session, part_id: str) -> Optional[int]:
+    # una sola lectura por la PK, sin cargar la entidad
+    return db.execute(select(Part.version).where(Part.id == part_id)).scalar()
 
+def _filter_parts(
+    query,
+    status_filter: Optional[PartStatus],
+    tipo_pieza: Optional[str],
+    lote: Optional[str],
+    from_date: Optional[date],
+    to_date: Optional[date],
+):
     if status_filter is not None:
         query = query.filter(Part.status == status_filter)
 
@@ -30,14 +35,119 @@ def list_parts(
 
     if from_date:
         start_dt = datetime.combine(from_date, time.min)
-        query = query.filter(Part.fecha_creacion >= start_dt)
+        query = query.filter(Part.fecha_creacion_ms >= epoch_ms(start_dt))
 
     if to_date:
         end_dt = datetime.combine(to_date, time.max)
-        query = query.filter(Part.fecha_creacion <= end_dt)
+        query = query.filter(Part.fecha_creacion_ms <= epoch_ms(end_dt))
+
+    return query
+
+def list_parts(
+    db: Session,
+    status_filter: Optional[PartStatus] = None,
+    tipo_pieza: Optional[str] = None,
+    lote: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[Part]:
+    query = _filter_parts(
+        db.query(Part), status_filter, tipo_pieza, lote, from_date, to_date
+    )
 
     return query.offset(skip).limit(limit).all()
 
+def list_parts_fields(
+    db: Session,
+    fields: List[str],
+    status_filter: Optional[PartStatus] = None,
+    tipo_pieza: Optional[str] = None,
+    lote: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[Row]:
+    stmt = _filter_parts(
+        select_fields(Part, fields), status_filter, tipo_pieza, lote, from_date, to_date
+    )
+
+    return db.execute(stmt.offset(skip).limit(limit)).all()
+
+# el tokenizer trigram necesita al menos 3 caracteres para usar el indice
+FTS_MIN_QUERY_LENGTH = 3
+
+def _fts_phrase(q: str) -> str:
+    return '"' + q.replace('"', '""') + '"'
+
+def _search_parts_by_prefix_range(db: Session, q: str, limit: int) -> List[Part]:
+    # rango [q, q + U+10FFFF) con COLLATE NOCASE sobre los indices
+    # ix_parts_id_nocase / ix_parts_lote_nocase; no distingue mayusculas,
+    # igual que la busqueda por subcadena del indice trigram
+    upper = q + "\U0010ffff"
+    part_id = Part.id.collate("NOCASE")
+    lote = Part.lote.collate("NOCASE")
+    by_id = (
+        db.query(Part)
+        .filter(part_id >= q, part_id < upper)
+        .order_by(part_id)
+        .limit(limit)
+        .all()
+    )
+    by_lote = (
+        db.query(Part)
+        .filter(lote >= q, lote < upper)
+        .order_by(lote, Part.id)
+        .limit(limit)
+        .all()
+    )
+    merged = {p.id: p for p in by_id + by_lote}
+    return sorted(merged.values(), key=lambda p: p.id)[:limit]
+
+def search_parts(
+    db: Session,
+    q: str,
+    mode: str = "substring",
+    limit: int = 20,
+) -> List[Part]:
+    q = q.strip()
+    if not q:
+        return []
+
+    if mode == "prefix" and db.get_bind().dialect.name == "sqlite":
+        return _search_parts_by_prefix_range(db, q, limit)
+
+    if db.get_bind().dialect.name != "sqlite" or len(q) < FTS_MIN_QUERY_LENGTH:
+        pattern = f"{q}%" if mode == "prefix" else f"%{q}%"
+        return (
+            db.query(Part)
+            .filter(or_(Part.id.ilike(pattern), Part.lote.ilike(pattern)))
+            .order_by(Part.id)
+            .limit(limit)
+            .all()
+        )
+
+    match = "{id lote} : " + _fts_phrase(q)
+
+    # sin ORDER BY rank: FTS5 entrega en orden de rowid y el LIMIT corta el
+    # recorrido temprano, aun cuando el termino coincide con millones de seriales
+    found = (
+        db.query(Part)
+        .from_statement(
+            text(
+                "SELECT parts.* FROM parts_fts "
+                "JOIN parts ON parts.rowid = parts_fts.rowid "
+                "WHERE parts_fts MATCH :match LIMIT :limit"
+            )
+        )
+        .params(match=match, limit=limit)
+        .all()
+    )
+
+    return sorted(found, key=lambda p: p.id)
+
 def create_part(db: Session, data: PartCreate) -> Part:
     part = Part(
         id=data.id,
@@ -61,10 +171,34 @@ def update_part(db: Session, part: Part, data: PartUpdate) -> Part:
     db.refresh(part)
     return part
 
+def get_part_history_fields(db: Session, part_id: str, fields: List[str]) -> List[tuple]:
+    events = trace_events_source(db)
+    stmt = (
+        select_fields(events, fields)
+        .where(events.part_id == part_id)
+        .order_by(events.timestamp_entrada.asc())
+    )
+    archived = get_archived_history(db, part_id)
+    if not archived:
+        return db.execute(stmt).all()
+
+    # piezas viejas: se mezclan las filas archivadas con las de la base
+    rows = db.execute(stmt.add_columns(events.timestamp_entrada.label("_entrada"))).all()
+    merged = [(e["timestamp_entrada"], tuple(e[f] for f in fields)) for e in archived]
+    merged += [(row[-1], tuple(row[:-1])) for row in rows]
+    merged.sort(key=lambda item: item[0])
+    return [row for _, row in merged]
+
 def get_part_history(db: Session, part_id: str) -> List[TraceEvent]:
-    return (
-        db.query(TraceEvent)
-        .filter(TraceEvent.part_id == part_id)
-        .order_by(TraceEvent.timestamp_entrada.asc())
+    events = trace_events_source(db)
+    history = (
+        db.query(events)
+        .filter(events.part_id == part_id)
+        .order_by(events.timestamp_entrada.asc())
         .all()
     )
+    # los archivados se devuelven como objetos sueltos (fuera de la sesión)
+    archived = [TraceEvent(**e) for e in get_archived_history(db, part_id)]
+    if not archived:
+        return history
+    return sorted(archived + history, key=lambda e: e.timestamp_entrada)
@@ -0,0 +1,398 @@
+import os
+import re
+from urllib.parse import quote
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import (
+    Column,
+    MetaData,
+    Table,
+    create_engine,
+    delete,
+    exc,
+    func,
+    insert,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.orm import Session, aliased
+from app.core.config import settings
+from app.core.table_cache import TableCache
+from app.models.models import TRACE_EVENTS_FTS_DDL, TraceEvent, TracePartition, epoch_ms
+
+#------------------------------------------------------------------------------------------
+# Particiones mensuales de trace_events
+#
+# La tabla trace_events de la base principal es la partición "caliente": ahí
+# escribe siempre la ingesta. Un mes cerrado se mueve a su propio archivo
+# (create_partition) y sus índices dejan de crecer con la tabla caliente.
+# Las lecturas usan trace_events_source(): sin particiones que se solapen con
+# el rango pedido es el modelo TraceEvent tal cual; si no, un alias del ORM
+# sobre UNION ALL de la tabla caliente y esas particiones, que se adjuntan a la
+# conexión (ATTACH) solo cuando hacen falta.
+
+MONTH_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+# límite de SQLite (SQLITE_MAX_ATTACHED): bases adjuntas por conexión. El
+# historial de una pieza y la búsqueda por id unen todas las particiones en una
+# sola consulta, así que también es el tope de particiones registradas; el
+# default de TRACE_ARCHIVE_AFTER_DAYS está alineado con él
+MAX_ATTACHED = 10
+
+
+class PartitionInfo(NamedTuple):
+    mes: str
+    schema: str
+    path: str
+    desde: datetime
+    hasta: datetime
+    min_id: Optional[int]
+    max_id: Optional[int]
+
+
+def month_bounds(mes: str) -> Tuple[datetime, datetime]:
+    if not MONTH_PATTERN.match(mes):
+        raise ValueError("INVALID_MONTH")
+    year, month = int(mes[:4]), int(mes[5:])
+    desde = datetime(year, month, 1)
+    hasta = datetime(year + month // 12, month % 12 + 1, 1)
+    return desde, hasta
+
+
+def partition_schema(mes: str) -> str:
+    return "p_" + mes.replace("-", "_")
+
+
+def partition_file(mes: str) -> str:
+    return f"trace_events_{mes.replace('-', '_')}.db"
+
+
+def partition_path(archivo: str) -> str:
+    return os.path.join(settings.TRACE_PARTITION_DIR, archivo)
+
+
+@lru_cache(maxsize=None)
+def partition_table(schema: Optional[str]) -> Table:
+    # mismas columnas e índices que trace_events, sin llaves foráneas (SQLite no
+    # las admite entre bases adjuntas)
+    source = TraceEvent.__table__
+    return Table(
+        source.name,
+        MetaData(),
+        *[
+            Column(
+                c.name,
+                c.type,
+                primary_key=c.primary_key,
+                nullable=c.nullable,
+                index=c.index,
+            )
+            for c in source.columns
+        ],
+        schema=schema,
+    )
+
+
+class PartitionRegistry(TableCache):
+    table_name = TracePartition.__tablename__
+
+    def _load(self, db: Session) -> List[PartitionInfo]:
+        rows = db.execute(
+            select(
+                TracePartition.mes,
+                TracePartition.archivo,
+                TracePartition.desde,
+                TracePartition.hasta,
+                TracePartition.min_id,
+                TracePartition.max_id,
+            ).order_by(TracePartition.desde)
+        ).all()
+        return [
+            PartitionInfo(
+                row.mes,
+                partition_schema(row.mes),
+                partition_path(row.archivo),
+                row.desde,
+                row.hasta,
+                row.min_id,
+                row.max_id,
+            )
+            for row in rows
+        ]
+
+    def overlapping(
+        self,
+        db: Session,
+        from_ts: Optional[datetime],
+        to_ts: Optional[datetime],
+        force_check: bool = False,
+    ) -> List[PartitionInfo]:
+        # from_ts filtra timestamp_entrada y to_ts timestamp_salida (>= entrada),
+        # así que un mes queda fuera si termina antes de from_ts o empieza después de to_ts
+        from_ts, to_ts = _wall_time(from_ts), _wall_time(to_ts)
+        return [
+            p
+            for p in self.get(db, force_check)
+            if (from_ts is None or p.hasta > from_ts) and (to_ts is None or p.desde <= to_ts)
+        ]
+
+    def containing_id(
+        self, db: Session, event_id: int, force_check: bool = False
+    ) -> List[PartitionInfo]:
+        return [
+            p
+            for p in self.get(db, force_check)
+            if p.min_id is not None and p.min_id <= event_id <= p.max_id
+        ]
+
+
+partition_registry = PartitionRegistry(settings.TRACE_PARTITION_CACHE_CHECK_SECONDS)
+
+
+def _wall_time(value: Optional[datetime]) -> Optional[datetime]:
+    # igual que los filtros de filas (epoch_ms): se descarta la zona sin
+    # convertir; si la poda convirtiera, particionar un mes cambiaría resultados
+    if value is None:
+        return value
+    return value.replace(tzinfo=None)
+
+#------------------------------------------------------------------------------------------
+# Lectura
+
+def attach_partitions(db: Session, partitions: List[PartitionInfo]) -> None:
+    """Adjunta a la conexión de la sesión las particiones que le falten."""
+    if not partitions:
+        return
+    connection = db.connection()
+    attached: Dict[str, str] = connection.connection.info.setdefault("trace_partitions", {})
+    needed = {p.schema for p in partitions}
+
+    for partition in partitions:
+        if attached.get(partition.schema) == partition.path:
+            continue
+        if partition.schema in attached:
+            connection.exec_driver_sql(f"DETACH DATABASE {partition.schema}")
+            del attached[partition.schema]
+        # se sueltan las que esta consulta no usa antes de llegar al límite
+        for schema in [s for s in attached if s not in needed]:
+            if len(attached) < MAX_ATTACHED:
+                break
+            connection.exec_driver_sql(f"DETACH DATABASE {schema}")
+            del attached[schema]
+        # mode=rw: ATTACH de una ruta que no existe la crearía vacía (p. ej. un
+        # mes recién archivado que este worker aún tiene en su registro)
+        uri = f"file:{quote(os.path.abspath(partition.path))}?mode=rw"
+        try:
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {partition.schema}", (uri,))
+        except exc.OperationalError:
+            if os.path.exists(partition.path):
+                raise
+            raise ValueError("PARTITION_FILE_NOT_FOUND") from None
+        attached[partition.schema] = partition.path
+
+
+def _attach_current(
+    db: Session, partitions_for: Callable[[bool], List[PartitionInfo]]
+) -> List[PartitionInfo]:
+    # si falta un archivo el registro de este worker está atrasado (la
+    # partición se archivó o se quitó): se relee table_versions y se reintenta
+    partitions = partitions_for(False)
+    try:
+        attach_partitions(db, partitions)
+    except ValueError as error:
+        if str(error) != "PARTITION_FILE_NOT_FOUND":
+            raise
+        partitions = partitions_for(True)
+        attach_partitions(db, partitions)
+    return partitions
+
+
+def _union_source(partitions: List[PartitionInfo]):
+    # la primera rama es la tabla del modelo: así el alias mapea sus columnas
+    tables = [TraceEvent.__table__] + [partition_table(p.schema) for p in partitions]
+    return aliased(
+        TraceEvent,
+        union_all(*[select(*t.c) for t in tables]).subquery("trace_events_all"),
+        name="trace_events_all",
+    )
+
+
+def trace_events_source(
+    db: Session,
+    from_ts: Optional[datetime] = None,
+    to_ts: Optional[datetime] = None,
+):
+    """
+    Entidad a consultar en lugar de TraceEvent para un rango de fechas: el
+    modelo mismo si ninguna partición se solapa con el rango, o un alias sobre
+    UNION ALL de la tabla caliente y las particiones que sí (SQLite empuja los
+    filtros a cada rama y usa sus índices).
+    """
+    partitions = _attach_current(
+        db, lambda force: partition_registry.overlapping(db, from_ts, to_ts, force)
+    )
+    if not partitions:
+        return TraceEvent
+    return _union_source(partitions)
+
+
+def trace_events_source_for_id(db: Session, event_id: int):
+    partitions = _attach_current(
+        db, lambda force: partition_registry.containing_id(db, event_id, force)
+    )
+    if not partitions:
+        return TraceEvent
+    return _union_source(partitions)
+
+
+def search_sources(
+    db: Session, from_ts: Optional[datetime], to_ts: Optional[datetime]
+) -> List[Table]:
+    # la búsqueda FTS necesita la tabla de cada partición (cada una con su índice)
+    partitions = _attach_current(
+        db, lambda force: partition_registry.overlapping(db, from_ts, to_ts, force)
+    )
+    return [TraceEvent.__table__] + [partition_table(p.schema) for p in partitions]
+
+#------------------------------------------------------------------------------------------
+# Administración (app/manage.py)
+
+def list_partitions(db: Session) -> List[TracePartition]:
+    return db.query(TracePartition).order_by(TracePartition.desde).all()
+
+
+def _check_capacity(db: Session) -> None:
+    if db.query(func.count(TracePartition.mes)).scalar() >= MAX_ATTACHED:
+        raise ValueError("TOO_MANY_PARTITIONS")
+
+
+def _create_partition_file(path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        table = partition_table(None)
+        table.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for statement in TRACE_EVENTS_FTS_DDL:
+                conn.execute(text(statement))
+    finally:
+        engine.dispose()
+
+
+def _has_autoincrement(db: Session) -> bool:
+    sql = db.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'trace_events'")
+    ).scalar()
+    return "AUTOINCREMENT" in (sql or "").upper()
+
+
+def create_partition(db: Session, mes: str) -> TracePartition:
+    """
+    Crea el archivo del mes y mueve ahí sus eventos desde la tabla caliente
+    (por timestamp_entrada), en una sola transacción.
+    """
+    desde, hasta = month_bounds(mes)
+    if db.get(TracePartition, mes) is not None:
+        raise ValueError("PARTITION_EXISTS")
+    _check_capacity(db)
+
+    archivo = partition_file(mes)
+    path = partition_path(archivo)
+    if os.path.exists(path):
+        raise ValueError("PARTITION_FILE_EXISTS")
+    _create_partition_file(path)
+
+    info = PartitionInfo(mes, partition_schema(mes), path, desde, hasta, None, None)
+    attach_partitions(db, [info])
+    connection = db.connection()
+
+    events = TraceEvent.__table__
+    target = partition_table(info.schema)
+    in_month = (events.c.timestamp_entrada_ms >= epoch_ms(desde)) & (
+        events.c.timestamp_entrada_ms < epoch_ms(hasta)
+    )
+    try:
+        db.execute(
+            insert(target).from_select(
+                [c.name for c in events.c], select(*events.c).where(in_month)
+            )
+        )
+        filas, min_id, max_id = db.execute(
+            select(func.count(), func.min(target.c.id), func.max(target.c.id))
+        ).one()
+        db.execute(delete(events).where(in_month))
+
+        # sin AUTOINCREMENT SQLite reutilizaría ids que ya están en la partición
+        if max_id is not None and not _has_autoincrement(db):
+            remaining = db.execute(select(func.max(events.c.id))).scalar()
+            if remaining is None or remaining < max_id:
+                raise ValueError("ID_REUSE")
+
+        db.execute(
+            text(f"INSERT INTO {info.schema}.trace_events_fts(trace_events_fts) VALUES ('rebuild')")
+        )
+        partition = TracePartition(
+            mes=mes,
+            archivo=archivo,
+            desde=desde,
+            hasta=hasta,
+            filas=filas,
+            min_id=min_id,
+            max_id=max_id,
+        )
+        db.add(partition)
+        db.commit()
+    except Exception:
+        # la conexión tiene adjunto el archivo que se va a borrar: se descarta
+        connection.invalidate()
+        db.rollback()
+        os.remove(path)
+        raise
+    db.refresh(partition)
+    return partition
+
+
+def attach_partition(db: Session, mes: str) -> TracePartition:
+    """Vuelve a registrar un archivo de partición existente (p. ej. restaurado)."""
+    desde, hasta = month_bounds(mes)
+    if db.get(TracePartition, mes) is not None:
+        raise ValueError("PARTITION_EXISTS")
+    _check_capacity(db)
+
+    archivo = partition_file(mes)
+    path = partition_path(archivo)
+    if not os.path.exists(path):
+        raise ValueError("PARTITION_FILE_NOT_FOUND")
+
+    info = PartitionInfo(mes, partition_schema(mes), path, desde, hasta, None, None)
+    attach_partitions(db, [info])
+    target = partition_table(info.schema)
+    filas, min_id, max_id = db.execute(
+        select(func.count(), func.min(target.c.id), func.max(target.c.id))
+    ).one()
+
+    partition = TracePartition(
+        mes=mes,
+        archivo=archivo,
+        desde=desde,
+        hasta=hasta,
+        filas=filas,
+        min_id=min_id,
+        max_id=max_id,
+    )
+    db.add(partition)
+    db.commit()
+    db.refresh(partition)
+    return partition
+
+
+def detach_partition(db: Session, mes: str) -> TracePartition:
+    """Quita la partición del registro; el archivo se queda en disco."""
+    partition = db.get(TracePartition, mes)
+    if partition is None:
+        raise ValueError("PARTITION_NOT_FOUND")
+    db.delete(partition)
+    db.commit()
+    return partition
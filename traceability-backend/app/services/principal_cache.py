@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import User, UserRole, get_table_version, on_table_change
+
+
+class Principal(NamedTuple):
+    # lo único que necesitan las dependencias de autorización
+    id: int
+    rol: UserRole
+    activo: bool
+
+
+class PrincipalCache:
+    """
+    Cache LRU con TTL de usuarios autenticados, por (user_id, jti).
+
+    Se vacía al confirmar cambios en users en este proceso; los demás workers
+    lo notan con la versión de users en table_versions, revisada como mucho
+    una vez cada `check_interval` segundos.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, check_interval: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, Optional[str]], Tuple[Principal, float]]" = OrderedDict()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        on_table_change(User.__tablename__, self.clear)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == user_id]:
+                del self._entries[key]
+
+    def _check_version(self, db: Session, db_key: str, now: float) -> None:
+        known = self._versions.get(db_key)
+        if known is not None and now - known[1] < self.check_interval:
+            return
+
+        version = get_table_version(db.connection(), User.__tablename__)
+        with self._lock:
+            if known is not None and known[0] != version:
+                for key in [k for k in self._entries if k[0] == db_key]:
+                    del self._entries[key]
+            self._versions[db_key] = (version, now)
+
+    def get(self, db: Session, user_id: int, jti: Optional[str]) -> Optional[Principal]:
+        if self.ttl <= 0:
+            return None
+
+        db_key = str(db.get_bind().url)
+        now = time.monotonic()
+        self._check_version(db, db_key, now)
+
+        key = (db_key, user_id, jti)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, db: Session, principal: Principal, jti: Optional[str]) -> None:
+        if self.ttl <= 0 or not principal.activo:
+            return
+
+        key = (str(db.get_bind().url), principal.id, jti)
+        with self._lock:
+            self._entries[key] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    check_interval=settings.PRINCIPAL_CACHE_CHECK_SECONDS,
+)
@@ -0,0 +1,125 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import RevokedToken
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _timestamp(value: datetime) -> float:
+    # con fracción de segundo: un usuario reactivado puede iniciar sesión
+    # en el mismo segundo en que se revocaron sus tokens anteriores
+    return (value - _EPOCH).total_seconds()
+
+
+class RevocationFilter:
+    """
+    Copia en memoria de revoked_tokens para comprobar cada token sin ir a la BD.
+
+    - jtis revocados: jti -> exp (se olvidan cuando el token ya expiró).
+    - cortes por usuario: user_id -> instante; se rechaza todo token de ese
+      usuario emitido (iat) hasta ese instante.
+
+    Las revocaciones de este proceso se aplican al momento; las de otros
+    workers se leen de forma incremental (id > último visto), como mucho una
+    vez cada `check_interval` segundos.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._jtis: Dict[str, float] = {}
+        self._cutoffs: Dict[int, float] = {}
+        self._last_id = 0
+        self._checked_at: Optional[float] = None
+
+    def _apply(self, jti: Optional[str], user_id: Optional[int], revocado_en: datetime, expira_en: datetime) -> None:
+        if jti is not None:
+            self._jtis[jti] = _timestamp(expira_en)
+        if user_id is not None:
+            cutoff = _timestamp(revocado_en)
+            if cutoff > self._cutoffs.get(user_id, 0):
+                self._cutoffs[user_id] = cutoff
+
+    def _prune(self) -> None:
+        now = time.time()
+        for jti in [j for j, exp in self._jtis.items() if exp < now]:
+            del self._jtis[jti]
+        oldest = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        for user_id in [u for u, cutoff in self._cutoffs.items() if cutoff < oldest]:
+            del self._cutoffs[user_id]
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+
+        rows = db.execute(
+            select(
+                RevokedToken.id,
+                RevokedToken.jti,
+                RevokedToken.user_id,
+                RevokedToken.revocado_en,
+                RevokedToken.expira_en,
+            )
+            .where(RevokedToken.id > self._last_id)
+            .order_by(RevokedToken.id)
+        ).all()
+
+        with self._lock:
+            for row in rows:
+                self._apply(row.jti, row.user_id, row.revocado_en, row.expira_en)
+                self._last_id = max(self._last_id, row.id)
+            self._prune()
+            self._checked_at = now
+
+    def is_revoked(self, payload: dict) -> bool:
+        jti = payload.get("jti")
+        if jti is not None and jti in self._jtis:
+            return True
+        try:
+            user_id = int(payload.get("sub"))
+        except (TypeError, ValueError):
+            return False
+        cutoff = self._cutoffs.get(user_id)
+        return cutoff is not None and payload.get("iat", 0) <= cutoff
+
+    def _store(
+        self,
+        db: Session,
+        jti: Optional[str],
+        user_id: Optional[int],
+        revocado_en: datetime,
+        expira_en: datetime,
+    ) -> None:
+        row = RevokedToken(jti=jti, user_id=user_id, revocado_en=revocado_en, expira_en=expira_en)
+        db.add(row)
+        # insertar antes de podar (la sesión no hace autoflush) y no podar
+        # nunca la fila nueva: revoked_tokens no usa AUTOINCREMENT y, con la
+        # tabla vacía, SQLite reutilizaría ids que los otros workers ya dieron
+        # por leídos (id > _last_id) y nunca verían esta revocación
+        db.flush()
+        # las filas que ya no afectan a ningún token vivo sobran
+        db.execute(
+            delete(RevokedToken).where(
+                RevokedToken.expira_en < revocado_en, RevokedToken.id != row.id
+            )
+        )
+        db.commit()
+        with self._lock:
+            self._apply(jti, user_id, revocado_en, expira_en)
+
+    def revoke_token(self, db: Session, jti: str, exp: float) -> None:
+        self._store(db, jti, None, datetime.utcnow(), datetime.utcfromtimestamp(exp))
+
+    def revoke_user(self, db: Session, user_id: int) -> None:
+        now = datetime.utcnow()
+        expira_en = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        self._store(db, None, user_id, now, expira_en)
+
+
+revocation_filter = RevocationFilter(settings.REVOCATION_CHECK_SECONDS)
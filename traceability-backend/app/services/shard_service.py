@@ -0,0 +1,218 @@
+import heapq
+from datetime import datetime
+from itertools import islice
+from typing import AsyncGenerator, Generator, List, Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.database import (
+    DBRunner,
+    get_db,
+    get_db_runner,
+    get_read_runner,
+    get_shard_router,
+)
+from app.core.sharding import ShardRouter
+from app.models.models import Part, PartShard, TraceEvent, TraceResult
+from app.schemas.schemas import PartCreate, TraceEventCreate
+from app.services.api_key_registry import MachineCredential
+from app.services.part_service import create_part, list_parts_fields, search_parts
+from app.services.principal_cache import Principal
+from app.services.station_registry import station_registry
+from app.services.trace_event_service import (
+    create_trace_event,
+    encode_search_cursor,
+    get_trace_event,
+    list_trace_events_fields,
+    search_trace_events,
+)
+
+#------------------------------------------------------------------------------------------
+# Modo con shards (SHARD_URLS): piezas y eventos en la base de su línea.
+# La base principal es el catálogo: estaciones (de ahí sale la línea de un
+# evento) y el directorio part_shards (la línea de cada pieza). Las lecturas
+# por pieza van a un solo shard; listados, búsquedas y métricas consultan
+# todos en paralelo y combinan.
+
+def part_linea(db: Session, part_id: str) -> Optional[str]:
+    return db.execute(select(PartShard.linea).where(PartShard.part_id == part_id)).scalar()
+
+def register_part(db: Session, part_id: str, linea: str) -> None:
+    db.add(PartShard(part_id=part_id, linea=linea))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("PART_EXISTS")
+
+def unregister_part(db: Session, part_id: str) -> None:
+    shard = db.get(PartShard, part_id)
+    if shard is not None:
+        db.delete(shard)
+        db.commit()
+
+#------------------------------------------------------------------------------------------
+# Dependencias: sesión/runner del shard de la pieza de la ruta ({part_id}).
+# Sin shards son la base principal de siempre.
+
+async def _part_runner(
+    part_id: str, db: DBRunner, shards: Optional[ShardRouter]
+) -> AsyncGenerator[DBRunner, None]:
+    if shards is None:
+        yield db
+        return
+    linea = await db.run(part_linea, part_id)
+    if linea is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pieza no encontrada",
+        )
+    shard_db = shards.session(linea)
+    try:
+        yield DBRunner(shard_db)
+    finally:
+        shard_db.close()
+
+async def get_part_runner(
+    part_id: str,
+    db: DBRunner = Depends(get_db_runner),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+) -> AsyncGenerator[DBRunner, None]:
+    async for runner in _part_runner(part_id, db, shards):
+        yield runner
+
+async def get_part_read_runner(
+    part_id: str,
+    db: DBRunner = Depends(get_read_runner),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+) -> AsyncGenerator[DBRunner, None]:
+    async for runner in _part_runner(part_id, db, shards):
+        yield runner
+
+def get_part_db(
+    part_id: str,
+    db: Session = Depends(get_db),
+    shards: Optional[ShardRouter] = Depends(get_shard_router),
+) -> Generator[Session, None, None]:
+    if shards is None:
+        yield db
+        return
+    linea = part_linea(db, part_id)
+    if linea is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pieza no encontrada",
+        )
+    shard_db = shards.session(linea)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+#------------------------------------------------------------------------------------------
+# Escrituras
+
+def create_sharded_part(db: Session, shards: ShardRouter, data: PartCreate) -> Part:
+    if data.linea is None:
+        raise ValueError("LINE_REQUIRED")
+    if data.linea not in shards.lineas:
+        raise ValueError("UNKNOWN_LINE")
+    # primero el directorio: su PK evita dos piezas con el mismo serial en
+    # líneas distintas; si falla la escritura en el shard se retira
+    register_part(db, data.id, data.linea)
+    shard_db = shards.session(data.linea)
+    try:
+        return create_part(shard_db, data)
+    except Exception:
+        unregister_part(db, data.id)
+        raise
+    finally:
+        shard_db.close()
+
+async def create_sharded_trace_event(
+    db: DBRunner,
+    shards: ShardRouter,
+    data: TraceEventCreate,
+    current_user: Optional[Principal],
+    credential: Optional[MachineCredential],
+) -> TraceEvent:
+    station = await db.run(station_registry.get_station, data.station_id)
+    if station is None:
+        raise ValueError("STATION_NOT_FOUND")
+    linea = await db.run(part_linea, data.part_id)
+    if linea is None:
+        raise ValueError("PART_NOT_FOUND")
+    # una pieza no cambia de línea: sus eventos viven en un solo shard
+    if linea != station.linea:
+        raise ValueError("PART_IN_OTHER_LINE")
+    return await shards.run(
+        linea, create_trace_event, data, current_user, credential, station=station
+    )
+
+#------------------------------------------------------------------------------------------
+# Lecturas sobre todos los shards
+
+def _page(rows, skip: int, limit: int) -> list:
+    return list(islice(rows, skip, skip + limit))
+
+def list_sharded_parts_fields(shards: ShardRouter, fields: List[str], skip: int, limit: int, **filters):
+    # cada shard entrega hasta skip + limit filas; el corte se hace al combinar
+    pages = shards.scatter(list_parts_fields, fields=fields, skip=0, limit=skip + limit, **filters)
+    return _page((row for page in pages for row in page), skip, limit)
+
+def list_sharded_trace_events_fields(
+    shards: ShardRouter, fields: List[str], skip: int, limit: int, **filters
+):
+    # la mezcla ordena por timestamp_entrada; si no se pidió se agrega y se quita al final
+    extra = "timestamp_entrada" not in fields
+    columns = fields + ["timestamp_entrada"] if extra else fields
+    position = columns.index("timestamp_entrada")
+    pages = shards.scatter(
+        list_trace_events_fields, fields=columns, skip=0, limit=skip + limit, **filters
+    )
+    rows = _page(heapq.merge(*pages, key=lambda row: row[position]), skip, limit)
+    return [tuple(row[:-1]) for row in rows] if extra else rows
+
+def search_sharded_parts(shards: ShardRouter, q: str, mode: str, limit: int) -> List[Part]:
+    found = [p for page in shards.scatter(search_parts, q, mode=mode, limit=limit) for p in page]
+    return sorted(found, key=lambda p: p.id)[:limit]
+
+def search_sharded_trace_events(
+    shards: ShardRouter,
+    q: str,
+    station_id: Optional[int],
+    resultado: Optional[TraceResult],
+    from_ts: Optional[datetime],
+    to_ts: Optional[datetime],
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[list, Optional[str]]:
+    # los ids no se repiten entre shards, así (score, id) sigue siendo un cursor
+    # válido para todos; cada shard aplica el cursor y entrega sus primeros `limit`.
+    # Aproximado: bm25 usa las estadísticas del índice FTS de cada shard (idf,
+    # largo medio), así que los scores de líneas distintas no son del todo
+    # comparables; un término raro en una línea y común en otra pesa más en la
+    # primera. Con vocabularios parecidos entre líneas el orden casi no cambia
+    results = shards.scatter(
+        search_trace_events,
+        q=q,
+        station_id=station_id,
+        resultado=resultado,
+        from_ts=from_ts,
+        to_ts=to_ts,
+        cursor=cursor,
+        limit=limit,
+    )
+    merged = sorted((row for rows, _ in results for row in rows), key=lambda r: (r.score, r.id))
+    more = len(merged) > limit or any(next_cursor for _, next_cursor in results)
+    rows = merged[:limit]
+    next_cursor = encode_search_cursor(rows[-1].score, rows[-1].id) if more and rows else None
+    return rows, next_cursor
+
+def get_sharded_trace_event(shards: ShardRouter, event_id: int) -> Optional[TraceEvent]:
+    # el id dice en qué shard está: una sola consulta
+    linea = shards.event_linea(event_id)
+    if linea is None:
+        return None
+    return shards.call(linea, get_trace_event, event_id)
@@ -0,0 +1,36 @@
+from typing import Dict, NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.table_cache import TableCache
+from app.models.models import Station, StationType
+
+
+class StationInfo(NamedTuple):
+    id: int
+    nombre: str
+    tipo: StationType
+    linea: str
+
+
+class StationRegistry(TableCache):
+    table_name = Station.__tablename__
+
+    def _load(self, db: Session) -> Dict[int, StationInfo]:
+        rows = db.execute(
+            select(Station.id, Station.nombre, Station.tipo, Station.linea)
+        ).all()
+        return {row.id: StationInfo(*row) for row in rows}
+
+    def get_station(self, db: Session, station_id: int) -> Optional[StationInfo]:
+        info = self.get(db).get(station_id)
+        if info is None:
+            # puede ser una estación recién creada en otro worker
+            info = self.get(db, force_check=True).get(station_id)
+        return info
+
+    def names(self, db: Session) -> Dict[int, str]:
+        return {station_id: info.nombre for station_id, info in self.get(db).items()}
+
+
+station_registry = StationRegistry(settings.STATION_CACHE_CHECK_SECONDS)
@@ -1,14 +1,25 @@
 from typing import List, Optional
+from sqlalchemy import Row, lambda_stmt, select
 from sqlalchemy.orm import Session
-from app.models.models import Station
+from app.core.projection import select_fields
+from app.models.models import Station, get_table_version
 from app.schemas.schemas import StationCreate, StationUpdate
+from app.services.station_registry import station_registry
 
 def get_station(db: Session, station_id: int) -> Optional[Station]:
-    return db.query(Station).filter(Station.id == station_id).first()
+    return db.execute(
+        lambda_stmt(lambda: select(Station).where(Station.id == station_id))
+    ).scalar()
+
+def get_stations_version(db: Session) -> int:
+    return get_table_version(db.connection(), Station.__tablename__)
 
 def list_stations(db: Session) -> List[Station]:
     return db.query(Station).all()
 
+def list_stations_fields(db: Session, fields: List[str]) -> List[Row]:
+    return db.execute(select_fields(Station, fields)).all()
+
 def create_station(db: Session, data: StationCreate) -> Station:
     station = Station(
         nombre=data.nombre,
@@ -17,6 +28,7 @@ def create_station(db: Session, data: StationCreate) -> Station:
     )
     db.add(station)
     db.commit()
+    station_registry.invalidate()
     db.refresh(station)
     return station
 
@@ -29,9 +41,11 @@ def update_station(db: Session, station: Station, data: StationUpdate) -> Statio
         station.linea = data.linea
 
     db.commit()
+    station_registry.invalidate()
     db.refresh(station)
     return station
 
 def delete_station(db: Session, station: Station) -> None:
     db.delete(station)
     db.commit()
+    station_registry.invalidate()
@@ -1,19 +1,66 @@
+import base64
+import json
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from sqlalchemy import Row, and_, column, func, lambda_stmt, literal_column, or_, select, table, union_all
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 from sqlalchemy.orm import Session
+from app.core.projection import field_columns
 
 from app.models.models import (
-    Part,
-    Station,
+    epoch_ms,
     TraceEvent,
     TraceResult,
     PartStatus,
-    User,
 )
 from app.schemas.schemas import TraceEventCreate
+from app.services.api_key_registry import MachineCredential
+from app.services.part_service import get_part
+from app.services.partition_service import (
+    search_sources,
+    trace_events_source,
+    trace_events_source_for_id,
+)
+from app.services.principal_cache import Principal
+from app.services.station_registry import StationInfo, station_registry
 
 def get_trace_event(db: Session, event_id: int) -> Optional[TraceEvent]:
-    return db.query(TraceEvent).filter(TraceEvent.id == event_id).first()
+    events = trace_events_source_for_id(db, event_id)
+    return db.query(events).filter(events.id == event_id).first()
+
+def _extend(stmt, fn):
+    # a un lambda_stmt se le agrega la lambda (queda en su caché); a un select
+    # normal (ramas de la búsqueda FTS) se le aplica directamente
+    if isinstance(stmt, StatementLambdaElement):
+        return stmt + fn
+    return fn(stmt)
+
+def _filter_trace_events(
+    stmt,
+    station_id: Optional[int],
+    resultado: Optional[TraceResult],
+    from_ts: Optional[datetime],
+    to_ts: Optional[datetime],
+    events=TraceEvent,
+):
+    # events: TraceEvent o las columnas de una fuente con particiones
+    if station_id is not None:
+        stmt = _extend(stmt, lambda s: s.where(events.station_id == station_id))
+
+    if resultado is not None:
+        stmt = _extend(stmt, lambda s: s.where(events.resultado == resultado))
+
+    # rangos sobre las columnas enteras *_ms (comparar enteros, no texto); los
+    # valores se calculan fuera de la lambda para que viajen como parámetros
+    if from_ts is not None:
+        from_ms = epoch_ms(from_ts)
+        stmt = _extend(stmt, lambda s: s.where(events.timestamp_entrada_ms >= from_ms))
+
+    if to_ts is not None:
+        to_ms = epoch_ms(to_ts)
+        stmt = _extend(stmt, lambda s: s.where(events.timestamp_salida_ms <= to_ms))
+
+    return stmt
 
 def list_trace_events(
     db: Session,
@@ -24,41 +71,139 @@ def list_trace_events(
     skip: int = 0,
     limit: int = 100,
 ) -> List[TraceEvent]:
-    query = db.query(TraceEvent)
-
-    if station_id is not None:
-        query = query.filter(TraceEvent.station_id == station_id)
-
-    if resultado is not None:
-        query = query.filter(TraceEvent.resultado == resultado)
-
-    if from_ts is not None:
-        query = query.filter(TraceEvent.timestamp_entrada >= from_ts)
+    events = trace_events_source(db, from_ts, to_ts)
+    stmt = _filter_trace_events(
+        lambda_stmt(lambda: select(events)), station_id, resultado, from_ts, to_ts, events
+    )
+    stmt += lambda s: s.order_by(events.timestamp_entrada_ms.asc()).offset(skip).limit(limit)
 
-    if to_ts is not None:
-        query = query.filter(TraceEvent.timestamp_salida <= to_ts)
+    return db.execute(stmt).scalars().all()
 
-    return (
-        query.order_by(TraceEvent.timestamp_entrada.asc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+def list_trace_events_fields(
+    db: Session,
+    fields: List[str],
+    station_id: Optional[int] = None,
+    resultado: Optional[TraceResult] = None,
+    from_ts: Optional[datetime] = None,
+    to_ts: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[Row]:
+    events = trace_events_source(db, from_ts, to_ts)
+    columns = field_columns(events, fields)
+    stmt = _filter_trace_events(
+        lambda_stmt(lambda: select(*columns)), station_id, resultado, from_ts, to_ts, events
     )
+    stmt += lambda s: s.order_by(events.timestamp_entrada_ms.asc()).offset(skip).limit(limit)
+
+    return db.execute(stmt).all()
+
+#------------------------------------------------------------------------------------------
+#Busqueda de texto completo sobre observaciones (FTS5 + BM25)
+
+def _fts_query(q: str) -> str:
+    # cada termino va entre comillas para que la sintaxis de FTS5 no se
+    # interprete; un * final se conserva como busqueda por prefijo
+    terms = []
+    for term in q.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if not term:
+            continue
+        phrase = '"' + term.replace('"', '""') + '"'
+        terms.append(phrase + "*" if prefix else phrase)
+    return " ".join(terms)
+
+def encode_search_cursor(score: float, event_id: int) -> str:
+    raw = json.dumps([score, event_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, event_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(score), int(event_id)
+    except (ValueError, TypeError):
+        raise ValueError("INVALID_CURSOR")
+
+def search_trace_events(
+    db: Session,
+    q: str,
+    station_id: Optional[int] = None,
+    resultado: Optional[TraceResult] = None,
+    from_ts: Optional[datetime] = None,
+    to_ts: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Row], Optional[str]]:
+    match = _fts_query(q)
+    if not match:
+        return [], None
+
+    # una rama por partición: cada una consulta su propio indice FTS (el nombre
+    # sin esquema se resuelve contra la tabla FTS del FROM de esa rama)
+    fts = literal_column("trace_events_fts")
+    branches = []
+    for events in search_sources(db, from_ts, to_ts):
+        fts_table = table("trace_events_fts", column("rowid"), schema=events.schema)
+        branch = (
+            select(*events.c, func.bm25(fts).label("score"))
+            .select_from(fts_table)
+            .join(events, events.c.id == fts_table.c.rowid)
+            .where(fts.op("MATCH")(match))
+        )
+        branches.append(
+            _filter_trace_events(branch, station_id, resultado, from_ts, to_ts, events.c)
+        )
+
+    source = branches[0] if len(branches) == 1 else union_all(*branches)
+    hits = source.subquery("hits")
+    stmt = select(hits)
+
+    if cursor is not None:
+        last_score, last_id = decode_search_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                hits.c.score > last_score,
+                and_(hits.c.score == last_score, hits.c.id > last_id),
+            )
+        )
+
+    # bm25 devuelve valores negativos: mas pequeno = mas relevante
+    rows = db.execute(stmt.order_by(hits.c.score, hits.c.id).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1].score, rows[-1].id)
+
+    return rows, next_cursor
 
 def create_trace_event(
     db: Session,
     data: TraceEventCreate,
-    current_user: Optional[User],
+    current_user: Optional[Principal],
+    credential: Optional[MachineCredential] = None,
+    station: Optional[StationInfo] = None,
 ) -> TraceEvent:
+    # station: ya resuelta en el catálogo cuando db es el shard de la línea
 
-    part = db.query(Part).filter(Part.id == data.part_id).first()
+    part = get_part(db, data.part_id)
     if not part:
         raise ValueError("PART_NOT_FOUND")
 
-    station = db.query(Station).filter(Station.id == data.station_id).first()
+    if station is None:
+        station = station_registry.get_station(db, data.station_id)
     if not station:
         raise ValueError("STATION_NOT_FOUND")
 
+    # una API key solo puede registrar eventos de su estación o de su línea
+    if credential is not None and not (
+        (credential.station_id is not None and credential.station_id == station.id)
+        or (credential.linea is not None and credential.linea == station.linea)
+    ):
+        raise ValueError("OUT_OF_SCOPE")
+
     if data.timestamp_salida <= data.timestamp_entrada:
         raise ValueError("INVALID_TIMESTAMPS")
 
@@ -0,0 +1,163 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import sessionmaker
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+from app.main import app
+from app.core.database import Base, get_db
+from app.models.models import (
+    User,
+    UserRole,
+    Part,
+    PartStatus,
+    Station,
+)
+from app.services.auth_service import get_password_hash
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.sqlite"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+BASE_URL = "/api/api-keys"
+INGEST_URL = "/api/trace-events/"
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    admin = User(
+        nombre="Administrador",
+        email="admin@example.com",
+        password_hash=get_password_hash("admin123"),
+        rol=UserRole.ADMIN,
+        activo=True,
+    )
+    part = Part(
+        id="PZA-100",
+        tipo_pieza="X_TEST",
+        lote="L_TEST",
+        status=PartStatus.IN_PROCESS,
+    )
+    stations = [
+        Station(id=1, nombre="Ensamble 1", tipo="ENSAMBLE", linea="Línea 1"),
+        Station(id=2, nombre="Prueba 1", tipo="PRUEBA", linea="Línea 1"),
+        Station(id=3, nombre="Ensamble 2", tipo="ENSAMBLE", linea="Línea 2"),
+    ]
+    db.add_all([admin, part, *stations])
+    db.commit()
+    db.close()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+def get_admin_headers():
+    res = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+    assert res.status_code == 200, res.text
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+def create_key(**scope):
+    res = client.post(
+        BASE_URL + "/",
+        json={"nombre": "Gateway PLC", **scope},
+        headers=get_admin_headers(),
+    )
+    assert res.status_code == 201, res.text
+    return res.json()
+
+def _event(station_id):
+    now = datetime.utcnow()
+    return {
+        "part_id": "PZA-100",
+        "station_id": station_id,
+        "timestamp_entrada": now.isoformat(),
+        "timestamp_salida": (now + timedelta(minutes=2)).isoformat(),
+        "resultado": "OK",
+    }
+
+def test_create_api_key_requires_admin():
+    res = client.post(BASE_URL + "/", json={"nombre": "Gateway", "station_id": 1})
+    assert res.status_code == 401
+
+def test_create_api_key_requires_single_scope():
+    headers = get_admin_headers()
+
+    res = client.post(BASE_URL + "/", json={"nombre": "Gateway"}, headers=headers)
+    assert res.status_code == 400
+
+    res = client.post(
+        BASE_URL + "/",
+        json={"nombre": "Gateway", "station_id": 1, "linea": "Línea 1"},
+        headers=headers,
+    )
+    assert res.status_code == 400
+
+def test_create_and_list_api_keys_never_return_secret_again():
+    created = create_key(station_id=1)
+    assert created["key"].startswith(f"tk_{created['prefijo']}_")
+
+    res = client.get(BASE_URL + "/", headers=get_admin_headers())
+    assert res.status_code == 200
+    assert res.json()[0]["prefijo"] == created["prefijo"]
+    assert "key" not in res.json()[0]
+
+def test_ingest_with_api_key_skips_users_table():
+    key = create_key(station_id=1)["key"]
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.post(INGEST_URL, json=_event(1), headers={"X-API-Key": key})
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record)
+
+    assert res.status_code == 201, res.text
+    assert res.json()["operador_id"] is None
+    assert not [s for s in statements if "FROM users" in s]
+
+def test_api_key_limited_to_its_scope():
+    station_key = create_key(station_id=1)["key"]
+    line_key = create_key(linea="Línea 1")["key"]
+
+    assert client.post(INGEST_URL, json=_event(2), headers={"X-API-Key": station_key}).status_code == 403
+    assert client.post(INGEST_URL, json=_event(2), headers={"X-API-Key": line_key}).status_code == 201
+    assert client.post(INGEST_URL, json=_event(3), headers={"X-API-Key": line_key}).status_code == 403
+
+def test_invalid_and_revoked_api_keys_rejected():
+    created = create_key(station_id=1)
+    forged = created["key"][:-4] + "AAAA"
+
+    assert client.post(INGEST_URL, json=_event(1), headers={"X-API-Key": forged}).status_code == 401
+    assert client.post(INGEST_URL, json=_event(1), headers={"X-API-Key": "no-es-una-key"}).status_code == 401
+
+    res = client.delete(f"{BASE_URL}/{created['id']}", headers=get_admin_headers())
+    assert res.status_code == 204
+
+    res = client.post(INGEST_URL, json=_event(1), headers={"X-API-Key": created["key"]})
+    assert res.status_code == 401
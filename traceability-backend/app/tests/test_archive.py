@@ -0,0 +1,251 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+os.environ.setdefault("SECRET_KEY", "test-secret")
+from app.main import app
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.models.models import (
+    User,
+    UserRole,
+    Part,
+    PartStatus,
+    Station,
+    StationType,
+    TraceArchiveIndex,
+    TraceEvent,
+    TraceEventRollup,
+    TraceResult,
+)
+from app.services.auth_service import get_password_hash
+from app.services.archive_service import get_archived_history, run_archive
+from app.services.partition_service import MAX_ATTACHED, create_partition, partition_registry
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.sqlite"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_PARTITION_DIR", str(tmp_path / "partitions"))
+    monkeypatch.setattr(settings, "TRACE_ARCHIVE_DIR", str(tmp_path / "archive"))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    partition_registry.invalidate()
+
+    db = TestingSessionLocal()
+    db.add(
+        User(
+            nombre="Administrador",
+            email="admin@example.com",
+            password_hash=get_password_hash("admin123"),
+            rol=UserRole.ADMIN,
+            activo=True,
+        )
+    )
+    db.add(Station(id=1, nombre="Ensamble 1", tipo=StationType.ENSAMBLE, linea="L1"))
+    db.add(Part(id="PZA-001", tipo_pieza="X1", lote="L001", status=PartStatus.IN_PROCESS))
+    db.flush()
+    now = datetime.utcnow().replace(microsecond=0)
+    db.add_all(
+        [
+            TraceEvent(
+                part_id="PZA-001",
+                station_id=1,
+                timestamp_entrada=datetime(2026, 1, 10, 8, 0),
+                timestamp_salida=datetime(2026, 1, 10, 8, 5),
+                resultado=TraceResult.RETRABAJO,
+                observaciones="fuga de aceite en la junta",
+            ),
+            TraceEvent(
+                part_id="PZA-001",
+                station_id=1,
+                timestamp_entrada=datetime(2026, 1, 31, 23, 0),
+                timestamp_salida=datetime(2026, 2, 1, 0, 5),
+                resultado=TraceResult.SCRAP,
+            ),
+            TraceEvent(
+                part_id="PZA-001",
+                station_id=1,
+                timestamp_entrada=now,
+                timestamp_salida=now,
+                resultado=TraceResult.OK,
+                observaciones="sin fuga",
+            ),
+        ]
+    )
+    db.commit()
+    db.close()
+
+    yield
+    Base.metadata.drop_all(bind=engine)
+    partition_registry.invalidate()
+    engine.dispose()
+
+
+def auth_headers():
+    res = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+    assert res.status_code == 200, res.text
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+# corte = 2026-06-01: los dos eventos de enero se archivan, el de hoy no
+ARCHIVE_NOW = datetime(2027, 6, 1)
+
+
+def _archive(**kwargs):
+    with TestingSessionLocal() as db:
+        return run_archive(db, older_than_days=365, now=ARCHIVE_NOW, **kwargs)
+
+
+def test_archive_moves_old_events_to_compressed_files(tmp_path):
+    result = _archive(batch_size=1)
+
+    assert result["archivados"] == 2
+    assert (tmp_path / "archive" / "trace_events_2026_01.jsonl.gz").exists()
+    with TestingSessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(TraceEvent)).scalar() == 1
+        # un miembro por lote: con batch_size=1 el archivo tiene dos
+        assert db.query(TraceArchiveIndex).count() == 2
+        rollup = db.query(TraceEventRollup).filter_by(station_id=1).all()
+        assert sum(r.eventos for r in rollup) == 2
+        assert sum(r.scrap for r in rollup) == 1
+        assert [e["resultado"] for e in get_archived_history(db, "PZA-001")] == [
+            TraceResult.RETRABAJO,
+            TraceResult.SCRAP,
+        ]
+
+
+def test_history_merges_archived_rows():
+    _archive()
+    res = client.get("/api/parts/PZA-001/history", headers=auth_headers())
+    assert res.status_code == 200, res.text
+    assert [e["resultado"] for e in res.json()] == ["RETRABAJO", "SCRAP", "OK"]
+    assert res.json()[0]["observaciones"] == "fuga de aceite en la junta"
+
+
+def test_metrics_include_rollups_of_archived_days():
+    _archive()
+    headers = auth_headers()
+    params = {"from_ts": "2026-01-01T00:00:00", "to_ts": "2026-02-28T00:00:00"}
+
+    res = client.get("/api/metrics/station-load", params=params, headers=headers)
+    assert res.json()[0]["events_count"] == 2
+
+    res = client.get("/api/metrics/scrap-rate", params=params, headers=headers)
+    assert res.json()[0]["total"] == 2
+    assert res.json()[0]["scrap"] == 1
+
+    res = client.get("/api/metrics/station-cycle-time", params=params, headers=headers)
+    assert res.json()[0]["avg_cycle_time_seconds"] == pytest.approx((300 + 3900) / 2)
+
+
+def test_archive_empties_and_removes_expired_partitions(tmp_path):
+    with TestingSessionLocal() as db:
+        partition = create_partition(db, "2026-01")
+    result = _archive()
+
+    assert result["particiones"] == ["2026-01"]
+    assert result["archivados"] == 2
+    assert not (tmp_path / "partitions" / partition.archivo).exists()
+    with TestingSessionLocal() as db:
+        assert partition_registry.get(db, force_check=True) == []
+        assert len(get_archived_history(db, "PZA-001")) == 2
+
+
+def test_archive_reattaches_partition_on_every_batch(tmp_path):
+    from sqlalchemy.pool import NullPool
+
+    with TestingSessionLocal() as db:
+        db.add_all(
+            [
+                TraceEvent(
+                    part_id="PZA-001",
+                    station_id=1,
+                    timestamp_entrada=datetime(2026, 1, 20, 8, minute),
+                    timestamp_salida=datetime(2026, 1, 20, 8, minute + 1),
+                    resultado=TraceResult.OK,
+                )
+                for minute in range(3)
+            ]
+        )
+        db.commit()
+        create_partition(db, "2026-01")
+
+    # NullPool: tras el commit de cada lote la conexión es otra, sin el ATTACH
+    null_engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    try:
+        with sessionmaker(bind=null_engine, autoflush=False)() as db:
+            result = run_archive(db, older_than_days=365, now=ARCHIVE_NOW, batch_size=2)
+    finally:
+        null_engine.dispose()
+
+    assert result["particiones"] == ["2026-01"]
+    assert result["archivados"] == 5
+    with TestingSessionLocal() as db:
+        assert db.query(TraceArchiveIndex).count() == 3
+        assert len(get_archived_history(db, "PZA-001")) == 5
+
+
+def test_stale_partition_registry_does_not_recreate_archived_file(tmp_path, monkeypatch):
+    with TestingSessionLocal() as db:
+        partition = create_partition(db, "2026-01")
+        stale = partition_registry.get(db, force_check=True)
+    _archive()
+    # conexiones nuevas: ninguna tiene la partición adjunta
+    engine.dispose()
+
+    # otro worker: su registro todavía lista el mes archivado
+    fresh_get = partition_registry.get
+    with monkeypatch.context() as m:
+        m.setattr(
+            partition_registry,
+            "get",
+            lambda db, force_check=False: fresh_get(db, True) if force_check else stale,
+        )
+        res = client.get("/api/parts/PZA-001/history", headers=auth_headers())
+
+    assert res.status_code == 200, res.text
+    assert [e["resultado"] for e in res.json()] == ["RETRABAJO", "SCRAP", "OK"]
+    assert not (tmp_path / "partitions" / partition.archivo).exists()
+    with TestingSessionLocal() as db:
+        # el mes se puede volver a particionar: no quedó un archivo vacío
+        assert create_partition(db, "2026-01").filas == 0
+
+
+def test_default_archive_cutoff_keeps_partitions_within_attach_limit():
+    # un mes cerrado sigue vivo mientras termine después del corte; con el
+    # default nunca pueden quedar más de MAX_ATTACHED aunque se particionen todos
+    day = datetime(2024, 1, 1)
+    while day < datetime(2028, 1, 1):
+        cutoff = day - timedelta(days=settings.TRACE_ARCHIVE_AFTER_DAYS)
+        month_start = day.replace(day=1)
+        live = 0
+        while month_start > cutoff:
+            live += 1
+            month_start = (month_start - timedelta(days=1)).replace(day=1)
+        assert live <= MAX_ATTACHED, day
+        day += timedelta(days=1)
@@ -134,3 +134,178 @@ def test_register_duplicate_email():
 
     assert res.status_code == 409
     assert res.json()["detail"] == "Ya existe un usuario con ese email"
+
+def test_login_rejected_when_hashing_saturated(monkeypatch):
+    from app.core.hashing import password_hasher
+
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+def test_runtime_metrics_report_hash_queue_time(monkeypatch):
+    from app.core.hashing import password_hasher
+
+    # un rechazo propio: el contador no depende de otros tests
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    rejected = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+    assert rejected.status_code == 503
+    monkeypatch.undo()
+
+    login = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+    token = login.json()["access_token"]
+
+    res = client.get(
+        "/api/metrics/runtime",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["timers"]["auth.hash_queue"]["count"] >= 1
+    assert body["timers"]["auth.hash"]["count"] >= 1
+    assert body["counters"]["auth.hash_rejected"] >= 1
+    assert body["gauges"]["auth.hash_pending"] == 0
+
+def _login_token():
+    res = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+    return res.json()["access_token"]
+
+def test_logout_revokes_only_that_token():
+    token = _login_token()
+    other = _login_token()
+
+    res = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 204
+
+    res = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 401
+    assert res.json()["detail"] == "Token revocado"
+
+    res = client.get("/api/auth/me", headers={"Authorization": f"Bearer {other}"})
+    assert res.status_code == 200
+
+def test_logout_of_token_without_jti_revokes_user_tokens():
+    from datetime import datetime, timedelta
+    from jose import jwt
+    from app.core.config import settings
+
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {_login_token()}"})
+    # como los emitía la versión anterior: sin jti ni iat
+    legacy = jwt.encode(
+        {
+            "sub": str(me.json()["id"]),
+            "rol": me.json()["rol"],
+            "exp": datetime.utcnow() + timedelta(minutes=5),
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+    res = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {legacy}"})
+    assert res.status_code == 204
+
+    res = client.get("/api/auth/me", headers={"Authorization": f"Bearer {legacy}"})
+    assert res.status_code == 401
+    res = client.get("/api/auth/me", headers={"Authorization": f"Bearer {_login_token()}"})
+    assert res.status_code == 200
+
+def test_revocation_propagates_between_workers():
+    import time
+    from sqlalchemy import event as sa_event
+    from app.services.auth_service import decode_token
+    from app.services.revocation import RevocationFilter
+
+    # dos workers con su propia copia en memoria
+    worker_a = RevocationFilter(check_interval=0.2)
+    worker_b = RevocationFilter(check_interval=0.2)
+    db_a = TestingSessionLocal()
+    db_b = TestingSessionLocal()
+    try:
+        worker_b.refresh(db_b)
+        payload = decode_token(_login_token())
+
+        worker_a.revoke_token(db_a, payload["jti"], payload["exp"])
+        assert worker_a.is_revoked(payload)
+
+        # dentro del intervalo B no consulta la BD y aún no lo ve
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sa_event.listen(engine, "before_cursor_execute", record)
+        try:
+            worker_b.refresh(db_b)
+        finally:
+            sa_event.remove(engine, "before_cursor_execute", record)
+        assert statements == []
+        assert not worker_b.is_revoked(payload)
+
+        start = time.monotonic()
+        while not worker_b.is_revoked(payload):
+            assert time.monotonic() - start < 1.0, "la revocación no llegó al otro worker"
+            time.sleep(0.05)
+            worker_b.refresh(db_b)
+        assert time.monotonic() - start <= 0.2 + 0.1
+    finally:
+        db_a.close()
+        db_b.close()
+
+def test_revocation_after_pruning_every_row_reaches_other_workers():
+    from datetime import datetime, timedelta
+    from app.models.models import RevokedToken
+    from app.services.auth_service import decode_token
+    from app.services.revocation import RevocationFilter
+
+    worker_a = RevocationFilter(check_interval=0)
+    worker_b = RevocationFilter(check_interval=0)
+    db_a = TestingSessionLocal()
+    db_b = TestingSessionLocal()
+    try:
+        # solo revocaciones ya expiradas: la próxima las poda todas
+        db_a.query(RevokedToken).delete()
+        expired = datetime.utcnow() - timedelta(minutes=5)
+        for _ in range(3):
+            db_a.add(RevokedToken(jti=None, user_id=None, revocado_en=expired, expira_en=expired))
+        db_a.commit()
+        worker_b.refresh(db_b, force=True)
+
+        payload = decode_token(_login_token())
+        worker_a.revoke_token(db_a, payload["jti"], payload["exp"])
+
+        worker_b.refresh(db_b, force=True)
+        assert worker_b.is_revoked(payload)
+        assert db_a.query(RevokedToken).count() == 1
+    finally:
+        db_a.close()
+        db_b.close()
+
+def test_user_revocation_rejects_tokens_issued_before_cutoff():
+    from app.services.auth_service import decode_token
+    from app.services.revocation import RevocationFilter
+
+    worker = RevocationFilter(check_interval=0)
+    db = TestingSessionLocal()
+    try:
+        old = decode_token(_login_token())
+        worker.revoke_user(db, int(old["sub"]))
+        new = decode_token(_login_token())
+
+        assert worker.is_revoked(old)
+        assert not worker.is_revoked(new)
+    finally:
+        db.close()
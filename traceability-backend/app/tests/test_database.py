@@ -0,0 +1,178 @@
+import os
+os.environ.setdefault("SECRET_KEY", "test-secret")
+import pytest
+from sqlalchemy import create_engine, event, exc, text
+from app.core.config import settings
+from app.core.sqlite_profile import SQLiteMaintenance, configure_sqlite
+
+
+def test_configure_sqlite_applies_pragmas(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.sqlite'}")
+    configure_sqlite(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+    engine.dispose()
+
+
+def test_sqlite_maintenance_runs_when_due(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'maintenance.sqlite'}")
+    configure_sqlite(engine)
+
+    statements = []
+
+    @event.listens_for(engine, "connect")
+    def _track(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(statements.append)
+
+    maintenance = SQLiteMaintenance(checkpoint_seconds=0.01, optimize_seconds=0)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.commit()
+        raw = conn.connection.dbapi_connection
+
+        maintenance._next_checkpoint = 0
+        maintenance.run_due(raw)
+        maintenance.run_due(raw)
+
+    assert statements.count("PRAGMA wal_checkpoint(PASSIVE)") == 1
+    assert "PRAGMA optimize" not in statements
+    engine.dispose()
+
+
+def test_pool_telemetry_reports_starvation_with_holding_route(tmp_path, monkeypatch, caplog):
+    from app.core.pool_telemetry import current_route, instrument_engine, pool_options
+    from app.core.telemetry import telemetry
+
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "queue")
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT_SECONDS", 0.1)
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.sqlite'}", **pool_options("test.pool")
+    )
+    instrument_engine(engine)
+
+    token = current_route.set("GET /api/metrics/overview")
+    held = engine.connect()
+    current_route.reset(token)
+    try:
+        assert telemetry.snapshot()["gauges"]["test.pool.utilization"] == 1.0
+
+        token = current_route.set("POST /api/trace-events/")
+        try:
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        finally:
+            current_route.reset(token)
+    finally:
+        held.close()
+
+    snapshot = telemetry.snapshot()
+    assert snapshot["counters"]["test.pool.timeouts"] == 1
+    assert snapshot["timers"]["test.pool.checkout_wait"]["count"] >= 1
+    assert snapshot["gauges"]["test.pool.checked_out"] == 0
+    assert "GET /api/metrics/overview" in caplog.text
+    assert "POST /api/trace-events/" in caplog.text
+    engine.dispose()
+
+
+def test_statement_cache_hit_rate_for_lambda_statements(tmp_path):
+    from sqlalchemy.orm import Session
+    from app.core.database import Base
+    from app.core.pool_telemetry import instrument_engine, pool_options
+    from app.core.telemetry import telemetry
+    from app.models.models import Station, StationType
+    from app.services.station_service import get_station
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'cache.sqlite'}", **pool_options("test.cache")
+    )
+    instrument_engine(engine)
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        db.add(Station(id=1, nombre="Ensamble", tipo=StationType.ENSAMBLE, linea="L1"))
+        db.commit()
+        before = telemetry.snapshot()["gauges"]
+        for station_id in (1, 2, 1, 3):
+            db.expunge_all()
+            get_station(db, station_id)
+
+    gauges = telemetry.snapshot()["gauges"]
+    assert gauges["test.cache.statement_cache.hits"] - before["test.cache.statement_cache.hits"] >= 3
+    assert gauges["test.cache.statement_cache.hit_rate"] > 0
+    assert gauges["test.cache.statement_cache.size"] > 0
+    engine.dispose()
+
+
+def test_read_replica_snapshot_refresh(tmp_path):
+    from app.core.read_replica import ReadReplica
+
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.sqlite'}")
+    configure_sqlite(primary)
+    with primary.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    replica = ReadReplica(
+        f"sqlite:///{tmp_path / 'replica.sqlite'}",
+        max_lag_seconds=60,
+        snapshot_source=str(tmp_path / "primary.sqlite"),
+        snapshot_seconds=3600,
+    )
+    assert replica.lag() is None
+
+    replica.refresh()
+    assert replica.available()
+    with primary.begin() as conn:
+        conn.execute(text("INSERT INTO t VALUES (2)"))
+
+    # la conexión del pool abierta con la copia vieja se descarta tras refrescar
+    with replica.engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+    replica.refresh()
+    with replica.engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 2
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (3)"))
+
+    replica.max_lag_seconds = -1
+    assert not replica.available()
+    replica.engine.dispose()
+    primary.dispose()
+
+
+def test_read_replica_live_read_only_uri(tmp_path):
+    from app.core.read_replica import ReadReplica
+
+    path = tmp_path / "live.sqlite"
+    primary = create_engine(f"sqlite:///{path}")
+    configure_sqlite(primary)
+    with primary.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+
+    replica = ReadReplica(f"sqlite:///file:{path}?mode=ro&uri=true", max_lag_seconds=0)
+    assert replica.available()
+    with primary.begin() as conn:
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    with replica.engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (2)"))
+    replica.engine.dispose()
+    primary.dispose()
+
+
+def test_table_cache_without_load_fails_on_creation():
+    from app.core.table_cache import TableCache
+
+    class Incomplete(TableCache):
+        table_name = "stations"
+
+    # al crearlo, no en la primera carga
+    with pytest.raises(TypeError):
+        Incomplete(check_interval=1.0)
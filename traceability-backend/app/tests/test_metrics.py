@@ -1,5 +1,5 @@
 import os
-from datetime import date
+from datetime import date, datetime, timedelta
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -9,7 +9,16 @@ os.environ.setdefault("ALGORITHM", "HS256")
 os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
 from app.main import app
 from app.core.database import Base, get_db
-from app.models.models import User, UserRole
+from app.models.models import (
+    User,
+    UserRole,
+    Part,
+    PartStatus,
+    Station,
+    StationType,
+    TraceEvent,
+    TraceResult,
+)
 from app.services.auth_service import get_password_hash
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.sqlite"
 
@@ -145,3 +154,113 @@ def test_station_load_success():
         headers={"Authorization": f"Bearer {token}"},
     )
     assert res.status_code == 200
+
+
+def _seed_events():
+    db = TestingSessionLocal()
+    now = datetime.utcnow()
+    db.add_all(
+        [
+            Station(id=1, nombre="Ensamble", tipo=StationType.ENSAMBLE, linea="Línea 1"),
+            Station(id=2, nombre="Prueba", tipo=StationType.PRUEBA, linea="Línea 1"),
+            Part(id="PZA-1", tipo_pieza="X1", lote="L1", status=PartStatus.COMPLETED),
+            Part(id="PZA-2", tipo_pieza="X1", lote="L1", status=PartStatus.SCRAPPED),
+        ]
+    )
+    db.flush()
+    for i, (part_id, station_id, resultado) in enumerate(
+        [
+            ("PZA-1", 1, TraceResult.OK),
+            ("PZA-2", 1, TraceResult.SCRAP),
+            ("PZA-1", 2, TraceResult.OK),
+        ]
+    ):
+        db.add(
+            TraceEvent(
+                part_id=part_id,
+                station_id=station_id,
+                timestamp_entrada=now - timedelta(minutes=10 + i),
+                timestamp_salida=now - timedelta(minutes=9 + i),
+                resultado=resultado,
+            )
+        )
+    db.commit()
+    db.close()
+
+def test_scrap_rate_values():
+    _seed_events()
+    token = get_admin_token()
+
+    res = client.get(
+        f"{BASE_URL}/scrap-rate",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    rows = {r["station_id"]: r for r in res.json()}
+    assert rows[1] == {
+        "tipo_pieza": "X1",
+        "station_id": 1,
+        "station_name": "Ensamble",
+        "total": 2,
+        "scrap": 1,
+        "scrap_rate": 0.5,
+    }
+    assert rows[2]["scrap_rate"] == 0.0
+
+def test_parts_by_status_columnar_format():
+    _seed_events()
+    token = get_admin_token()
+
+    res = client.get(
+        f"{BASE_URL}/parts-by-status",
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.traceability.columnar+json",
+        },
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/vnd.traceability.columnar+json")
+    counts = res.json()["counts"]
+    assert counts["columns"] == ["status", "count"]
+    dictionary = counts["dictionaries"]["status"]
+    decoded = {
+        dictionary[code]: n
+        for code, n in zip(counts["data"]["status"], counts["data"]["count"])
+    }
+    assert decoded == {"COMPLETED": 1, "SCRAPPED": 1}
+
+def test_station_load_msgpack_format():
+    msgpack = pytest.importorskip("msgpack")
+    _seed_events()
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res_json = client.get(f"{BASE_URL}/station-load", headers=headers)
+    res = client.get(
+        f"{BASE_URL}/station-load",
+        headers={**headers, "Accept": "application/msgpack"},
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(res.content) == res_json.json()
+
+def test_metrics_unsupported_format():
+    token = get_admin_token()
+
+    res = client.get(
+        f"{BASE_URL}/station-load",
+        headers={"Authorization": f"Bearer {token}", "Accept": "text/csv"},
+    )
+    assert res.status_code == 406
+
+def test_throughput_values():
+    _seed_events()
+    token = get_admin_token()
+    today = datetime.utcnow().date().isoformat()
+
+    res = client.get(
+        f"{BASE_URL}/throughput?from={today}&to={today}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.json()["throughput_per_day"] == [{"date": today, "count": 2}]
@@ -0,0 +1,293 @@
+import os
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, inspect, text
+os.environ.setdefault("SECRET_KEY", "test-secret")
+from app.core.database import Base
+from app.migrations import SchemaOutOfDate, check_schema, migration_status, upgrade
+from app.migrations.operations import Backfill, CreateIndex, Execute
+from app.migrations.runner import Migration, load_migrations
+from app.models.models import Part, epoch_ms
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _quiet(message):
+    pass
+
+
+def _sample_migrations():
+    return [
+        Migration(
+            1,
+            "muestra",
+            "tabla de muestra",
+            [
+                Execute(
+                    ["CREATE TABLE muestra (id INTEGER PRIMARY KEY, valor INTEGER, doble INTEGER)"],
+                    name="tabla",
+                ),
+                Execute(
+                    ["INSERT INTO muestra (valor) VALUES " + ", ".join(f"({i})" for i in range(1, 11))],
+                    name="filas",
+                ),
+            ],
+        ),
+        Migration(
+            2,
+            "doble",
+            "relleno e índice",
+            [
+                Backfill("muestra", "doble", "valor * 2", batch_size=3, pause_seconds=0),
+                CreateIndex("ix_muestra_doble", "muestra", ["doble"]),
+            ],
+        ),
+    ]
+
+
+# tablas como las creaba create_all antes del esquema versionado
+LEGACY_SCHEMA = [
+    """
+    CREATE TABLE users (
+        id INTEGER NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        rol VARCHAR(10) NOT NULL,
+        activo BOOLEAN NOT NULL,
+        fecha_registro DATETIME NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX ix_users_id ON users (id)",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    """
+    CREATE TABLE stations (
+        id INTEGER NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        tipo VARCHAR(10) NOT NULL,
+        linea VARCHAR(100) NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX ix_stations_id ON stations (id)",
+    "CREATE UNIQUE INDEX ix_stations_nombre ON stations (nombre)",
+    """
+    CREATE TABLE parts (
+        id VARCHAR(50) NOT NULL,
+        tipo_pieza VARCHAR(50) NOT NULL,
+        lote VARCHAR(50) NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        fecha_creacion DATETIME NOT NULL,
+        num_retrabajos INTEGER NOT NULL,
+        tiempo_total_segundos FLOAT NOT NULL,
+        ultima_estacion_id INTEGER,
+        PRIMARY KEY (id),
+        FOREIGN KEY(ultima_estacion_id) REFERENCES stations (id)
+    )
+    """,
+    "CREATE INDEX ix_parts_tipo_pieza ON parts (tipo_pieza)",
+    "CREATE INDEX ix_parts_id ON parts (id)",
+    "CREATE INDEX ix_parts_lote ON parts (lote)",
+    "CREATE INDEX ix_parts_status ON parts (status)",
+    """
+    CREATE TABLE trace_events (
+        id INTEGER NOT NULL,
+        part_id VARCHAR(50) NOT NULL,
+        station_id INTEGER NOT NULL,
+        timestamp_entrada DATETIME NOT NULL,
+        timestamp_salida DATETIME NOT NULL,
+        resultado VARCHAR(9) NOT NULL,
+        operador_id INTEGER,
+        observaciones TEXT,
+        PRIMARY KEY (id),
+        FOREIGN KEY(part_id) REFERENCES parts (id),
+        FOREIGN KEY(station_id) REFERENCES stations (id),
+        FOREIGN KEY(operador_id) REFERENCES users (id)
+    )
+    """,
+    "CREATE INDEX ix_trace_events_timestamp_entrada ON trace_events (timestamp_entrada)",
+    "CREATE INDEX ix_trace_events_timestamp_salida ON trace_events (timestamp_salida)",
+    "CREATE INDEX ix_trace_events_part_id ON trace_events (part_id)",
+    "CREATE INDEX ix_trace_events_station_id ON trace_events (station_id)",
+    "CREATE INDEX ix_trace_events_operador_id ON trace_events (operador_id)",
+    "CREATE INDEX ix_trace_events_id ON trace_events (id)",
+    "CREATE INDEX ix_trace_events_resultado ON trace_events (resultado)",
+]
+
+
+def _assert_schema_matches_models(engine):
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        assert table.name in tables
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        assert columns == {c.name for c in table.columns}, table.name
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        assert {i.name for i in table.indexes} <= indexes, table.name
+    assert {"parts_fts", "trace_events_fts"} <= tables
+
+
+def test_baseline_matches_models(engine):
+    upgrade(engine, progress=_quiet)
+
+    _assert_schema_matches_models(engine)
+
+
+def test_upgrade_of_legacy_database_serves_api(engine):
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import get_db
+    from app.main import app
+    from app.models.models import Station, StationType, User, UserRole
+    from app.services.auth_service import get_password_hash
+
+    with engine.begin() as conn:
+        for ddl in LEGACY_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(
+            text(
+                "INSERT INTO parts (id, tipo_pieza, lote, status, fecha_creacion, "
+                "num_retrabajos, tiempo_total_segundos) VALUES "
+                "('PZA-OLD', 'X1', 'L001', 'IN_PROCESS', '2025-01-01 08:00:00', 0, 0.0)"
+            )
+        )
+    upgrade(engine, progress=_quiet)
+    _assert_schema_matches_models(engine)
+
+    LegacySession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with LegacySession() as db:
+        db.add(
+            User(
+                nombre="Administrador",
+                email="admin@example.com",
+                password_hash=get_password_hash("admin123"),
+                rol=UserRole.ADMIN,
+                activo=True,
+            )
+        )
+        db.add(Station(id=1, nombre="Ensamble 1", tipo=StationType.ENSAMBLE, linea="L1"))
+        db.commit()
+
+    def override_get_db():
+        with LegacySession() as db:
+            yield db
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        login = client.post(
+            "/api/auth/login", data={"username": "admin@example.com", "password": "admin123"}
+        )
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        res = client.get("/api/parts/PZA-OLD", headers=headers)
+        assert res.status_code == 200, res.text
+        assert res.headers["ETag"]
+        res = client.post(
+            "/api/trace-events/",
+            json={
+                "part_id": "PZA-OLD",
+                "station_id": 1,
+                "timestamp_entrada": "2025-01-02T08:00:00",
+                "timestamp_salida": "2025-01-02T08:05:00",
+                "resultado": "OK",
+            },
+            headers=headers,
+        )
+        assert res.status_code == 201, res.text
+        res = client.get("/api/parts/PZA-OLD/history", headers=headers)
+        assert [e["resultado"] for e in res.json()] == ["OK"]
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+
+
+def test_check_schema_requires_upgrade(engine):
+    with pytest.raises(SchemaOutOfDate):
+        check_schema(engine)
+
+    upgrade(engine, progress=_quiet)
+    check_schema(engine)
+    assert upgrade(engine, progress=_quiet) == []
+    assert all(s["completado"] for s in migration_status(engine))
+    assert len(load_migrations()) >= 1
+
+
+def test_blocking_only_leaves_deferred_steps_pending(engine):
+    migrations = _sample_migrations()
+    upgrade(engine, deferred=False, progress=_quiet, migrations=migrations)
+
+    check_schema(engine, migrations)
+    pending = [s["nombre"] for s in migration_status(engine, migrations) if not s["completado"]]
+    assert pending == ["backfill muestra.doble", "create_index ix_muestra_doble"]
+
+    upgrade(engine, progress=_quiet, migrations=migrations)
+    indexes = {i["name"] for i in inspect(engine).get_indexes("muestra")}
+    assert "ix_muestra_doble" in indexes
+
+
+def test_backfill_resumes_from_checkpoint(engine):
+    migrations = _sample_migrations()
+    upgrade(engine, deferred=False, progress=_quiet, migrations=migrations)
+
+    def interrupt(message):
+        if message.startswith("backfill") and "/" in message:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        upgrade(engine, progress=interrupt, migrations=migrations)
+
+    step = [s for s in migration_status(engine, migrations) if s["version"] == 2][0]
+    assert not step["completado"]
+    assert step["checkpoint"] == 3
+
+    messages = []
+    upgrade(engine, progress=messages.append, migrations=migrations)
+    assert "backfill muestra.doble: 3/7" in messages
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM muestra WHERE doble = valor * 2")).scalar() == 10
+
+
+def test_epoch_ms_backfill_matches_python(engine):
+    upgrade(engine, progress=_quiet, migrations=load_migrations()[:2])
+    created = [datetime(2024, 3, 1, 6, 30, 15, 123999), datetime(1999, 12, 31, 23, 59, 59)]
+    with engine.begin() as conn:
+        for i, fecha in enumerate(created):
+            conn.execute(
+                text(
+                    "INSERT INTO parts (id, tipo_pieza, lote, status, fecha_creacion, num_retrabajos, tiempo_total_segundos) "
+                    "VALUES (:id, 'X1', 'L1', 'IN_PROCESS', :fecha, 0, 0)"
+                ),
+                {"id": f"PZA-{i}", "fecha": fecha.isoformat(" ")},
+            )
+
+    upgrade(engine, progress=_quiet)
+    with engine.begin() as conn:
+        conn.execute(
+            Part.__table__.insert(),
+            [{"id": "PZA-2", "tipo_pieza": "X1", "lote": "L1", "fecha_creacion": created[0]}],
+        )
+        rows = conn.execute(text("SELECT fecha_creacion_ms FROM parts ORDER BY id")).scalars().all()
+    assert rows == [epoch_ms(created[0]), epoch_ms(created[1]), epoch_ms(created[0])]
+
+
+def test_step_without_run_fails_on_creation():
+    from app.migrations.operations import Step
+
+    class Incomplete(Step):
+        @property
+        def name(self) -> str:
+            return "incompleto"
+
+    # al crearlo, no a mitad de una migración
+    with pytest.raises(TypeError):
+        Incomplete()
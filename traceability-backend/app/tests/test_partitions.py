@@ -0,0 +1,205 @@
+import os
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+os.environ.setdefault("SECRET_KEY", "test-secret")
+from app.main import app
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.models.models import (
+    User,
+    UserRole,
+    Part,
+    PartStatus,
+    Station,
+    StationType,
+    TraceEvent,
+    TraceResult,
+)
+from app.services.auth_service import get_password_hash
+from app.services.partition_service import (
+    create_partition,
+    detach_partition,
+    partition_registry,
+    trace_events_source,
+)
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.sqlite"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_PARTITION_DIR", str(tmp_path))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    partition_registry.invalidate()
+
+    db = TestingSessionLocal()
+    db.add(
+        User(
+            nombre="Administrador",
+            email="admin@example.com",
+            password_hash=get_password_hash("admin123"),
+            rol=UserRole.ADMIN,
+            activo=True,
+        )
+    )
+    db.add(Station(id=1, nombre="Ensamble 1", tipo=StationType.ENSAMBLE, linea="L1"))
+    db.add(Part(id="PZA-001", tipo_pieza="X1", lote="L001", status=PartStatus.IN_PROCESS))
+    db.flush()
+    now = datetime.utcnow().replace(microsecond=0)
+    db.add_all(
+        [
+            TraceEvent(
+                part_id="PZA-001",
+                station_id=1,
+                timestamp_entrada=datetime(2026, 1, 10, 8, 0),
+                timestamp_salida=datetime(2026, 1, 10, 8, 5),
+                resultado=TraceResult.RETRABAJO,
+                observaciones="fuga de aceite en la junta",
+            ),
+            TraceEvent(
+                part_id="PZA-001",
+                station_id=1,
+                timestamp_entrada=datetime(2026, 1, 31, 23, 0),
+                timestamp_salida=datetime(2026, 2, 1, 0, 5),
+                resultado=TraceResult.OK,
+            ),
+            TraceEvent(
+                part_id="PZA-001",
+                station_id=1,
+                timestamp_entrada=now,
+                timestamp_salida=now,
+                resultado=TraceResult.OK,
+                observaciones="sin fuga",
+            ),
+        ]
+    )
+    db.commit()
+    db.close()
+
+    yield
+    Base.metadata.drop_all(bind=engine)
+    partition_registry.invalidate()
+    engine.dispose()
+
+
+def auth_headers():
+    res = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+    assert res.status_code == 200, res.text
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def _create_january():
+    with TestingSessionLocal() as db:
+        return create_partition(db, "2026-01")
+
+
+def test_create_partition_moves_month_out_of_hot_table(tmp_path):
+    partition = _create_january()
+
+    assert partition.filas == 2
+    assert (tmp_path / partition.archivo).exists()
+    with TestingSessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(TraceEvent)).scalar() == 1
+
+
+def test_reads_merge_partitions_by_range():
+    _create_january()
+    headers = auth_headers()
+
+    res = client.get(
+        "/api/trace-events/",
+        params={"from_ts": "2026-01-01T00:00:00", "to_ts": "2026-02-28T00:00:00"},
+        headers=headers,
+    )
+    assert res.status_code == 200, res.text
+    assert len(res.json()) == 2
+
+    res = client.get("/api/trace-events/", headers=headers)
+    assert len(res.json()) == 3
+
+    res = client.get("/api/parts/PZA-001/history", headers=headers)
+    assert [e["resultado"] for e in res.json()] == ["RETRABAJO", "OK", "OK"]
+
+    event_id = res.json()[0]["id"]
+    res = client.get(f"/api/trace-events/{event_id}", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["observaciones"] == "fuga de aceite en la junta"
+
+    res = client.get(
+        "/api/metrics/station-load",
+        params={"from_ts": "2026-01-01T00:00:00", "to_ts": "2026-02-28T00:00:00"},
+        headers=headers,
+    )
+    assert res.json()[0]["events_count"] == 2
+
+
+def test_search_covers_partition_indexes():
+    _create_january()
+    res = client.get(
+        "/api/trace-events/search", params={"q": "fuga"}, headers=auth_headers()
+    )
+    assert res.status_code == 200, res.text
+    assert {e["observaciones"] for e in res.json()["items"]} == {
+        "fuga de aceite en la junta",
+        "sin fuga",
+    }
+
+
+def test_partitions_are_pruned_by_range():
+    _create_january()
+    with TestingSessionLocal() as db:
+        assert trace_events_source(db, from_ts=datetime(2026, 3, 1)) is TraceEvent
+        assert trace_events_source(db, to_ts=datetime(2025, 12, 31)) is TraceEvent
+        assert trace_events_source(db, from_ts=datetime(2026, 1, 15)) is not TraceEvent
+
+
+def test_partition_pruning_matches_row_filters_for_aware_ranges():
+    headers = auth_headers()
+    # hora de pared 22:00-02:00 contiene el evento 23:00-00:05 de enero; en UTC
+    # el rango empezaría el 1 de febrero
+    params = {"from_ts": "2026-01-31T22:00:00-05:00", "to_ts": "2026-02-01T02:00:00-05:00"}
+
+    def counts():
+        events = client.get("/api/trace-events/", params=params, headers=headers)
+        load = client.get("/api/metrics/station-load", params=params, headers=headers)
+        return len(events.json()), sum(r["events_count"] for r in load.json())
+
+    before = counts()
+    _create_january()
+
+    assert before == (1, 1)
+    assert counts() == before
+
+
+def test_detach_partition_hides_its_rows():
+    _create_january()
+    with TestingSessionLocal() as db:
+        detach_partition(db, "2026-01")
+
+    res = client.get("/api/trace-events/", headers=auth_headers())
+    assert len(res.json()) == 1
@@ -1,5 +1,5 @@
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -197,3 +197,236 @@ def test_part_history_returns_list_even_if_empty():
     assert res.status_code == 200
     body = res.json()
     assert isinstance(body, list)
+
+def test_search_parts_substring():
+    token = get_admin_token()
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "za-00"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert res.status_code == 200
+    ids = [p["id"] for p in res.json()]
+    assert ids == ["PZA-001", "PZA-002", "PZA-003", "PZA-004", "PZA-005"]
+
+def test_search_parts_prefix_matches_id_and_lote():
+    token = get_admin_token()
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "L002", "mode": "prefix"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert {p["id"] for p in res.json()} == {"PZA-003", "PZA-004"}
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "ZA-", "mode": "prefix"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.json() == []
+
+def test_search_parts_index_follows_writes():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.patch(f"{BASE_URL}/PZA-005", json={"lote": "LX77"}, headers=headers)
+    assert res.status_code == 200
+
+    res = client.get(f"{BASE_URL}/search", params={"q": "x77"}, headers=headers)
+    assert [p["id"] for p in res.json()] == ["PZA-005"]
+
+    res = client.get(f"{BASE_URL}/search", params={"q": "L003"}, headers=headers)
+    assert res.json() == []
+
+def test_search_parts_prefix_ignores_case_in_ids_and_lotes():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    db = TestingSessionLocal()
+    db.add(Part(id="XPZA-9", tipo_pieza="X1", lote="pza-009", status=PartStatus.IN_PROCESS))
+    db.commit()
+    db.close()
+
+    expected = ["PZA-001", "PZA-002", "PZA-003", "PZA-004", "PZA-005", "XPZA-9"]
+    for q in ("pza-00", "PZA-00", "Pza-00"):
+        res = client.get(
+            f"{BASE_URL}/search", params={"q": q, "mode": "prefix"}, headers=headers
+        )
+        assert res.status_code == 200
+        assert [p["id"] for p in res.json()] == expected, q
+
+    res = client.get(
+        f"{BASE_URL}/search", params={"q": "l00", "mode": "prefix"}, headers=headers
+    )
+    assert len(res.json()) == 5
+
+def test_search_parts_short_query():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.get(f"{BASE_URL}/search", params={"q": "PZ"}, headers=headers)
+    assert res.status_code == 400
+
+    res = client.get(
+        f"{BASE_URL}/search", params={"q": "PZ", "mode": "prefix"}, headers=headers
+    )
+    assert res.status_code == 200
+    assert len(res.json()) == 5
+
+def test_get_part_conditional_get():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.get(f"{BASE_URL}/PZA-001", headers=headers)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    res = client.get(f"{BASE_URL}/PZA-001", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+    assert res.content == b""
+
+    res = client.patch(f"{BASE_URL}/PZA-001", json={"lote": "L777"}, headers=headers)
+    assert res.status_code == 200
+
+    res = client.get(f"{BASE_URL}/PZA-001", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    assert res.json()["lote"] == "L777"
+
+def test_concurrent_part_updates_get_distinct_versions():
+    # dos sesiones leen la misma versión y ambas escriben
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        part_a = first.get(Part, "PZA-005")
+        part_b = second.get(Part, "PZA-005")
+        start = part_a.version
+        assert part_b.version == start
+
+        part_a.lote = "L-A"
+        first.commit()
+        part_b.lote = "L-B"
+        second.commit()
+
+        assert second.get(Part, "PZA-005").version == start + 2
+    finally:
+        first.close()
+        second.close()
+
+def test_part_history_etag_changes_with_new_events():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.get(f"{BASE_URL}/PZA-002/history", headers=headers)
+    etag = res.headers["ETag"]
+    res = client.get(
+        f"{BASE_URL}/PZA-002/history", headers={**headers, "If-None-Match": etag}
+    )
+    assert res.status_code == 304
+
+    station = client.post(
+        "/api/stations/",
+        json={"nombre": "Estación ETag", "tipo": "PRUEBA", "linea": "Línea 1"},
+        headers=headers,
+    ).json()
+    now = datetime.utcnow()
+    res = client.post(
+        "/api/trace-events/",
+        json={
+            "part_id": "PZA-002",
+            "station_id": station["id"],
+            "timestamp_entrada": now.isoformat(),
+            "timestamp_salida": (now + timedelta(minutes=5)).isoformat(),
+            "resultado": "OK",
+        },
+        headers=headers,
+    )
+    assert res.status_code == 201
+
+    res = client.get(
+        f"{BASE_URL}/PZA-002/history", headers={**headers, "If-None-Match": etag}
+    )
+    assert res.status_code == 200
+    assert len(res.json()) == 1
+
+def test_list_parts_sparse_fields():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.get(
+        BASE_URL,
+        params={"fields": "id,status,ultima_estacion_id", "status": "IN_PROCESS"},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert len(data) == 3
+    for row in data:
+        assert set(row) == {"id", "status", "ultima_estacion_id"}
+        assert row["status"] == "IN_PROCESS"
+
+def test_list_parts_sparse_fields_rejects_unknown_columns():
+    token = get_admin_token()
+
+    res = client.get(
+        BASE_URL,
+        params={"fields": "id,version"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 400
+
+def test_list_parts_matches_pydantic_serialization():
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app.schemas.schemas import PartRead
+
+    token = get_admin_token()
+    res = client.get(BASE_URL, headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+
+    db = TestingSessionLocal()
+    expected = [PartRead.from_orm(p) for p in db.query(Part).all()]
+    db.close()
+
+    assert res.content == JSONResponse(jsonable_encoder(expected)).body
+
+
+def test_list_parts_reads_replica_unless_strong_consistency(tmp_path, monkeypatch):
+    from app.core import database
+    from app.core.read_replica import ReadReplica
+
+    replica = ReadReplica(
+        f"sqlite:///{tmp_path / 'replica.sqlite'}",
+        max_lag_seconds=60,
+        snapshot_source="./test_db.sqlite",
+        snapshot_seconds=3600,
+    )
+    replica.refresh()
+    monkeypatch.setattr(database, "read_replica", replica)
+
+    headers = {"Authorization": f"Bearer {get_admin_token()}"}
+    res = client.post(
+        f"{BASE_URL}/",
+        json={"id": "PZA-NEW", "tipo_pieza": "X1", "lote": "L009"},
+        headers=headers,
+    )
+    assert res.status_code == 201, res.text
+
+    # la copia es anterior a la escritura
+    res = client.get(f"{BASE_URL}/", headers=headers)
+    assert "PZA-NEW" not in {p["id"] for p in res.json()}
+
+    res = client.get(f"{BASE_URL}/", headers={**headers, "X-Consistency": "strong"})
+    assert "PZA-NEW" in {p["id"] for p in res.json()}
+
+    # más retraso del permitido: se lee del primario
+    monkeypatch.setattr(replica, "max_lag_seconds", -1)
+    monkeypatch.setattr(replica, "refresh_if_due", lambda: None)
+    res = client.get(f"{BASE_URL}/", headers=headers)
+    assert "PZA-NEW" in {p["id"] for p in res.json()}
+    replica.engine.dispose()
@@ -0,0 +1,240 @@
+import os
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+os.environ.setdefault("SECRET_KEY", "test-secret")
+from app.main import app
+from app.core.database import Base, get_db, get_shard_router
+from app.core.sharding import EVENT_ID_BITS, ShardRouter
+from app.migrations import upgrade
+from app.models.models import Station, StationType, TraceEvent, TraceResult, User, UserRole
+from app.services.auth_service import get_password_hash
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.sqlite"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def shards(tmp_path):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    db.add(
+        User(
+            nombre="Administrador",
+            email="admin@example.com",
+            password_hash=get_password_hash("admin123"),
+            rol=UserRole.ADMIN,
+            activo=True,
+        )
+    )
+    db.add(Station(id=1, nombre="Ensamble L1", tipo=StationType.ENSAMBLE, linea="L1"))
+    db.add(Station(id=2, nombre="Ensamble L2", tipo=StationType.ENSAMBLE, linea="L2"))
+    db.commit()
+    db.close()
+
+    router = ShardRouter(
+        {
+            "L1": f"sqlite:///{tmp_path / 'l1.db'}",
+            "L2": f"sqlite:///{tmp_path / 'l2.db'}",
+        }
+    )
+    for shard_engine in router.engines.values():
+        upgrade(shard_engine, progress=lambda message: None)
+    router.reserve_event_ids()
+    app.dependency_overrides[get_shard_router] = lambda: router
+
+    yield router
+    app.dependency_overrides.pop(get_shard_router, None)
+    router.dispose()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def auth_headers():
+    res = client.post(
+        "/api/auth/login",
+        data={"username": "admin@example.com", "password": "admin123"},
+    )
+    assert res.status_code == 200, res.text
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def _create_part(headers, part_id, linea):
+    res = client.post(
+        "/api/parts/",
+        json={"id": part_id, "tipo_pieza": "X1", "lote": "L001", "linea": linea},
+        headers=headers,
+    )
+    assert res.status_code == 201, res.text
+
+
+def _create_event(headers, part_id, station_id, hour, resultado="OK"):
+    return client.post(
+        "/api/trace-events/",
+        json={
+            "part_id": part_id,
+            "station_id": station_id,
+            "timestamp_entrada": f"2026-03-01T{hour:02d}:00:00",
+            "timestamp_salida": f"2026-03-01T{hour:02d}:10:00",
+            "resultado": resultado,
+        },
+        headers=headers,
+    )
+
+
+def _populate(headers):
+    _create_part(headers, "PZA-L1", "L1")
+    _create_part(headers, "PZA-L2", "L2")
+    assert _create_event(headers, "PZA-L1", 1, 8).status_code == 201
+    assert _create_event(headers, "PZA-L2", 2, 9, "SCRAP").status_code == 201
+    assert _create_event(headers, "PZA-L1", 1, 10).status_code == 201
+
+
+def test_writes_go_to_the_line_shard(shards):
+    headers = auth_headers()
+    _populate(headers)
+
+    counts = {}
+    for linea in shards.lineas:
+        with shards.session(linea) as db:
+            counts[linea] = db.execute(select(func.count()).select_from(TraceEvent)).scalar()
+    assert counts == {"L1": 2, "L2": 1}
+    with TestingSessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(TraceEvent)).scalar() == 0
+
+    res = client.get("/api/parts/PZA-L2", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "SCRAPPED"
+
+    res = client.get("/api/parts/PZA-L1/history", headers=headers)
+    assert [e["station_id"] for e in res.json()] == [1, 1]
+
+
+def test_event_ids_are_unique_across_shards():
+    headers = auth_headers()
+    _populate(headers)
+
+    res = client.get("/api/trace-events/", headers=headers)
+    events = res.json()
+    assert [e["part_id"] for e in events] == ["PZA-L1", "PZA-L2", "PZA-L1"]
+    assert len({e["id"] for e in events}) == 3
+    assert {e["id"] >> EVENT_ID_BITS for e in events} == {1, 2}
+
+    res = client.get(f"/api/trace-events/{events[1]['id']}", headers=headers)
+    assert res.json()["part_id"] == "PZA-L2"
+
+
+def test_event_by_id_queries_only_its_shard(shards):
+    from sqlalchemy import event as sa_event
+
+    headers = auth_headers()
+    _populate(headers)
+    events = client.get("/api/trace-events/", headers=headers).json()
+    l2_event = events[1]["id"]
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa_event.listen(shards.engines["L1"], "before_cursor_execute", record)
+    try:
+        res = client.get(f"/api/trace-events/{l2_event}", headers=headers)
+        # un id fuera de todo rango reservado: ni siquiera se consulta un shard
+        missing = client.get(f"/api/trace-events/{99 << EVENT_ID_BITS}", headers=headers)
+    finally:
+        sa_event.remove(shards.engines["L1"], "before_cursor_execute", record)
+    assert res.json()["part_id"] == "PZA-L2"
+    assert missing.status_code == 404
+    assert not [s for s in statements if "trace_events" in s and "sqlite_sequence" not in s]
+
+
+def test_manage_reports_shard_with_unranged_events(shards, tmp_path, monkeypatch, capsys):
+    from app import manage
+
+    legacy = ShardRouter({"L3": f"sqlite:///{tmp_path / 'l3.db'}"})
+    upgrade(legacy.engines["L3"], progress=lambda message: None)
+    with legacy.session("L3") as db:
+        db.add(Station(id=3, nombre="Ensamble L3", tipo=StationType.ENSAMBLE, linea="L3"))
+        db.add(
+            TraceEvent(
+                part_id="PZA-L3",
+                station_id=3,
+                timestamp_entrada=datetime(2026, 3, 1, 8),
+                timestamp_salida=datetime(2026, 3, 1, 8, 10),
+                resultado=TraceResult.OK,
+            )
+        )
+        db.commit()
+    monkeypatch.setattr(manage, "engine", engine)
+    monkeypatch.setattr(manage, "shard_router", legacy)
+    try:
+        assert manage.main(["migrate", "up"]) == 1
+    finally:
+        legacy.dispose()
+    assert manage.SHARD_ERRORS["SHARD_NOT_EMPTY"] in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [["partitions", "list"], ["archive", "run"]])
+def test_manage_trace_files_refuse_shards(shards, argv, monkeypatch, capsys):
+    from app import manage
+
+    monkeypatch.setattr(manage, "shard_router", shards)
+    assert manage.main(argv) == 1
+    assert manage.SHARD_ERRORS["SHARDED_TRACE_FILES"] in capsys.readouterr().err
+
+
+def test_part_routing_errors():
+    headers = auth_headers()
+    _populate(headers)
+
+    res = client.post(
+        "/api/parts/", json={"id": "PZA-L1", "tipo_pieza": "X1", "lote": "L1", "linea": "L2"}, headers=headers
+    )
+    assert res.status_code == 409
+    res = client.post("/api/parts/", json={"id": "PZA-9", "tipo_pieza": "X1", "lote": "L1"}, headers=headers)
+    assert res.status_code == 400
+
+    assert _create_event(headers, "PZA-L1", 2, 11).status_code == 409
+    assert client.get("/api/parts/PZA-9", headers=headers).status_code == 404
+
+
+def test_metrics_gather_all_shards():
+    headers = auth_headers()
+    _populate(headers)
+
+    res = client.get("/api/metrics/station-load", headers=headers)
+    assert [(r["station_id"], r["events_count"]) for r in res.json()] == [(1, 2), (2, 1)]
+
+    res = client.get("/api/metrics/parts-by-status", headers=headers)
+    assert {r["status"]: r["count"] for r in res.json()["counts"]} == {
+        "COMPLETED": 1,
+        "SCRAPPED": 1,
+    }
+
+    res = client.get("/api/metrics/scrap-rate", headers=headers)
+    assert {(r["station_id"], r["scrap"], r["total"]) for r in res.json()} == {(1, 0, 2), (2, 1, 1)}
+
+    res = client.get("/api/metrics/overview", headers=headers)
+    assert res.json()["total_parts"] == 2
@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+os.environ.setdefault("SECRET_KEY", "test-secret")
+from app import main
+from app.core.config import settings
+from app.core.telemetry import telemetry
+from app.migrations import SchemaOutOfDate, upgrade
+from app.models.models import User
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+# importación en frío (sin caché de módulos), con holgura para CI cargado
+IMPORT_BUDGET_SECONDS = {"app.main": 2.0, "app.manage": 1.0}
+WEB_MODULES = ("fastapi", "starlette", "anyio")
+LAZY_MODULES = ("jose", "passlib")
+
+
+@pytest.fixture
+def startup_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(main, "shard_router", None)
+    yield engine
+    engine.dispose()
+
+
+def test_startup_requires_init(startup_db):
+    with pytest.raises(SchemaOutOfDate):
+        main.startup_event()
+
+
+def test_startup_within_budget_without_seeding(startup_db):
+    upgrade(startup_db, progress=lambda message: None)
+
+    start = time.perf_counter()
+    main.startup_event()
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < settings.STARTUP_BUDGET_SECONDS
+    assert telemetry.snapshot()["timers"]["app.startup"]["count"] >= 1
+    # los datos iniciales (y sus hashes pbkdf2) son de "manage init", no del arranque
+    with startup_db.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(User)).scalar() == 0
+
+
+def _cold_import(module: str):
+    # proceso aparte: en este ya está todo importado. Devuelve el tiempo de
+    # importación acumulado (-X importtime) y los módulos cargados
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; print(' '.join(sys.modules))",
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "SECRET_KEY": "test-secret"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = next(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.split("|")[2].strip() == module
+    )
+    return cumulative_us / 1_000_000, set(result.stdout.split())
+
+
+def test_manage_import_skips_web_stack():
+    elapsed, modules = _cold_import("app.manage")
+
+    assert elapsed < IMPORT_BUDGET_SECONDS["app.manage"]
+    assert not modules & set(WEB_MODULES + LAZY_MODULES)
+    assert "app.routers" not in modules
+
+
+def test_app_import_defers_auth_libraries():
+    elapsed, modules = _cold_import("app.main")
+
+    assert elapsed < IMPORT_BUDGET_SECONDS["app.main"]
+    # jwt y passlib se cargan con el primer token o hash, no con la app
+    assert not modules & set(LAZY_MODULES)
@@ -190,3 +190,56 @@ def test_delete_station_success():
         headers={"Authorization": f"Bearer {token}"},
     )
     assert res_check.status_code == 404
+
+def test_list_stations_conditional_get():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.get(BASE_URL + "/", headers=headers)
+    etag = res.headers["ETag"]
+
+    res = client.get(BASE_URL + "/", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+
+    res = client.put(f"{BASE_URL}/2", json={"linea": "Línea 5"}, headers=headers)
+    assert res.status_code == 200
+
+    res = client.get(BASE_URL + "/", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+def test_list_stations_sparse_fields():
+    token = get_admin_token()
+
+    res = client.get(
+        BASE_URL + "/",
+        params={"fields": "id,nombre"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.json()[0] == {"id": 1, "nombre": "Estación A"}
+    assert "ETag" in res.headers
+
+def test_list_stations_etag_depends_on_fields():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    full = client.get(BASE_URL + "/", headers=headers)
+    sparse = client.get(BASE_URL + "/", params={"fields": "id"}, headers=headers)
+    assert full.headers["ETag"] != sparse.headers["ETag"]
+
+    # el validador de la lista completa no sirve para ?fields=id
+    res = client.get(
+        BASE_URL + "/",
+        params={"fields": "id"},
+        headers={**headers, "If-None-Match": full.headers["ETag"]},
+    )
+    assert res.status_code == 200
+    assert res.json()[0] == {"id": 1}
+
+    res = client.get(
+        BASE_URL + "/",
+        params={"fields": "id"},
+        headers={**headers, "If-None-Match": sparse.headers["ETag"]},
+    )
+    assert res.status_code == 304
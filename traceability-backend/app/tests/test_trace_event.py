@@ -254,3 +254,211 @@ def test_get_trace_event_success():
     assert body["id"] == event_id
     assert body["part_id"] == payload["part_id"]
     assert body["station_id"] == payload["station_id"]
+
+def test_search_trace_events_ranked_and_paginated():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    notas = [
+        "Rayón en superficie",
+        "Rayon profundo, rayon en borde, rayon en esquina",
+        "Sin defectos",
+        "Rayón leve",
+    ]
+    for nota in notas:
+        payload = _build_valid_payload()
+        payload["observaciones"] = nota
+        res = client.post(BASE_URL + "/", json=payload, headers=headers)
+        assert res.status_code == 201
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "rayon", "limit": 2},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    page1 = res.json()
+    assert len(page1["items"]) == 2
+    assert page1["items"][0]["observaciones"] == notas[1]
+    assert page1["next_cursor"]
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "rayon", "limit": 2, "cursor": page1["next_cursor"]},
+        headers=headers,
+    )
+    page2 = res.json()
+    assert len(page2["items"]) == 1
+    assert page2["next_cursor"] is None
+
+    seen = {e["id"] for e in page1["items"] + page2["items"]}
+    assert len(seen) == 3
+
+def test_search_trace_events_combines_filters():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = _build_valid_payload()
+    payload["observaciones"] = "Porosidad en soldadura"
+    payload["resultado"] = TraceResult.SCRAP.value
+    assert client.post(BASE_URL + "/", json=payload, headers=headers).status_code == 201
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "porosid*", "resultado": TraceResult.SCRAP.value},
+        headers=headers,
+    )
+    assert [e["observaciones"] for e in res.json()["items"]] == ["Porosidad en soldadura"]
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "porosidad", "resultado": TraceResult.OK.value},
+        headers=headers,
+    )
+    assert res.json()["items"] == []
+
+def test_search_trace_events_invalid_cursor():
+    token = get_admin_token()
+
+    res = client.get(
+        f"{BASE_URL}/search",
+        params={"q": "rayon", "cursor": "no-es-un-cursor"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 400
+
+def test_list_trace_events_sparse_fields():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    res = client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers)
+    assert res.status_code == 201
+
+    res = client.get(
+        BASE_URL + "/",
+        params={"fields": "part_id,resultado"},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    assert res.json() == [{"part_id": "PZA-100", "resultado": "OK"}]
+
+def test_create_trace_event_serves_station_check_from_registry():
+    from sqlalchemy import event as sa_event
+
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers).status_code == 201
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers)
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record)
+
+    assert res.status_code == 201
+    assert not [s for s in statements if "FROM stations" in s]
+
+def test_create_trace_event_serves_principal_from_cache():
+    from sqlalchemy import event as sa_event
+
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers).status_code == 201
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers)
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record)
+
+    assert res.status_code == 201
+    assert not [s for s in statements if "FROM users" in s]
+
+def test_create_trace_event_skips_table_versions():
+    from sqlalchemy import event as sa_event
+
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers)
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", record)
+
+    # nadie lee la versión de trace_events ni de parts: la ingesta no la escribe
+    assert res.status_code == 201
+    assert not [s for s in statements if "table_versions" in s]
+
+def test_station_registry_sees_stations_created_by_other_workers():
+    from app.models.models import bump_table_versions
+
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers).status_code == 201
+
+    # otro proceso: escribe la estación y su versión sin pasar por esta sesión
+    with engine.begin() as conn:
+        conn.execute(
+            Station.__table__.insert().values(
+                id=2, nombre="Estación Remota", tipo="PRUEBA", linea="Línea 2"
+            )
+        )
+        bump_table_versions(conn, {"stations"})
+
+    payload = _build_valid_payload()
+    payload["station_id"] = 2
+    res = client.post(BASE_URL + "/", json=payload, headers=headers)
+    assert res.status_code == 201
+
+def test_create_trace_event_with_async_engine():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+    from app.core.database import get_async_db, get_async_runner, get_db_runner
+
+    # NullPool: TestClient abre un event loop por petición
+    async_engine = create_async_engine(
+        "sqlite+aiosqlite:///./test_db.sqlite", poolclass=NullPool
+    )
+    AsyncTestingSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_db_runner] = get_async_runner
+    try:
+        res = client.post(BASE_URL + "/", json=_build_valid_payload(), headers=headers)
+        assert res.status_code == 201, res.text
+        assert res.json()["part_id"] == "PZA-100"
+
+        res = client.get("/api/parts/PZA-100", headers=headers)
+        assert res.status_code == 200
+        assert res.json()["status"] == PartStatus.COMPLETED.value
+
+        res = client.get("/api/parts/PZA-100/history", headers=headers)
+        assert res.status_code == 200
+        assert len(res.json()) == 1
+
+        res = client.get("/api/metrics/station-load", headers=headers)
+        assert res.status_code == 200
+    finally:
+        del app.dependency_overrides[get_async_db]
+        del app.dependency_overrides[get_db_runner]
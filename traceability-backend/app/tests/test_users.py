@@ -219,4 +219,111 @@ def test_delete_user_success_soft_delete():
     assert res_check.status_code == 200
     body = res_check.json()
     assert body["id"] == 3
-    assert body["activo"] is False
\ No newline at end of file
+    assert body["activo"] is False
+def test_list_users_sparse_fields_never_exposes_password_hash():
+    token = get_admin_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.get(BASE_URL + "/", params={"fields": "id,email", "activo": True}, headers=headers)
+    assert res.status_code == 200
+    assert res.json() == [
+        {"id": 1, "email": "admin@example.com"},
+        {"id": 2, "email": "sup1@example.com"},
+    ]
+
+    res = client.get(BASE_URL + "/", params={"fields": "id,password_hash"}, headers=headers)
+    assert res.status_code == 400
+
+def test_deactivated_user_loses_access_immediately():
+    sup = client.post(
+        "/api/auth/login",
+        data={"username": "sup1@example.com", "password": "sup123"},
+    ).json()["access_token"]
+    sup_headers = {"Authorization": f"Bearer {sup}"}
+    assert client.get("/api/auth/me", headers=sup_headers).status_code == 200
+
+    token = get_admin_token()
+    res = client.patch(
+        f"{BASE_URL}/2",
+        json={"activo": False},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+
+    assert client.get("/api/auth/me", headers=sup_headers).status_code == 401
+
+def test_role_change_applies_to_cached_principal():
+    sup = client.post(
+        "/api/auth/login",
+        data={"username": "sup1@example.com", "password": "sup123"},
+    ).json()["access_token"]
+    sup_headers = {"Authorization": f"Bearer {sup}"}
+    assert client.get(BASE_URL + "/", headers=sup_headers).status_code == 403
+
+    token = get_admin_token()
+    res = client.patch(
+        f"{BASE_URL}/2",
+        json={"rol": "ADMIN"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+
+    assert client.get(BASE_URL + "/", headers=sup_headers).status_code == 200
+
+def test_principal_cache_sees_users_changed_by_other_workers(monkeypatch):
+    from app.models.models import bump_table_versions
+    from app.services.principal_cache import principal_cache
+
+    sup = client.post(
+        "/api/auth/login",
+        data={"username": "sup1@example.com", "password": "sup123"},
+    ).json()["access_token"]
+    sup_headers = {"Authorization": f"Bearer {sup}"}
+    assert client.get("/api/auth/me", headers=sup_headers).status_code == 200
+
+    # otro proceso desactiva al usuario sin pasar por este router
+    with engine.begin() as conn:
+        conn.execute(User.__table__.update().where(User.id == 2).values(activo=False))
+        bump_table_versions(conn, {"users"})
+
+    monkeypatch.setattr(principal_cache, "check_interval", 0)
+    assert client.get("/api/auth/me", headers=sup_headers).status_code == 401
+
+def test_me_rejects_cached_principal_of_deleted_user():
+    from app.services.principal_cache import principal_cache
+
+    sup = client.post(
+        "/api/auth/login",
+        data={"username": "sup1@example.com", "password": "sup123"},
+    ).json()["access_token"]
+    sup_headers = {"Authorization": f"Bearer {sup}"}
+    assert client.get("/api/auth/me", headers=sup_headers).status_code == 200
+
+    # borrado sin ORM ni table_versions: el principal sigue en el cache
+    with engine.begin() as conn:
+        conn.execute(User.__table__.delete().where(User.id == 2))
+
+    res = client.get("/api/auth/me", headers=sup_headers)
+    assert res.status_code == 401
+    assert not [key for key in principal_cache._entries if key[1] == 2]
+    assert client.get("/api/auth/me", headers=sup_headers).status_code == 401
+
+def test_deactivation_signs_out_existing_sessions():
+    def sup_login():
+        return client.post(
+            "/api/auth/login",
+            data={"username": "sup1@example.com", "password": "sup123"},
+        ).json()["access_token"]
+
+    old_headers = {"Authorization": f"Bearer {sup_login()}"}
+    admin_headers = {"Authorization": f"Bearer {get_admin_token()}"}
+
+    assert client.patch(f"{BASE_URL}/2", json={"activo": False}, headers=admin_headers).status_code == 200
+    assert client.patch(f"{BASE_URL}/2", json={"activo": True}, headers=admin_headers).status_code == 200
+
+    res = client.get("/api/auth/me", headers=old_headers)
+    assert res.status_code == 401
+    assert res.json()["detail"] == "Token revocado"
+
+    res = client.get("/api/auth/me", headers={"Authorization": f"Bearer {sup_login()}"})
+    assert res.status_code == 200
@@ -0,0 +1,150 @@
+"""
+Carga de 500 peticiones concurrentes sobre las rutas calientes (lectura de
+piezas, historial, métricas e ingesta) con la capa de BD sync (threadpool)
+y la async (aiosqlite), sobre la misma app y los mismos datos.
+
+Uso:
+    python -m benchmarks.bench_async_load --concurrency 500 --rounds 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import (
+    Base,
+    async_database_url,
+    get_async_db,
+    get_async_runner,
+    get_db,
+    get_db_runner,
+    get_sync_runner,
+)
+from app.main import app
+from app.models.models import User, UserRole
+from app.services.auth_service import create_access_token, get_password_hash
+from benchmarks.bench_list_serialization import populate
+
+
+def requests_for(i: int):
+    # 10% ingesta, el resto lecturas
+    part_id = f"PZA-{i % 1000:06d}"
+    kind = i % 10
+    if kind == 0:
+        start = datetime(2024, 6, 1) + timedelta(seconds=i)
+        return "POST", "/api/trace-events/", {
+            "part_id": part_id,
+            "station_id": 1,
+            "timestamp_entrada": start.isoformat(),
+            "timestamp_salida": (start + timedelta(seconds=30)).isoformat(),
+            "resultado": "OK",
+        }
+    if kind < 5:
+        return "GET", f"/api/parts/{part_id}", None
+    if kind < 8:
+        return "GET", f"/api/parts/{part_id}/history", None
+    return "GET", "/api/metrics/station-load", None
+
+
+async def load(concurrency: int, headers: dict):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def one(i: int) -> float:
+            method, url, body = requests_for(i)
+            start = time.perf_counter()
+            res = await client.request(method, url, json=body, headers=headers)
+            assert res.status_code in (200, 201), (url, res.status_code, res.text)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(concurrency)))
+        return time.perf_counter() - start, sorted(latencies)
+
+
+def report(label: str, elapsed: float, latencies) -> None:
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(
+        f"{label:>6}: {len(latencies) / elapsed:7.1f} req/s  "
+        f"p50 {pct(0.50):7.1f} ms  p95 {pct(0.95):7.1f} ms  p99 {pct(0.99):7.1f} ms  "
+        f"media {statistics.mean(latencies) * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_async_load.sqlite")
+    url = f"sqlite:///{path}"
+    # en modo sync cada petición retiene su conexión mientras espera hilo del
+    # threadpool; con menos conexiones que peticiones en vuelo los hilos se
+    # bloquean en checkout y nadie libera (timeout). Mismo pool para ambos modos.
+    pool = {"pool_size": args.concurrency, "max_overflow": 0}
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **pool)
+    Base.metadata.create_all(bind=engine)
+    populate(engine, args.rows)
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{
+                "id": 1,
+                "nombre": "Bench",
+                "email": "bench@example.com",
+                "password_hash": get_password_hash("bench123"),
+                "rol": UserRole.ADMIN,
+                "activo": True,
+            }],
+        )
+
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=create_async_engine(async_database_url(url), **pool),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+
+    async def run_all():
+        for label, runner in (("sync", get_sync_runner), ("async", get_async_runner)):
+            app.dependency_overrides[get_db_runner] = runner
+            await load(50, headers)  # calentamiento: pools y caches
+            for _ in range(args.rounds):
+                elapsed, latencies = await load(args.concurrency, headers)
+                report(label, elapsed, latencies)
+
+    print(f"{args.concurrency} peticiones concurrentes, {args.rows} piezas")
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Latencia de peticiones autenticadas según cuántas hay en vuelo, con la
+dependencia de autenticación bloqueando el event loop (async def con
+consulta síncrona, como antes) contra la actual (la consulta corre en el
+threadpool).
+
+SQLite local responde en microsegundos, así que se simula la latencia de un
+servidor de BD con --db-latency-ms por sentencia. El cache de usuarios
+autenticados se desactiva para que cada petición consulte users.
+
+Uso:
+    python -m benchmarks.bench_concurrency --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base
+from app.models.models import User, UserRole
+from app.services.auth_service import (
+    authenticate_token,
+    create_access_token,
+    get_current_user,
+    get_password_hash,
+    oauth2_scheme,
+)
+from app.core.database import get_db
+from app.services.principal_cache import Principal, principal_cache
+
+
+def build_app(SessionLocal) -> FastAPI:
+    app = FastAPI()
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async def blocking_current_user(
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db),
+    ) -> Principal:
+        # la versión anterior: la consulta corre dentro del event loop
+        return authenticate_token(db, token)
+
+    @app.get("/before")
+    async def before(user: Principal = Depends(blocking_current_user)):
+        return {"id": user.id}
+
+    @app.get("/after")
+    async def after(user: Principal = Depends(get_current_user)):
+        return {"id": user.id}
+
+    return app
+
+
+async def burst(client: httpx.AsyncClient, url: str, in_flight: int, headers: dict) -> float:
+    async def one() -> float:
+        start = time.perf_counter()
+        res = await client.get(url, headers=headers)
+        assert res.status_code == 200, res.text
+        return time.perf_counter() - start
+
+    latencies = await asyncio.gather(*(one() for _ in range(in_flight)))
+    return sum(latencies) * 1000 / len(latencies)
+
+
+async def run(app: FastAPI, headers: dict, levels) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'en vuelo':>9} {'antes (ms)':>12} {'después (ms)':>13}")
+        for in_flight in levels:
+            before = await burst(client, "/before", in_flight, headers)
+            after = await burst(client, "/after", in_flight, headers)
+            print(f"{in_flight:>9} {before:>12.1f} {after:>13.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--levels", default="1,10,50,100")
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",")]
+    path = os.path.join(tempfile.mkdtemp(), "bench_concurrency.sqlite")
+    # una conexión por petición en vuelo: si el pool se agota dentro del event
+    # loop, la versión bloqueante se queda esperando hasta el timeout
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=max(levels),
+        max_overflow=0,
+    )
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{
+                "id": 1,
+                "nombre": "Bench",
+                "email": "bench@example.com",
+                "password_hash": get_password_hash("bench123"),
+                "rol": UserRole.ADMIN,
+                "activo": True,
+            }],
+        )
+
+    delay = args.db_latency_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def simulate_latency(conn, cursor, statement, *rest):
+        time.sleep(delay)
+
+    principal_cache.ttl = 0
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    asyncio.run(run(build_app(sessionmaker(bind=engine)), headers, levels))
+
+
+if __name__ == "__main__":
+    main()
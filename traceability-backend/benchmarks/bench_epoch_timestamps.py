@@ -0,0 +1,116 @@
+"""
+Timestamps como texto ISO (columnas DateTime de SQLite) contra su copia en
+milisegundos desde 1970 (columnas *_ms): tamaño de índice, filtros por rango
+y agrupación por día.
+
+Uso:
+    python -m benchmarks.bench_epoch_timestamps --rows 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import create_engine, func, select, text
+
+from app.core.database import Base
+from app.models.models import MS_PER_DAY, Part, TraceEvent, epoch_ms
+from benchmarks.bench_list_serialization import populate
+
+
+def index_sizes(engine) -> dict:
+    # dbstat no siempre viene compilado en SQLite
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")
+            ).all()
+    except Exception:
+        return {}
+    return dict(rows)
+
+
+def timed(engine, statement, repeat: int):
+    with engine.connect() as conn:
+        result = conn.execute(statement).all()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = conn.execute(statement).all()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_epoch.sqlite")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    populate(engine, args.rows)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+    sizes = index_sizes(engine)
+    if sizes:
+        for text_index, ms_index in (
+            ("ix_trace_events_timestamp_entrada", "ix_trace_events_timestamp_entrada_ms"),
+            ("ix_trace_events_timestamp_salida", "ix_trace_events_timestamp_salida_ms"),
+        ):
+            print(
+                f"{text_index:>36}: {sizes[text_index] / 1024:8.0f} KiB  "
+                f"*_ms {sizes[ms_index] / 1024:8.0f} KiB"
+            )
+    else:
+        print("dbstat no disponible: se omite el tamaño de índices")
+
+    desde = datetime(2024, 1, 1, 8)
+    hasta = datetime(2024, 1, 2, 8)
+    events = TraceEvent
+    cases = [
+        (
+            "rango eventos",
+            select(func.count()).where(
+                events.timestamp_entrada >= desde, events.timestamp_salida <= hasta
+            ),
+            select(func.count()).where(
+                events.timestamp_entrada_ms >= epoch_ms(desde),
+                events.timestamp_salida_ms <= epoch_ms(hasta),
+            ),
+        ),
+        (
+            "tiempo de ciclo",
+            select(
+                func.sum(
+                    (func.julianday(events.timestamp_salida) - func.julianday(events.timestamp_entrada))
+                    * 86400.0
+                )
+            ),
+            select(func.sum(events.timestamp_salida_ms - events.timestamp_entrada_ms) / 1000.0),
+        ),
+        (
+            "piezas por día",
+            select(func.date(Part.fecha_creacion), func.count()).group_by(
+                func.date(Part.fecha_creacion)
+            ),
+            select(Part.fecha_creacion_ms // MS_PER_DAY, func.count()).group_by(
+                Part.fecha_creacion_ms // MS_PER_DAY
+            ),
+        ),
+    ]
+    for label, before, after in cases:
+        before_ms, before_rows = timed(engine, before, args.repeat)
+        after_ms, after_rows = timed(engine, after, args.repeat)
+        assert len(before_rows) == len(after_rows), f"{label}: resultados distintos"
+        print(
+            f"{label:>16}: texto {before_ms:8.2f} ms  *_ms {after_ms:8.2f} ms  "
+            f"x{before_ms / after_ms:4.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
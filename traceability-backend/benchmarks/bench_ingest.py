@@ -0,0 +1,130 @@
+"""
+Mide las sentencias SQL por petición de ingesta (POST /api/trace-events/)
+con el cache de usuarios autenticados activo y desactivado (ttl=0), y con
+una API key de estación.
+
+Uso:
+    python -m benchmarks.bench_ingest --requests 500
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.models import Part, PartStatus, Station, StationType, User, UserRole
+from app.services.auth_service import get_password_hash
+from app.services.principal_cache import principal_cache
+
+
+def populate(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{
+                "nombre": "Bench",
+                "email": "bench@example.com",
+                "password_hash": get_password_hash("bench123"),
+                "rol": UserRole.ADMIN,
+                "activo": True,
+            }],
+        )
+        conn.execute(
+            Station.__table__.insert(),
+            [{"id": 1, "nombre": "Ensamble", "tipo": StationType.ENSAMBLE, "linea": "Línea 1"}],
+        )
+        conn.execute(
+            Part.__table__.insert(),
+            [{"id": "PZA-BENCH", "tipo_pieza": "X1", "lote": "L001", "status": PartStatus.IN_PROCESS}],
+        )
+
+
+def payload(i: int) -> dict:
+    start = datetime(2024, 1, 1, 6, 0, 0) + timedelta(minutes=i)
+    return {
+        "part_id": "PZA-BENCH",
+        "station_id": 1,
+        "timestamp_entrada": start.isoformat(),
+        "timestamp_salida": (start + timedelta(seconds=42)).isoformat(),
+        "resultado": "OK",
+    }
+
+
+def run(client: TestClient, engine, headers: dict, total: int):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    start = time.perf_counter()
+    try:
+        for i in range(total):
+            res = client.post("/api/trace-events/", json=payload(i), headers=headers)
+            assert res.status_code == 201, res.text
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    users = sum(1 for s in statements if "FROM users" in s)
+    return len(statements) / total, users / total, elapsed_ms / total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_ingest.sqlite")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    populate(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    token = client.post(
+        "/api/auth/login",
+        data={"username": "bench@example.com", "password": "bench123"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    ttl = principal_cache.ttl
+    for label, cache_ttl in (("sin cache", 0), ("con cache", ttl)):
+        principal_cache.ttl = cache_ttl
+        principal_cache.clear()
+        per_request, users, ms = run(client, engine, headers, args.requests)
+        print(
+            f"{label:>10}: {per_request:5.2f} sentencias/petición "
+            f"({users:4.2f} sobre users)  {ms:6.2f} ms/petición"
+        )
+    principal_cache.ttl = ttl
+
+    key = client.post(
+        "/api/api-keys/",
+        json={"nombre": "Gateway", "station_id": 1},
+        headers=headers,
+    ).json()["key"]
+    per_request, users, ms = run(client, engine, {"X-API-Key": key}, args.requests)
+    print(
+        f"{'API key':>10}: {per_request:5.2f} sentencias/petición "
+        f"({users:4.2f} sobre users)  {ms:6.2f} ms/petición"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Compara la serialización de listados: modelos pydantic + response_model
+(camino anterior) contra RowsJSONResponse sobre tuplas (camino actual).
+
+Uso:
+    python -m benchmarks.bench_list_serialization --rows 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base
+from app.core.projection import schema_fields
+from app.core.serialization import RowsJSONResponse, orjson
+from app.models.models import Part, PartStatus, Station, StationType, TraceEvent, TraceResult
+from app.schemas.schemas import PartRead, TraceEventRead
+from app.services.part_service import list_parts, list_parts_fields
+from app.services.trace_event_service import list_trace_events, list_trace_events_fields
+
+
+def populate(engine, total: int) -> None:
+    start = datetime(2024, 1, 1, 6, 0, 0)
+    results = list(TraceResult)
+    with engine.begin() as conn:
+        conn.execute(
+            Station.__table__.insert(),
+            [{"id": 1, "nombre": "Ensamble", "tipo": StationType.ENSAMBLE, "linea": "Línea 1"}],
+        )
+        conn.execute(
+            Part.__table__.insert(),
+            [
+                {
+                    "id": f"PZA-{i:06d}",
+                    "tipo_pieza": "X1",
+                    "lote": f"L{i // 500:03d}",
+                    "status": PartStatus.IN_PROCESS,
+                    "fecha_creacion": start + timedelta(seconds=i, microseconds=i % 7),
+                    "num_retrabajos": i % 3,
+                    "tiempo_total_segundos": i * 1.37,
+                    "ultima_estacion_id": 1 if i % 2 else None,
+                }
+                for i in range(total)
+            ],
+        )
+        conn.execute(
+            TraceEvent.__table__.insert(),
+            [
+                {
+                    "part_id": f"PZA-{i:06d}",
+                    "station_id": 1,
+                    "timestamp_entrada": start + timedelta(seconds=i),
+                    "timestamp_salida": start + timedelta(seconds=i + 42, microseconds=i),
+                    "resultado": results[i % len(results)],
+                    "operador_id": None,
+                    "observaciones": f"Observación #{i}" if i % 4 else None,
+                }
+                for i in range(total)
+            ],
+        )
+
+
+def build_app(SessionLocal) -> FastAPI:
+    app = FastAPI()
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/before/parts", response_model=List[PartRead])
+    def parts_before(limit: int, db: Session = Depends(get_db)):
+        return [
+            PartRead(
+                id=p.id,
+                tipo_pieza=p.tipo_pieza,
+                lote=p.lote,
+                status=p.status,
+                fecha_creacion=p.fecha_creacion,
+                num_retrabajos=p.num_retrabajos,
+                tiempo_total_segundos=p.tiempo_total_segundos,
+                ultima_estacion_id=p.ultima_estacion_id,
+            )
+            for p in list_parts(db, limit=limit)
+        ]
+
+    @app.get("/after/parts", response_model=List[PartRead])
+    def parts_after(limit: int, db: Session = Depends(get_db)):
+        columns = schema_fields(PartRead)
+        return RowsJSONResponse(list_parts_fields(db, columns, limit=limit), keys=columns)
+
+    @app.get("/before/trace-events", response_model=List[TraceEventRead])
+    def events_before(limit: int, db: Session = Depends(get_db)):
+        return [
+            TraceEventRead(
+                id=e.id,
+                part_id=e.part_id,
+                station_id=e.station_id,
+                timestamp_entrada=e.timestamp_entrada,
+                timestamp_salida=e.timestamp_salida,
+                resultado=e.resultado,
+                operador_id=e.operador_id,
+                observaciones=e.observaciones,
+            )
+            for e in list_trace_events(db, limit=limit)
+        ]
+
+    @app.get("/after/trace-events", response_model=List[TraceEventRead])
+    def events_after(limit: int, db: Session = Depends(get_db)):
+        columns = schema_fields(TraceEventRead)
+        return RowsJSONResponse(
+            list_trace_events_fields(db, columns, limit=limit), keys=columns
+        )
+
+    return app
+
+
+def timed(client: TestClient, url: str, repeat: int):
+    body = client.get(url).content
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = client.get(url).content
+    return (time.perf_counter() - start) * 1000 / repeat, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_serialization.sqlite")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    populate(engine, args.rows)
+
+    client = TestClient(build_app(sessionmaker(bind=engine)))
+    print(f"encoder: {'orjson' if orjson is not None else 'json (stdlib)'}")
+
+    for resource in ("parts", "trace-events"):
+        url = f"/{{}}/{resource}?limit={args.rows}"
+        before_ms, before = timed(client, url.format("before"), args.repeat)
+        after_ms, after = timed(client, url.format("after"), args.repeat)
+        assert before == after, f"{resource}: la salida no es idéntica byte a byte"
+        print(
+            f"{resource:>13}: antes {before_ms:8.1f} ms  después {after_ms:8.1f} ms  "
+            f"x{before_ms / after_ms:4.1f}  ({len(after)} bytes idénticos)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Inicio de turno: N logins simultáneos mientras llegan eventos de ingesta.
+Compara la latencia de ingesta con el pbkdf2 en el threadpool (workers=0,
+como antes) y en el pool de procesos.
+
+Uso:
+    python -m benchmarks.bench_login_storm --logins 200 --ingest 200 --workers 2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, get_db
+from app.core.hashing import password_hasher
+from app.main import app
+from app.models.models import Part, PartStatus, Station, StationType, User, UserRole
+from app.services.auth_service import create_access_token, get_password_hash
+
+
+def populate(engine, operators: int) -> None:
+    password_hash = get_password_hash("turno123")
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [
+                {
+                    "id": i + 1,
+                    "nombre": f"Operador {i}",
+                    "email": f"op{i}@example.com",
+                    "password_hash": password_hash,
+                    "rol": UserRole.OPERADOR,
+                    "activo": True,
+                }
+                for i in range(operators)
+            ],
+        )
+        conn.execute(
+            Station.__table__.insert(),
+            [{"id": 1, "nombre": "Ensamble", "tipo": StationType.ENSAMBLE, "linea": "Línea 1"}],
+        )
+        conn.execute(
+            Part.__table__.insert(),
+            [{"id": "PZA-TURNO", "tipo_pieza": "X1", "lote": "L001", "status": PartStatus.IN_PROCESS}],
+        )
+
+
+async def storm(logins: int, ingest: int, headers: dict):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+
+        async def login(i: int) -> int:
+            res = await client.post(
+                "/api/auth/login",
+                data={"username": f"op{i}@example.com", "password": "turno123"},
+            )
+            return res.status_code
+
+        async def post_event(i: int) -> float:
+            await asyncio.sleep(i * 0.005)
+            start_ts = datetime(2024, 1, 1, 6) + timedelta(seconds=i)
+            start = time.perf_counter()
+            res = await client.post(
+                "/api/trace-events/",
+                json={
+                    "part_id": "PZA-TURNO",
+                    "station_id": 1,
+                    "timestamp_entrada": start_ts.isoformat(),
+                    "timestamp_salida": (start_ts + timedelta(seconds=30)).isoformat(),
+                    "resultado": "RETRABAJO",
+                },
+                headers=headers,
+            )
+            assert res.status_code == 201, res.text
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            asyncio.gather(*(login(i) for i in range(logins))),
+            asyncio.gather(*(post_event(i) for i in range(ingest))),
+        )
+        return time.perf_counter() - start, results[0], sorted(results[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--ingest", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_login_storm.sqlite")
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=args.logins + args.ingest,
+    )
+    Base.metadata.create_all(bind=engine)
+    populate(engine, args.logins)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    password_hasher.max_pending = args.logins
+
+    for label, workers in (("threadpool", 0), (f"{args.workers} procesos", args.workers)):
+        password_hasher.shutdown()
+        password_hasher.workers = workers
+        password_hasher.hash_many(["calentamiento"] * max(workers, 1))
+        elapsed, statuses, latencies = asyncio.run(storm(args.logins, args.ingest, headers))
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(
+            f"{label:>12}: logins ok {statuses.count(200)}/{len(statuses)} en {elapsed:5.2f} s  "
+            f"ingesta p50 {p50:7.1f} ms  p99 {p99:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
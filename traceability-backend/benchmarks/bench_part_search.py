@@ -0,0 +1,72 @@
+"""
+Latencia de /api/parts/search sobre muchos seriales.
+
+Uso:
+    python -m benchmarks.bench_part_search --parts 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.models import Part
+from app.services.part_service import search_parts
+
+
+def populate(engine, total: int, batch: int = 100_000) -> None:
+    insert = Part.__table__.insert()
+    with engine.begin() as conn:
+        for start in range(0, total, batch):
+            rows = [
+                {
+                    "id": f"PZA-{i:08d}",
+                    "tipo_pieza": f"X{i % 7}",
+                    "lote": f"L{i // 5000:05d}",
+                    "status": "IN_PROCESS",
+                    "num_retrabajos": 0,
+                    "tiempo_total_segundos": 0.0,
+                }
+                for i in range(start, min(start + batch, total))
+            ]
+            conn.execute(insert, rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parts", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_search.sqlite")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    start = time.perf_counter()
+    populate(engine, args.parts)
+    print(f"insertadas {args.parts} piezas en {time.perf_counter() - start:.1f}s")
+
+    Session = sessionmaker(bind=engine)
+    queries = [
+        ("PZA-0012", "prefix"),
+        ("0004321", "substring"),
+        ("L00042", "prefix"),
+        ("PZA-00999999", "prefix"),
+    ]
+    with Session() as db:
+        for q, mode in queries:
+            search_parts(db, q, mode=mode)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                found = search_parts(db, q, mode=mode)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / args.repeat
+            print(f"{mode:>9} {q!r:>16}: {elapsed_ms:6.2f} ms ({len(found)} resultados)")
+
+
+if __name__ == "__main__":
+    main()
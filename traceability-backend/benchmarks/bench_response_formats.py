@@ -0,0 +1,77 @@
+"""
+Tamaño y tiempo de codificación/decodificación de los formatos negociables
+(JSON, msgpack, JSON columnar) para un listado grande de eventos.
+
+Uso:
+    python -m benchmarks.bench_response_formats --rows 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.core.database import Base
+from app.core.negotiation import COLUMNAR_JSON, JSON, MSGPACK, msgpack, rows_response
+from app.core.projection import schema_fields
+from app.schemas.schemas import TraceEventRead
+from app.services.trace_event_service import list_trace_events_fields
+from benchmarks.bench_list_serialization import populate
+
+
+def fake_request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+def decoder(media_type: str):
+    if media_type == MSGPACK:
+        return msgpack.unpackb
+    return json.loads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_formats.sqlite")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    populate(engine, args.rows)
+
+    columns = schema_fields(TraceEventRead)
+    with sessionmaker(bind=engine)() as db:
+        rows = list_trace_events_fields(db, columns, limit=args.rows)
+
+    formats = [JSON, COLUMNAR_JSON] + ([MSGPACK] if msgpack is not None else [])
+    baseline = None
+    for media_type in formats:
+        request = fake_request(media_type)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            body = rows_response(request, rows, keys=columns).body
+        encode_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        decode = decoder(media_type)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            decode(body)
+        decode_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        baseline = baseline or len(body)
+        print(
+            f"{media_type:>44}: {len(body) / 1024:9.0f} KiB ({len(body) / baseline:4.0%})  "
+            f"encode {encode_ms:7.1f} ms  decode {decode_ms:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Lecturas y escrituras concurrentes sobre SQLite con el engine por defecto
+(journal DELETE, synchronous FULL) y con el perfil de producción
+(app/core/sqlite_profile.py: WAL, synchronous NORMAL, mmap, ...).
+
+Uso:
+    python -m benchmarks.bench_sqlite_profile --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import create_engine, exc, func, select
+
+from app.core.database import Base
+from app.core.sqlite_profile import configure_sqlite
+from app.models.models import TraceEvent, TraceResult
+from benchmarks.bench_list_serialization import populate
+
+
+def workload(engine, readers: int, writers: int, seconds: float):
+    stop = time.monotonic() + seconds
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(i: int):
+        while time.monotonic() < stop:
+            part_id = f"PZA-{(i * 7919 + counts['reads']) % 10000:06d}"
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        select(TraceEvent.id, TraceEvent.resultado)
+                        .where(TraceEvent.part_id == part_id)
+                    ).all()
+                    conn.execute(
+                        select(TraceEvent.station_id, func.count())
+                        .where(TraceEvent.timestamp_entrada >= datetime(2024, 1, 1, 8))
+                        .group_by(TraceEvent.station_id)
+                    ).all()
+                count("reads")
+            except exc.OperationalError:
+                count("locked")
+
+    def writer(i: int):
+        n = 0
+        while time.monotonic() < stop:
+            ts = datetime(2024, 6, 1) + timedelta(seconds=n)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        TraceEvent.__table__.insert().values(
+                            part_id=f"PZA-{n % 10000:06d}",
+                            station_id=1,
+                            timestamp_entrada=ts,
+                            timestamp_salida=ts + timedelta(seconds=30),
+                            resultado=TraceResult.OK,
+                        )
+                    )
+                count("writes")
+            except exc.OperationalError:
+                count("locked")
+            n += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    for label, tuned in (("por defecto", False), ("perfil", True)):
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, f'bench_{int(tuned)}.sqlite')}",
+            connect_args={"check_same_thread": False},
+            pool_size=args.readers + args.writers,
+        )
+        if tuned:
+            configure_sqlite(engine)
+        Base.metadata.create_all(bind=engine)
+        populate(engine, args.rows)
+
+        counts = workload(engine, args.readers, args.writers, args.seconds)
+        print(
+            f"{label:>12}: lecturas {counts['reads'] / args.seconds:8.1f}/s  "
+            f"escrituras {counts['writes'] / args.seconds:7.1f}/s  "
+            f"'database is locked' {counts['locked']}"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+CPU por llamada de las consultas calientes armadas en cada llamada con
+db.query() (camino anterior) contra las lambda_stmt cacheadas de los
+servicios (camino actual), y tasa de aciertos de la caché de sentencias.
+
+Uso:
+    python -m benchmarks.bench_statement_cache --rows 2000 --repeat 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.pool_telemetry import instrument_engine, pool_options
+from app.core.projection import schema_fields, select_fields
+from app.core.telemetry import telemetry
+from app.models.models import Part, Station, TraceEvent, TraceEventRollup, User, epoch_ms
+from app.schemas.schemas import TraceEventRead
+from app.services.auth_service import get_user_by_id
+from app.services.metrics_service import parts_by_status_totals, station_load_totals
+from app.services.part_service import get_part
+from app.services.partition_service import trace_events_source
+from app.services.station_service import get_station
+from app.services.trace_event_service import list_trace_events_fields
+from benchmarks.bench_list_serialization import populate
+
+FROM_TS = datetime(2024, 1, 1, 6, 10)
+FIELDS = schema_fields(TraceEventRead)
+
+
+def before_list_trace_events(db: Session):
+    stmt = select_fields(TraceEvent, FIELDS).filter(
+        TraceEvent.station_id == 1,
+        TraceEvent.timestamp_entrada_ms >= epoch_ms(FROM_TS),
+    )
+    return db.execute(stmt.order_by(TraceEvent.timestamp_entrada_ms.asc()).limit(50)).all()
+
+
+def before_station_load(db: Session):
+    # misma forma que station_load_totals: fuente con particiones + agregados archivados
+    events = trace_events_source(db, FROM_TS, None)
+    counts = dict(
+        db.query(events.station_id, func.count(events.id))
+        .filter(events.timestamp_entrada_ms >= epoch_ms(FROM_TS))
+        .group_by(events.station_id)
+        .all()
+    )
+    rollups = (
+        db.query(
+            TraceEventRollup.station_id,
+            TraceEventRollup.tipo_pieza,
+            func.sum(TraceEventRollup.eventos).label("eventos"),
+            func.sum(TraceEventRollup.scrap).label("scrap"),
+            func.sum(TraceEventRollup.segundos_ciclo).label("segundos_ciclo"),
+        )
+        .filter(TraceEventRollup.dia >= FROM_TS.date())
+        .group_by(TraceEventRollup.station_id, TraceEventRollup.tipo_pieza)
+        .all()
+    )
+    for r in rollups:
+        counts[r.station_id] = counts.get(r.station_id, 0) + r.eventos
+    return counts
+
+
+def before_parts_by_status(db: Session):
+    return dict(
+        db.query(Part.status, func.count(Part.id))
+        .filter(Part.tipo_pieza == "X1")
+        .group_by(Part.status)
+        .all()
+    )
+
+
+CASES = [
+    (
+        "get_part",
+        lambda db: db.query(Part).filter(Part.id == "PZA-000042").first(),
+        lambda db: get_part(db, "PZA-000042"),
+    ),
+    (
+        "get_station",
+        lambda db: db.query(Station).filter(Station.id == 1).first(),
+        lambda db: get_station(db, 1),
+    ),
+    (
+        "get_user_by_id",
+        lambda db: db.query(User).filter(User.id == 1).first(),
+        lambda db: get_user_by_id(db, 1),
+    ),
+    (
+        "list_trace_events",
+        before_list_trace_events,
+        lambda db: list_trace_events_fields(db, FIELDS, station_id=1, from_ts=FROM_TS, limit=50),
+    ),
+    (
+        "station_load",
+        before_station_load,
+        lambda db: station_load_totals(db, FROM_TS, None),
+    ),
+    (
+        "parts_by_status",
+        before_parts_by_status,
+        lambda db: parts_by_status_totals(db, tipo_pieza="X1"),
+    ),
+]
+
+
+def cpu_per_call(engine, fn, repeat: int) -> float:
+    with Session(engine) as db:
+        fn(db)
+        start = time.process_time()
+        for _ in range(repeat):
+            fn(db)
+            # sin mapa de identidad caliente: cada llamada materializa de nuevo
+            db.expunge_all()
+        return (time.process_time() - start) * 1_000_000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=2_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_statement_cache.sqlite")
+    engine = create_engine(f"sqlite:///{path}", **pool_options("bench.db"))
+    instrument_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    populate(engine, args.rows)
+    with engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [{"id": 1, "nombre": "Admin", "email": "admin@example.com", "password_hash": "x"}],
+        )
+
+    for label, before, after in CASES:
+        with Session(engine) as db:
+            assert before(db) == after(db), f"{label}: resultados distintos"
+        before_us = cpu_per_call(engine, before, args.repeat)
+        after_us = cpu_per_call(engine, after, args.repeat)
+        print(
+            f"{label:>18}: antes {before_us:8.1f} µs  después {after_us:8.1f} µs  "
+            f"ahorro {before_us - after_us:7.1f} µs/llamada"
+        )
+
+    gauges = telemetry.snapshot()["gauges"]
+    print(
+        f"caché de sentencias: {gauges['bench.db.statement_cache.size']} entradas, "
+        f"aciertos {gauges['bench.db.statement_cache.hit_rate']:.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""
+Datos sintéticos a escala de producción para pruebas de carga y benchmarks:
+N líneas × M estaciones × K piezas por línea y día durante varios meses.
+
+Cada línea tiene una ruta fija de estaciones (inspección, ensambles, prueba,
+inspección final). Cada pieza la recorre en orden; en cada estación:
+
+- espera antes de entrar: exponencial (cola entre estaciones),
+- tiempo de ciclo: lognormal con mediana y dispersión propias de la estación,
+- resultado: SCRAP o RETRABAJO con probabilidades de la estación multiplicadas
+  por el efecto del lote (lognormal: hay lotes malos); un retrabajo repite la
+  estación (como mucho MAX_REWORKS veces) y un scrap termina la ruta.
+
+El estado de la pieza sigue la regla de la ingesta (resultado del último
+evento), así el dataset es el mismo que dejaría la API al recibir esos eventos.
+Con la misma semilla y los mismos parámetros el dataset es idéntico: cada
+(línea, día) usa su propio generador sembrado con (semilla, línea, día), así
+los días se pueden simular en paralelo (--workers) y se escriben en orden; los
+ids de evento los asigna la base en ese orden.
+
+La simulación trabaja en milisegundos enteros y produce tuplas con el texto de
+los timestamps (mismo formato que DateTime en SQLite) y las columnas *_ms ya
+calculados. Se escriben por lotes con el INSERT de Core compilado una vez y
+executemany del driver (exec_driver_sql), sin armar parámetros ni convertir
+valores fila por fila. Durante la carga se quitan los índices secundarios y
+los triggers FTS; al final se crean los índices y se reconstruye la búsqueda.
+
+Uso:
+    python -m benchmarks.synthetic_data --lines 3 --stations 6 --parts-per-day 2000 --months 3
+    python -m benchmarks.synthetic_data --url sqlite:///./load.db --seed 7
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import column, create_engine, table, text
+
+from app.migrations import upgrade
+from app.models.models import (
+    PARTS_FTS_DDL,
+    SEARCH_INDEXES,
+    TRACE_EVENTS_FTS_DDL,
+    Part,
+    PartStatus,
+    Station,
+    StationType,
+    TraceEvent,
+    TraceResult,
+    MS_PER_DAY,
+    epoch_ms,
+    ms_to_datetime,
+)
+
+BATCH_ROWS = 20_000
+MAX_REWORKS = 2
+SHIFT_START_HOUR = 6
+SHIFT_HOURS = 16
+LOT_SIZE = 250
+QUEUE_MEAN_SECONDS = 90.0
+
+OBSERVACIONES = {
+    TraceResult.SCRAP: [
+        "Fisura en la carcasa",
+        "Torque fuera de tolerancia",
+        "Soldadura incompleta",
+        "Dimensión fuera de especificación",
+    ],
+    TraceResult.RETRABAJO: [
+        "Reapriete de tornillos",
+        "Limpieza de rebaba",
+        "Reetiquetado por código ilegible",
+        "Ajuste de conector",
+    ],
+}
+
+# resultado del último evento -> estado de la pieza (regla de create_trace_event)
+STATUS_AFTER = {
+    TraceResult.OK: PartStatus.COMPLETED,
+    TraceResult.RETRABAJO: PartStatus.IN_PROCESS,
+    TraceResult.SCRAP: PartStatus.SCRAPPED,
+}
+
+
+class Profile(NamedTuple):
+    lines: int = 3
+    stations: int = 6
+    parts_per_day: int = 2000
+    months: int = 3
+    start: date = date(2025, 1, 1)
+    seed: int = 42
+
+
+class StationModel(NamedTuple):
+    id: int
+    mu: float  # log de la mediana del ciclo (segundos)
+    sigma: float
+    p_scrap: float
+    p_rework: float
+
+
+def _route_types(stations: int) -> List[StationType]:
+    if stations == 1:
+        return [StationType.ENSAMBLE]
+    middle = [StationType.ENSAMBLE] * max(stations - 3, 0) + [StationType.PRUEBA]
+    return ([StationType.INSPECCION] + middle + [StationType.INSPECCION])[:stations]
+
+
+def build_plant(profile: Profile) -> Tuple[List[dict], Dict[int, List[StationModel]]]:
+    rng = random.Random(f"{profile.seed}:planta")
+    rows: List[dict] = []
+    routes: Dict[int, List[StationModel]] = {}
+    for line in range(1, profile.lines + 1):
+        route = []
+        for position, tipo in enumerate(_route_types(profile.stations), start=1):
+            station_id = len(rows) + 1
+            rows.append(
+                {
+                    "id": station_id,
+                    "nombre": f"L{line}-{position:02d} {tipo.value.title()}",
+                    "tipo": tipo,
+                    "linea": f"Línea {line}",
+                }
+            )
+            # inspección rápida y estricta; ensamble lento con más retrabajo
+            median = {
+                StationType.INSPECCION: rng.uniform(20, 45),
+                StationType.ENSAMBLE: rng.uniform(60, 180),
+                StationType.PRUEBA: rng.uniform(90, 240),
+            }[tipo]
+            route.append(
+                StationModel(
+                    id=station_id,
+                    mu=math.log(median),
+                    sigma=rng.uniform(0.15, 0.45),
+                    p_scrap=rng.uniform(0.001, 0.008),
+                    p_rework=rng.uniform(0.01, 0.06),
+                )
+            )
+        routes[line] = route
+    return rows, routes
+
+
+def _days(profile: Profile) -> Iterator[date]:
+    month = profile.start.month - 1 + profile.months
+    end = date(profile.start.year + month // 12, month % 12 + 1, 1)
+    day = profile.start
+    while day < end:
+        yield day
+        day += timedelta(days=1)
+
+
+# orden de los valores en las tuplas que produce simulate_day
+PART_COLUMNS = (
+    "id",
+    "tipo_pieza",
+    "lote",
+    "status",
+    "fecha_creacion",
+    "fecha_creacion_ms",
+    "num_retrabajos",
+    "tiempo_total_segundos",
+    "ultima_estacion_id",
+    "version",
+)
+EVENT_COLUMNS = (
+    "part_id",
+    "station_id",
+    "timestamp_entrada",
+    "timestamp_salida",
+    "timestamp_entrada_ms",
+    "timestamp_salida_ms",
+    "resultado",
+    "operador_id",
+    "observaciones",
+)
+
+
+class _Timestamps:
+    """
+    Texto de DateTime en SQLite ("AAAA-MM-DD HH:MM:SS.ffffff") desde
+    milisegundos: prefijo por minuto (cacheado) + "SS.mmm000" de una tabla.
+    """
+
+    MAX_MINUTES = 100_000
+    SUFFIXES = [f"{ms // 1000:02d}.{ms % 1000:03d}000" for ms in range(60_000)]
+
+    def __init__(self):
+        self._minutes: Dict[int, str] = {}
+
+    def text(self, ms: int) -> str:
+        minute, rest = divmod(ms, 60_000)
+        prefix = self._minutes.get(minute)
+        if prefix is None:
+            if len(self._minutes) >= self.MAX_MINUTES:
+                self._minutes.clear()
+            prefix = ms_to_datetime(minute * 60_000).strftime("%Y-%m-%d %H:%M:")
+            self._minutes[minute] = prefix
+        return prefix + self.SUFFIXES[rest]
+
+
+_timestamps = _Timestamps()
+
+
+def simulate_day(
+    profile: Profile,
+    line: int,
+    route: List[StationModel],
+    day: date,
+    horizon_ms: int,
+) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Piezas del día de una línea y sus eventos (PART_COLUMNS / EVENT_COLUMNS).
+    Los eventos que empezarían después de `horizon_ms` no ocurren: esas
+    piezas quedan en proceso.
+    """
+    rng = random.Random(f"{profile.seed}:{line}:{day.isoformat()}")
+    types = [f"P{line}{chr(ord('A') + i)}" for i in range(3)]
+    shift_start = epoch_ms(datetime.combine(day, datetime.min.time())) + SHIFT_START_HOUR * 3_600_000
+    spacing = SHIFT_HOURS * 3600.0 / profile.parts_per_day
+    queue_rate = 1.0 / QUEUE_MEAN_SECONDS
+    text = _timestamps.text
+    expovariate, gauss, random_ = rng.expovariate, rng.gauss, rng.random
+
+    parts: List[tuple] = []
+    events: List[tuple] = []
+    lot_factor = 1.0
+    tipo_pieza = types[0]
+    lote = ""
+    for n in range(profile.parts_per_day):
+        if n % LOT_SIZE == 0:
+            lote = f"L{line}-{day:%y%m%d}-{n // LOT_SIZE:02d}"
+            tipo_pieza = rng.choice(types)
+            lot_factor = rng.lognormvariate(0.0, 0.6)
+
+        created = shift_start + int((n * spacing + rng.uniform(0, spacing)) * 1000)
+        part_id = f"L{line}-{day:%Y%m%d}-{n:05d}"
+        clock = created
+        reworks = 0
+        total_ms = 0
+        last_station = None
+        last_result = None
+
+        for station in route:
+            attempts = 0
+            while True:
+                entrada = clock + int(expovariate(queue_rate) * 1000)
+                if entrada > horizon_ms:
+                    break
+                # lognormal: exp de una normal (gauss es la variante rápida)
+                salida = entrada + int(math.exp(gauss(station.mu, station.sigma)) * 1000)
+                u = random_()
+                if u < station.p_scrap * lot_factor:
+                    resultado = TraceResult.SCRAP
+                elif u < (station.p_scrap + station.p_rework) * lot_factor and attempts < MAX_REWORKS:
+                    resultado = TraceResult.RETRABAJO
+                else:
+                    resultado = TraceResult.OK
+                events.append(
+                    (
+                        part_id,
+                        station.id,
+                        text(entrada),
+                        text(salida),
+                        entrada,
+                        salida,
+                        resultado,
+                        None,
+                        rng.choice(OBSERVACIONES[resultado]) if resultado in OBSERVACIONES else None,
+                    )
+                )
+
+                clock = salida
+                total_ms += salida - entrada
+                last_station = station.id
+                last_result = resultado
+                if resultado is not TraceResult.RETRABAJO:
+                    break
+                attempts += 1
+                reworks += 1
+            if last_result is not TraceResult.OK or clock > horizon_ms:
+                break
+
+        parts.append(
+            (
+                part_id,
+                tipo_pieza,
+                lote,
+                STATUS_AFTER.get(last_result, PartStatus.IN_PROCESS),
+                text(created),
+                created,
+                reworks,
+                total_ms / 1000.0,
+                last_station,
+                1,
+            )
+        )
+    return parts, events
+
+
+def _simulate(task) -> Tuple[List[tuple], List[tuple]]:
+    # en los procesos del pool (argumentos en una tupla para executor.map)
+    return simulate_day(*task)
+
+
+def _drop_fts_triggers(conn) -> None:
+    # un insert por fila en el índice FTS durante la carga; se reconstruye al final
+    for name in ("parts_fts_ai", "trace_events_fts_ai"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+def _rebuild_fts(conn) -> None:
+    for statement in PARTS_FTS_DDL + TRACE_EVENTS_FTS_DDL:
+        conn.execute(text(statement))
+    for fts_name in SEARCH_INDEXES:
+        conn.execute(text(f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')"))
+
+
+def _writer(conn, name: str, columns: Tuple[str, ...]):
+    # INSERT de Core compilado una vez; con un driver de parámetros posicionales
+    # (sqlite3) las tuplas van directo a executemany
+    stmt = table(name, *[column(c) for c in columns]).insert()
+    compiled = stmt.compile(dialect=conn.dialect)
+    if conn.dialect.positional and tuple(compiled.positiontup) == columns:
+        sql = str(compiled)
+        return lambda rows: conn.exec_driver_sql(sql, rows)
+    return lambda rows: conn.execute(stmt, [dict(zip(columns, row)) for row in rows])
+
+
+def _secondary_indexes():
+    for model in (Part, TraceEvent):
+        yield from model.__table__.indexes
+
+
+def generate(engine, profile: Profile, workers: int = 0, progress=print) -> Dict[str, float]:
+    """
+    Escribe el dataset en `engine` (esquema ya migrado y sin datos). Con
+    workers > 0 la simulación corre en ese número de procesos y este escribe.
+    """
+    station_rows, routes = build_plant(profile)
+    days = list(_days(profile))
+    horizon_ms = epoch_ms(datetime.combine(days[-1], datetime.min.time())) + MS_PER_DAY
+    tasks = [(profile, line, route, day, horizon_ms) for day in days for line, route in routes.items()]
+
+    counts = {"stations": len(station_rows), "parts": 0, "trace_events": 0}
+    pending_parts: List[tuple] = []
+    pending_events: List[tuple] = []
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        if workers > 0
+        else None
+    )
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        sqlite = conn.dialect.name == "sqlite"
+        if sqlite:
+            _drop_fts_triggers(conn)
+        for index in _secondary_indexes():
+            index.drop(conn, checkfirst=True)
+        conn.execute(Station.__table__.insert(), station_rows)
+        write_parts = _writer(conn, "parts", PART_COLUMNS)
+        write_events = _writer(conn, "trace_events", EVENT_COLUMNS)
+
+        def flush():
+            if pending_parts:
+                write_parts(pending_parts)
+                counts["parts"] += len(pending_parts)
+                pending_parts.clear()
+            if pending_events:
+                write_events(pending_events)
+                counts["trace_events"] += len(pending_events)
+                pending_events.clear()
+
+        # executor.map entrega en el orden de las tareas: mismo orden de escritura
+        results = executor.map(_simulate, tasks) if executor else map(_simulate, tasks)
+        try:
+            for task, (parts, events) in zip(tasks, results):
+                pending_parts.extend(parts)
+                pending_events.extend(events)
+                if len(pending_parts) + len(pending_events) >= BATCH_ROWS:
+                    flush()
+                if task[1] == profile.lines:
+                    progress(
+                        f"{task[3].isoformat()}: {counts['parts']} piezas, "
+                        f"{counts['trace_events']} eventos"
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        flush()
+        counts["load_seconds"] = time.perf_counter() - start
+
+        for index in _secondary_indexes():
+            index.create(conn, checkfirst=True)
+        if sqlite:
+            _rebuild_fts(conn)
+    counts["total_seconds"] = time.perf_counter() - start
+    return counts
+
+
+def main() -> None:
+    defaults = Profile()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=defaults.lines)
+    parser.add_argument("--stations", type=int, default=defaults.stations)
+    parser.add_argument("--parts-per-day", type=int, default=defaults.parts_per_day)
+    parser.add_argument("--months", type=int, default=defaults.months)
+    parser.add_argument("--start", type=date.fromisoformat, default=defaults.start)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max((os.cpu_count() or 1) - 1, 0),
+        help="procesos que simulan (0 = en este proceso)",
+    )
+    parser.add_argument("--url", default=None, help="base vacía (por defecto un archivo temporal)")
+    args = parser.parse_args()
+
+    profile = Profile(
+        lines=args.lines,
+        stations=args.stations,
+        parts_per_day=args.parts_per_day,
+        months=args.months,
+        start=args.start,
+        seed=args.seed,
+    )
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'synthetic.sqlite')}"
+    engine = create_engine(url)
+    upgrade(engine, progress=lambda message: None)
+
+    last_month = [None]
+
+    def progress(message: str) -> None:
+        # una línea por mes
+        if message[:7] != last_month[0]:
+            last_month[0] = message[:7]
+            print(message)
+
+    counts = generate(engine, profile, workers=args.workers, progress=progress)
+    rows = counts["stations"] + counts["parts"] + counts["trace_events"]
+    print(f"base: {url}")
+    print(
+        f"{counts['parts']} piezas, {counts['trace_events']} eventos: carga "
+        f"{counts['load_seconds']:.1f} s ({rows / counts['load_seconds']:,.0f} filas/s), "
+        f"con índices y FTS {counts['total_seconds']:.1f} s "
+        f"({rows / counts['total_seconds']:,.0f} filas/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()